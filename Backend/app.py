@@ -1,5 +1,6 @@
 from app import create_app, db
 from app.models import User
+from app.services.user_directory import user_directory, DuplicateUserError, InvalidUsernameError
 
 app = create_app()
 
@@ -15,16 +16,6 @@ def create_admin():
     email = click.prompt("请输入管理员邮箱", type=str)
     password = click.prompt("请输入管理员密码", type=str, hide_input=True, confirmation_prompt=True)
     
-    # 检查用户名是否已存在
-    if User.query.filter_by(username=username).first():
-        click.echo("错误：用户名已存在")
-        return
-    
-    # 检查邮箱是否已存在
-    if User.query.filter_by(email=email).first():
-        click.echo("错误：邮箱已被注册")
-        return
-    
     # 创建管理员用户
     admin = User(
         username=username,
@@ -34,9 +25,15 @@ def create_admin():
     )
     admin.set_password(password)
     
-    # 保存到数据库
-    db.session.add(admin)
-    db.session.commit()
+    # 保存到数据库，由唯一约束判断用户名/邮箱是否已存在
+    try:
+        user_directory.register(admin)
+    except DuplicateUserError as e:
+        click.echo("错误：邮箱已被注册" if e.field == 'email' else "错误：用户名已存在")
+        return
+    except InvalidUsernameError:
+        click.echo("错误：用户名不能包含 @")
+        return
     
     click.echo(f"管理员用户 {username} 创建成功！")
 
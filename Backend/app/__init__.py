@@ -1,20 +1,15 @@
-from flask import Flask, send_from_directory, current_app
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 from flask_cors import CORS
 from config import Config
-import logging
+from app.utils.db_routing import RoutingSession
 import os
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
 # 初始化扩展
-db = SQLAlchemy()
+# RoutingSession 在配置了只读副本时把只读请求的查询发往副本
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 
@@ -22,24 +17,63 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # 配置日志：后台线程写出，附带请求ID，可对 INFO 日志采样
+    from app.utils.logging_config import register_logging
+    register_logging(app)
+    
+    # JSON编码：默认使用 orjson，未安装时回退到标准库
+    from app.utils.json_provider import json_provider_for
+    app.json = json_provider_for(app)
+    
     # 启用CORS
     CORS(app, resources={
-        r"/api/*": {"origins": "*"},
+        r"/api/*": {"origins": "*", "expose_headers": ["X-Primary-Until"]},
         r"/uploads/*": {"origins": "*"}
     })
     
+    # 连接池参数，未显式配置 SQLALCHEMY_ENGINE_OPTIONS 时由 DB_POOL_* 生成
+    from app.utils.db_pool import engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
+    # 只读副本作为额外的 bind（replica_0、replica_1 ...）
+    from app.utils.db_routing import replica_binds, register_read_replicas
+    app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), **replica_binds(app.config)}
+    
     # 初始化扩展
     db.init_app(app)
+    register_read_replicas(app, db)
     migrate.init_app(app, db)
     jwt.init_app(app)
     
     # 注册蓝图
-    from app.routes import main_bp, auth_bp
+    from app.routes import main_bp, auth_bp, timeline_bp, notifications_bp, search_bp, trends_bp, admin_bp, tweets_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(timeline_bp, url_prefix='/api/timeline')
+    app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
+    app.register_blueprint(trends_bp, url_prefix='/api/trends')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(tweets_bp, url_prefix='/api/tweets')
+    
+    # SQL分析：每个请求的查询统计、N+1 检测与慢查询日志
+    from app.utils.sql_profiler import register_sql_profiler
+    register_sql_profiler(app)
+    
+    # 响应压缩与条件请求（ETag/304）
+    from app.utils.compression import register_compression
+    register_compression(app)
+    
+    # 请求指标（/metrics）
+    from app.utils.metrics import register_metrics
+    register_metrics(app)
+    
+    # 注册命令行命令
+    from app.commands import register_commands
+    register_commands(app)
     
     # 确保导入模型，使其被SQLAlchemy识别
-    from app.models import User, Tweet, Like, Comment, Notification, Report
+    from app.models import User, Tweet, Like, Comment, Notification, Report, TimelineEntry, PrimaryReadPin
     
     @app.shell_context_processor
     def make_shell_context():
@@ -50,12 +84,14 @@ def create_app(config_class=Config):
             'Like': Like,
             'Comment': Comment,
             'Notification': Notification,
-            'Report': Report
+            'Report': Report,
+            'TimelineEntry': TimelineEntry,
+            'PrimaryReadPin': PrimaryReadPin
         }
 
     @app.route('/uploads/avatars/<filename>')
     def serve_avatar(filename):
-        upload_dir = os.path.join(current_app.root_path, '..', 'uploads', 'avatars')
-        return send_from_directory(upload_dir, filename, mimetype='image/jpeg')
+        from app.services.avatar_service import serve_avatar as serve_avatar_file
+        return serve_avatar_file(filename)
 
     return app
\ No newline at end of file
@@ -0,0 +1,124 @@
+import json
+import click
+from flask.cli import with_appcontext
+
+@click.command("reconcile-counters")
+@click.option("--chunk-size", default=1000, show_default=True, help="每批处理的行数")
+@with_appcontext
+def reconcile_counters(chunk_size):
+    """校正推文和用户的反规范化计数器"""
+    from app.services.counter_service import reconcile_tweet_counters, reconcile_user_counters
+    tweets_fixed = reconcile_tweet_counters(chunk_size)
+    click.echo(f"已校正 {tweets_fixed} 条推文的点赞/评论计数")
+    users_fixed = reconcile_user_counters(chunk_size)
+    click.echo(f"已校正 {users_fixed} 个用户的关注/粉丝计数")
+
+@click.command("rebuild-timelines")
+@click.option("--user-id", type=int, default=None, help="只重建该用户的时间线")
+@click.option("--chunk-size", default=500, show_default=True, help="每批处理的用户数，每批提交一次")
+@with_appcontext
+def rebuild_timelines(user_id, chunk_size):
+    """从关注关系和推文重建预计算的主页时间线"""
+    from sqlalchemy import select
+    from app import db
+    from app.models import User
+    from app.services.timeline_service import rebuild_timeline
+    if user_id is not None:
+        rebuild_timeline(user_id)
+        db.session.commit()
+        click.echo(f"已重建用户 {user_id} 的时间线")
+        return
+    rebuilt, last_id = 0, 0
+    while True:
+        ids = list(db.session.scalars(select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)))
+        if not ids:
+            break
+        for each_id in ids:
+            rebuild_timeline(each_id)
+        db.session.commit()
+        rebuilt += len(ids)
+        last_id = ids[-1]
+    click.echo(f"已重建 {rebuilt} 个用户的时间线")
+
+@click.command("trim-timelines")
+@click.option("--chunk-size", default=500, show_default=True, help="每批处理的用户数，每批提交一次")
+@with_appcontext
+def trim_timelines(chunk_size):
+    """删除超出 TIMELINE_MAX_LENGTH 的最旧时间线条目，建议定期运行（如 cron）"""
+    from app.services.timeline_service import trim_timelines as trim
+    click.echo(f"已裁剪 {trim(chunk_size)} 个用户的时间线")
+
+@click.command("prune-avatars")
+@click.option("--min-age", default=3600, show_default=True, help="只删除早于该秒数的文件")
+@click.option("--dry-run", is_flag=True, help="只列出将被删除的文件")
+@with_appcontext
+def prune_avatars(min_age, dry_run):
+    """删除没有任何用户引用的头像文件及其缩略图"""
+    from app.services.avatar_service import prune_unreferenced
+    removed = prune_unreferenced(min_age=min_age, dry_run=dry_run)
+    for name in removed:
+        click.echo(name)
+    click.echo(f"{'将删除' if dry_run else '已删除'} {len(removed)} 个文件")
+
+@click.command("search-index")
+@click.option("--kind", type=click.Choice(["tweets", "users", "all"]), default="all", show_default=True, help="要重建的索引")
+@click.option("--segment-docs", default=200000, show_default=True, help="每个索引段包含的最大文档数")
+@with_appcontext
+def search_index(kind, segment_docs):
+    """从数据库重建全文搜索索引段，运行中的进程会在下次刷新时切换到新索引"""
+    from app.services.search_service import rebuild_index
+    for name in (["tweets", "users"] if kind == "all" else [kind]):
+        count = rebuild_index(name, segment_docs=segment_docs)
+        click.echo(f"已为 {name} 建立索引，共 {count} 个文档")
+
+@click.command("audit-passwords")
+@click.option("--chunk-size", default=500, show_default=True, help="每批检查的用户数，每批提交一次")
+@click.option("--workers", type=int, default=None, help="哈希校验进程数，默认等于CPU核数")
+@click.option("--report", "report_path", default="password_audit.jsonl", show_default=True, help="问题用户报告（JSON Lines）")
+@click.option("--checkpoint", "checkpoint_path", default="password_audit.checkpoint.json", show_default=True, help="进度检查点文件")
+@click.option("--resume", is_flag=True, help="从检查点继续上次中断的检查")
+@click.option("--weak-password", "weak_passwords", multiple=True, help="需要检出的弱密码，可多次指定，{id} 替换为用户ID；默认为旧修复脚本设置的密码")
+@click.option("--skip-weak-check", is_flag=True, help="不校验弱密码，只检查哈希格式和参数")
+@click.option("--fix", is_flag=True, help="将哈希缺失或无效的用户重置为临时密码")
+@with_appcontext
+def audit_passwords(chunk_size, workers, report_path, checkpoint_path, resume, weak_passwords, skip_weak_check, fix):
+    """按ID分批检查所有用户的密码哈希，可中断后继续"""
+    from app.services.password_audit import run_audit, DEFAULT_WEAK_PASSWORDS
+    if skip_weak_check:
+        weak_passwords = ()
+    elif not weak_passwords:
+        weak_passwords = DEFAULT_WEAK_PASSWORDS
+    temporary_password = None
+    if fix:
+        temporary_password = click.prompt("临时密码", hide_input=True, confirmation_prompt=True)
+
+    counts = run_audit(
+        report_path, checkpoint_path, chunk_size=chunk_size, workers=workers, resume=resume,
+        weak_passwords=weak_passwords, temporary_password=temporary_password,
+        progress=lambda checkpoint: click.echo(f"已检查 {checkpoint.counts['scanned']} 个用户（ID ≤ {checkpoint.last_id}）", err=True)
+    )
+    click.echo(json.dumps(counts, ensure_ascii=False))
+
+@click.command("reset-password")
+@click.argument("username")
+@with_appcontext
+def reset_password(username):
+    """重置指定用户的密码"""
+    from app import db
+    from app.models import User
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f"用户 {username} 不存在")
+    user.set_password(click.prompt("新密码", hide_input=True, confirmation_prompt=True))
+    db.session.commit()
+    click.echo(f"用户 {username} 的密码已重置")
+
+def register_commands(app):
+    """注册 flask 命令行命令"""
+    app.cli.add_command(reconcile_counters)
+    app.cli.add_command(rebuild_timelines)
+    app.cli.add_command(trim_timelines)
+    app.cli.add_command(prune_avatars)
+    app.cli.add_command(search_index)
+    app.cli.add_command(audit_passwords)
+    app.cli.add_command(reset_password)
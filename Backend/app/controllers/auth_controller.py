@@ -1,13 +1,28 @@
-from flask import request, jsonify, current_app
-from werkzeug.exceptions import BadRequest
-from werkzeug.utils import secure_filename
-import os
-from datetime import datetime
+from flask import request, jsonify
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
 from app.models import User
 from app import db
 from app.services.auth_service import validate_registration_data, generate_tokens, token_required
+from app.services.password_service import PasswordHashingBusy
+from app.services.user_directory import user_directory, DuplicateUserError
+from app.services.user_cache import user_cache
+from app.services.avatar_service import store_avatar, thumbnail_urls, AvatarTooLarge, InvalidAvatar
+from app.schemas import UserSchema, InvalidFields, requested_fields, dump
+from flask_jwt_extended import get_jwt
 import logging
 
+logger = logging.getLogger(__name__)
+
+def _hashing_busy_response():
+    response = jsonify({"status": "error", "message": "Server busy, please try again shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def _duplicate_user_response(field):
+    if field == 'email':
+        return jsonify({"status": "error", "message": "Email already registered"}), 400
+    return jsonify({"status": "error", "message": "Username already exists"}), 400
+
 class AuthController:
     """
     Authentication controller
@@ -27,13 +42,10 @@ class AuthController:
             if error:
                 return jsonify({"status": "error", "message": error}), 400
             
-            # Check if username already exists
-            if User.query.filter_by(username=data['username']).first():
-                return jsonify({"status": "error", "message": "Username already exists"}), 400
-            
-            # Check if email already exists
-            if User.query.filter_by(email=data['email']).first():
-                return jsonify({"status": "error", "message": "Email already registered"}), 400
+            # Fast-reject duplicates already known to this process before hashing
+            taken = user_directory.known_taken(data['username'], data['email'])
+            if taken:
+                return _duplicate_user_response(taken)
             
             # Create new user
             user = User(
@@ -44,23 +56,23 @@ class AuthController:
             )
             user.set_password(data['password'])
             
-            # Save to database
-            db.session.add(user)
-            db.session.commit()
+            # Save to database; the unique constraints are the authoritative check
+            try:
+                user_directory.register(user)
+            except DuplicateUserError as e:
+                return _duplicate_user_response(e.field)
             
             return jsonify({
                 "status": "success",
                 "message": "Registration successful",
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "nickname": user.nickname,
-                    "email": user.email
-                }
+                "user": dump(UserSchema, user, only=UserSchema.REGISTER_FIELDS, sparse=False)
             }), 201
             
         except BadRequest:
             return jsonify({"status": "error", "message": "Invalid JSON data"}), 400
+        except PasswordHashingBusy:
+            db.session.rollback()
+            return _hashing_busy_response()
         except Exception as e:
             db.session.rollback()
             return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
@@ -80,91 +92,70 @@ class AuthController:
                 return jsonify({"status": "error", "message": "Username and password required"}), 400
             
             # Find user (supports login with username or email)
-            user = User.query.filter_by(username=data['username']).first() or \
-                User.query.filter_by(email=data['username']).first()
+            user = user_directory.resolve(data['username'])
             
-            # Debug: Check if user exists
             if not user:
-                logging.error(f"Login failed: No user found with username/email {data['username']}")
+                logger.warning("Login failed: no user found for %s", data['username'])
                 return jsonify({"status": "error", "message": "Invalid username or password"}), 401
             
-            # Debug: Check if password_hash is set
             if not user.password_hash:
-                logging.error(f"Login failed: User {user.username} has no password_hash set")
+                logger.error("Login failed: user %s has no password_hash set", user.username)
                 return jsonify({"status": "error", "message": "User account corrupted, please contact support"}), 500
             
-            # Debug: Check password verification with input password
-            input_password = data['password']
-            logging.info(f"Attempting login for user {user.username} with password: {input_password[:1]}***")
-            
             # Verify password
-            password_check_result = user.check_password(input_password)
-            logging.info(f"Password verification for user {user.username}: {password_check_result}")
-            
-            # Return error if password check fails
-            if not password_check_result:
-                logging.error(f"Login failed: Invalid password for user {user.username}")
+            input_password = data['password']
+            if not user.check_password(input_password):
+                logger.warning("Login failed: invalid password for user %s", user.username)
                 return jsonify({"status": "error", "message": "Invalid username or password"}), 401
             
+            # Transparently upgrade hashes made with older parameters
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(input_password)
+                    db.session.commit()
+                except PasswordHashingBusy:
+                    db.session.rollback()
+            
             # Generate tokens
-            tokens = generate_tokens(user.id)
+            tokens = generate_tokens(user.id, is_admin=user.is_admin)
+            logger.info("Login succeeded for user %s", user.username)
             
             return jsonify({
                 "status": "success",
                 "message": "Login successful",
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "nickname": user.nickname,
-                    "email": user.email,
-                    "avatar": user.avatar,
-                    "bio": user.bio,
-                    "is_admin": user.is_admin
-                },
+                "user": dump(UserSchema, user, only=UserSchema.LOGIN_FIELDS, sparse=False),
                 "access_token": tokens['access_token'],
                 "refresh_token": tokens['refresh_token']
             }), 200
             
         except BadRequest:
             return jsonify({"status": "error", "message": "Invalid JSON data"}), 400
+        except PasswordHashingBusy:
+            db.session.rollback()
+            return _hashing_busy_response()
         except Exception as e:
-            logging.error(f"Login error: {str(e)}")
+            logger.exception("Login error")
             return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
 
     @staticmethod
     @token_required
-    def get_current_user(current_user_id):
+    def get_current_user(current_user_id, current_user):
         """
         Get current logged in user information
         """
         try:
-            user = User.query.get(current_user_id)
+            user = current_user
             if not user:
                 return jsonify({"status": "error", "message": "User not found"}), 404
             
-            # 返回 avatar 字段为相对路径
-            avatar = user.avatar
-            if avatar and not avatar.startswith("/uploads/"):
-                avatar = f"/uploads/avatars/{avatar}"
-            elif not avatar:
-                avatar = "/default-avatar.png"
-            
+            # Only the fields selected with ?fields= are computed
             return jsonify({
                 "status": "success",
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "nickname": user.nickname,
-                    "email": user.email,
-                    "bio": user.bio,
-                    "avatar": avatar,
-                    "created_at": user.created_at.isoformat(),
-                    "followers_count": user.followers_list.count(),
-                    "following_count": user.followed.count(),
-                    "is_admin": user.is_admin
-                }
+                "user": dump(UserSchema, user)
             }), 200
             
+        except InvalidFields as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         except Exception as e:
             return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
 
@@ -175,13 +166,19 @@ class AuthController:
         Check if the current user is an admin
         """
         try:
-            user = User.query.get(current_user_id)
-            if not user:
-                return jsonify({"status": "error", "message": "User not found"}), 404
+            # Tokens issued by generate_tokens carry the is_admin claim
+            claims = get_jwt()
+            if 'is_admin' in claims:
+                is_admin = claims['is_admin']
+            else:
+                user = user_cache.get(current_user_id)
+                if not user:
+                    return jsonify({"status": "error", "message": "User not found"}), 404
+                is_admin = user.is_admin
             
             return jsonify({
                 "status": "success",
-                "is_admin": user.is_admin
+                "is_admin": is_admin
             }), 200
             
         except Exception as e:
@@ -196,6 +193,8 @@ class AuthController:
             data = request.get_json()
             if not data:
                 return jsonify({"status": "error", "message": "No data provided"}), 400
+            # Reject an invalid ?fields= selection before changing anything
+            requested_fields(UserSchema)
 
             user = User.query.get(current_user_id)
             if not user:
@@ -232,26 +231,21 @@ class AuthController:
                 user.bio = data['bio']
 
             db.session.commit()
+            user_cache.invalidate(user.id)
 
             return jsonify({
                 "status": "success",
                 "message": "Profile updated successfully",
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "nickname": user.nickname,
-                    "email": user.email,
-                    "bio": user.bio,
-                    "avatar": user.avatar,
-                    "created_at": user.created_at.isoformat(),
-                    "followers_count": user.followers_list.count(),
-                    "following_count": user.followed.count(),
-                    "is_admin": user.is_admin
-                }
+                "user": dump(UserSchema, user)
             }), 200
 
+        except InvalidFields as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         except BadRequest:
             return jsonify({"status": "error", "message": "Invalid JSON data"}), 400
+        except PasswordHashingBusy:
+            db.session.rollback()
+            return _hashing_busy_response()
         except Exception as e:
             db.session.rollback()
             return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
@@ -262,14 +256,23 @@ class AuthController:
         Upload user avatar
         """
         try:
+            # Parsing the form rejects bodies over MAX_CONTENT_LENGTH before spooling them
+            try:
+                files = request.files
+            except RequestEntityTooLarge:
+                return jsonify({
+                    "status": "error",
+                    "message": "File size too large. Maximum size is 2MB"
+                }), 413
+
             # Check if file is present in request
-            if 'avatar' not in request.files:
+            if 'avatar' not in files:
                 return jsonify({
                     "status": "error",
                     "message": "No file provided"
                 }), 400
 
-            file = request.files['avatar']
+            file = files['avatar']
             
             # Check if file is empty
             if file.filename == '':
@@ -287,29 +290,6 @@ class AuthController:
                     "message": "Invalid file type. Allowed types: png, jpg, jpeg, gif"
                 }), 400
 
-            # Check file size (2MB limit)
-            if len(file.read()) > 2 * 1024 * 1024:  # 2MB in bytes
-                return jsonify({
-                    "status": "error",
-                    "message": "File size too large. Maximum size is 2MB"
-                }), 400
-
-            # Reset file pointer after reading
-            file.seek(0)
-
-            # Generate secure filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{current_user_id}_{timestamp}_{secure_filename(file.filename)}"
-            
-            # Ensure upload directory exists
-            upload_dir = os.path.join(current_app.root_path, '..', 'uploads', 'avatars')
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Save file
-            file_path = os.path.join(upload_dir, filename)
-            file.save(file_path)
-
-            # Update user avatar in database
             user = User.query.get(current_user_id)
             if not user:
                 return jsonify({
@@ -317,15 +297,24 @@ class AuthController:
                     "message": "User not found"
                 }), 404
 
-            # Delete old avatar if exists
-            if user.avatar and user.avatar != 'default_avatar.jpg':
-                old_avatar_path = os.path.join(upload_dir, user.avatar)
-                if os.path.exists(old_avatar_path):
-                    os.remove(old_avatar_path)
+            # Stream to content-addressed storage, enforcing the size limit while copying
+            try:
+                filename = store_avatar(file)
+            except AvatarTooLarge:
+                return jsonify({
+                    "status": "error",
+                    "message": "File size too large. Maximum size is 2MB"
+                }), 413
+            except InvalidAvatar:
+                return jsonify({
+                    "status": "error",
+                    "message": "Invalid image file. Allowed types: png, jpg, jpeg, gif"
+                }), 400
 
-            # Update avatar path in database
+            # Old files may be shared with other users; `flask prune-avatars` removes unreferenced ones
             user.avatar = filename
             db.session.commit()
+            user_cache.invalidate(user.id)
 
             # 返回相对路径
             avatar_url = f"/uploads/avatars/{filename}"
@@ -333,7 +322,8 @@ class AuthController:
             return jsonify({
                 "status": "success",
                 "message": "Avatar uploaded successfully",
-                "avatar_url": avatar_url
+                "avatar_url": avatar_url,
+                "avatar_thumbnails": thumbnail_urls(filename)
             }), 200
 
         except Exception as e:
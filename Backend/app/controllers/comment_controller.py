@@ -0,0 +1,36 @@
+from flask import request, jsonify
+from app import db
+from app.models import Tweet
+from app.services.auth_service import token_required
+from app.services import comment_service
+from app.utils.pagination import InvalidCursor
+
+class CommentController:
+    """
+    Comment controller
+    """
+    @staticmethod
+    @token_required
+    def get_comments(current_user_id, tweet_id):
+        """
+        Get one page of a tweet's comments, oldest first
+        """
+        try:
+            comment_count = db.session.query(Tweet.comments_count).filter(Tweet.id == tweet_id).scalar()
+            if comment_count is None:
+                return jsonify({"status": "error", "message": "Tweet not found"}), 404
+            limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+            comments, page = comment_service.get_thread(tweet_id, limit=limit, cursor=request.args.get('cursor'))
+
+            return jsonify({
+                "status": "success",
+                "comments": comments,
+                "comment_count": comment_count,
+                **page.to_dict()
+            }), 200
+
+        except InvalidCursor as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
@@ -0,0 +1,65 @@
+from flask import request, jsonify
+from app import db
+from app.services.auth_service import admin_required
+from app.services import moderation_service
+from app.utils.pagination import InvalidCursor
+
+class ModerationController:
+    """
+    Moderation queue controller (admin only)
+    """
+    @staticmethod
+    @admin_required
+    def get_queue(current_user_id):
+        """
+        Get pending reports aggregated per target, highest priority first
+        """
+        try:
+            limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+            page, total = moderation_service.get_queue(limit=limit, cursor=request.args.get('cursor'))
+
+            response = {
+                "status": "success",
+                "targets": page.items,
+                **page.to_dict()
+            }
+            if total is not None:
+                response["total"] = total
+            return jsonify(response), 200
+
+        except InvalidCursor as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
+
+    @staticmethod
+    @admin_required
+    def resolve(current_user_id):
+        """
+        Resolve all pending reports for one or more targets
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            targets = data.get('targets')
+            if not isinstance(targets, list) or not targets:
+                return jsonify({"status": "error", "message": "targets must be a non-empty list"}), 400
+            try:
+                pairs = [(t['type'], int(t['id'])) for t in targets]
+            except (KeyError, TypeError, ValueError):
+                return jsonify({"status": "error", "message": "Each target needs a type and an integer id"}), 400
+
+            try:
+                updated = moderation_service.resolve(pairs, status=data.get('status', 'resolved'))
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            db.session.commit()
+
+            return jsonify({
+                "status": "success",
+                "updated": updated
+            }), 200
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
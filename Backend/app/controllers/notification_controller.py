@@ -0,0 +1,101 @@
+from flask import request, jsonify
+from app import db
+from app.services.auth_service import token_required
+from app.services import inbox_service
+from app.services.notification_service import unread_count
+from app.utils.pagination import InvalidCursor
+
+class NotificationController:
+    """
+    Notification inbox controller
+    """
+    @staticmethod
+    @token_required
+    def list_notifications(current_user_id):
+        """
+        Get one page of the current user's notifications
+        """
+        try:
+            limit = min(request.args.get('limit', 20, type=int), 100)
+            unread_only = request.args.get('unread', '').lower() in ('1', 'true')
+            page = inbox_service.get_inbox(current_user_id, limit=limit,
+                                           cursor=request.args.get('cursor'), unread_only=unread_only)
+
+            return jsonify({
+                "status": "success",
+                "notifications": [inbox_service.serialize(n) for n in page.items],
+                "unread_count": unread_count(current_user_id),
+                **page.to_dict()
+            }), 200
+
+        except InvalidCursor as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
+
+    @staticmethod
+    @token_required
+    def notifications_since(current_user_id):
+        """
+        Get notifications created or coalesced after since_seq
+        """
+        try:
+            since_seq = request.args.get('since_seq', type=int)
+            if since_seq is None:
+                return jsonify({"status": "error", "message": "since_seq is required"}), 400
+            limit = min(request.args.get('limit', 100, type=int), 500)
+
+            notifications = inbox_service.get_since(current_user_id, since_seq, limit=limit)
+
+            return jsonify({
+                "status": "success",
+                "notifications": [inbox_service.serialize(n) for n in notifications],
+                "latest_seq": notifications[-1].updated_seq if notifications else since_seq,
+                "has_more": len(notifications) == limit,
+                "unread_count": unread_count(current_user_id)
+            }), 200
+
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
+
+    @staticmethod
+    @token_required
+    def mark_read(current_user_id):
+        """
+        Mark notifications read by id range, up to a cursor, or all of them
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            from_id = data.get('from_id')
+            to_id = data.get('to_id')
+            for value in (from_id, to_id):
+                if value is not None and not isinstance(value, int):
+                    return jsonify({"status": "error", "message": "from_id and to_id must be integers"}), 400
+
+            marked = inbox_service.mark_read(current_user_id, from_id=from_id, to_id=to_id,
+                                             before_cursor=data.get('before_cursor'))
+            db.session.commit()
+
+            return jsonify({
+                "status": "success",
+                "marked": marked,
+                "unread_count": unread_count(current_user_id)
+            }), 200
+
+        except InvalidCursor as e:
+            db.session.rollback()
+            return jsonify({"status": "error", "message": str(e)}), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
+
+    @staticmethod
+    @token_required
+    def get_unread_count(current_user_id):
+        """
+        Get the current user's unread notification count
+        """
+        try:
+            return jsonify({"status": "success", "unread_count": unread_count(current_user_id)}), 200
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
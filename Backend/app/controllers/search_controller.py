@@ -0,0 +1,61 @@
+from flask import request, jsonify
+from app.services.auth_service import token_required
+from app.services import search_service
+
+# Ranked results are paged by offset; deep pages are not served
+MAX_OFFSET = 1000
+
+def _paging():
+    limit = max(1, min(request.args.get('limit', 20, type=int), 50))
+    offset = max(0, min(request.args.get('offset', 0, type=int), MAX_OFFSET))
+    return limit, offset
+
+class SearchController:
+    """
+    Search controller
+    """
+    @staticmethod
+    @token_required
+    def search_tweets(current_user_id):
+        """
+        Full-text search over tweet content
+        """
+        try:
+            query = request.args.get('q', '').strip()
+            if not query:
+                return jsonify({"status": "error", "message": "Search query is required"}), 400
+            limit, offset = _paging()
+
+            tweets = search_service.search_tweets(query, limit=limit, offset=offset, viewer_id=current_user_id)
+
+            return jsonify({
+                "status": "success",
+                "tweets": tweets,
+                "next_offset": offset + limit if len(tweets) == limit and offset + limit <= MAX_OFFSET else None
+            }), 200
+
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
+
+    @staticmethod
+    @token_required
+    def search_users(current_user_id):
+        """
+        Full-text search over username, nickname and bio
+        """
+        try:
+            query = request.args.get('q', '').strip()
+            if not query:
+                return jsonify({"status": "error", "message": "Search query is required"}), 400
+            limit, offset = _paging()
+
+            users = search_service.search_users(query, limit=limit, offset=offset)
+
+            return jsonify({
+                "status": "success",
+                "users": users,
+                "next_offset": offset + limit if len(users) == limit and offset + limit <= MAX_OFFSET else None
+            }), 200
+
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
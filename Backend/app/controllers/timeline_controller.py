@@ -0,0 +1,36 @@
+from flask import request, jsonify
+from app.services.auth_service import token_required
+from app.services import timeline_service
+from app.services.tweet_service import load_tweets
+from app.services.comment_service import get_previews
+
+class TimelineController:
+    """
+    Timeline controller
+    """
+    @staticmethod
+    @token_required
+    def home_timeline(current_user_id):
+        """
+        Get the current user's home timeline
+        """
+        try:
+            limit = min(request.args.get('limit', 20, type=int), 100)
+            max_id = request.args.get('max_id', type=int)
+            previews = max(0, min(request.args.get('comment_previews', 0, type=int), 3))
+
+            tweet_ids = timeline_service.get_home_timeline_ids(current_user_id, limit=limit, max_id=max_id)
+            tweets = load_tweets(tweet_ids, viewer_id=current_user_id)
+            if previews:
+                comments = get_previews(tweet_ids, per_tweet=previews)
+                for tweet in tweets:
+                    tweet["comment_previews"] = comments.get(tweet["id"], [])
+
+            return jsonify({
+                "status": "success",
+                "tweets": tweets,
+                "next_max_id": tweet_ids[-1] if len(tweet_ids) == limit else None
+            }), 200
+
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
@@ -0,0 +1,26 @@
+from flask import request, jsonify
+from app.services import trend_service
+
+class TrendController:
+    """
+    Trending topics controller
+    """
+    @staticmethod
+    def get_trends():
+        """
+        Get trending hashtags and phrases for a time window
+        """
+        try:
+            window = request.args.get('window', '1h')
+            if window not in trend_service.WINDOWS:
+                return jsonify({"status": "error", "message": f"window must be one of {', '.join(trend_service.WINDOWS)}"}), 400
+            limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+            return jsonify({
+                "status": "success",
+                "window": window,
+                **trend_service.get_trends(window, limit=limit)
+            }), 200
+
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
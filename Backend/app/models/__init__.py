@@ -4,3 +4,5 @@ from app.models.like import Like
 from app.models.comment import Comment
 from app.models.notification import Notification, NotificationType
 from app.models.report import Report, ReportType
+from app.models.timeline import TimelineEntry
+from app.models.primary_pin import PrimaryReadPin
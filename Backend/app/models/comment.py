@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.models.tweet import Tweet
 
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -7,4 +8,27 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # 按推文分页的复合索引 (tweet_id, created_at, id)
+    __table_args__ = (db.Index('ix_comment_tweet_id_created_at_id', 'tweet_id', 'created_at', 'id'),)
+
+def _bump_comments_count(connection, tweet_id, delta):
+    tweet = Tweet.__table__
+    connection.execute(
+        tweet.update()
+        .where(tweet.c.id == tweet_id)
+        # 计数变化不算内容修改，保持 updated_at 不变
+        .values(comments_count=tweet.c.comments_count + delta, updated_at=tweet.c.updated_at)
+    )
+
+@db.event.listens_for(Comment, 'after_insert')
+def _comment_inserted(mapper, connection, target):
+    _bump_comments_count(connection, target.tweet_id, 1)
+    # 通知推文作者（写后缓冲，事务提交后才入队）
+    from app.services.notification_service import notify_comment
+    notify_comment(target, connection)
+
+@db.event.listens_for(Comment, 'after_delete')
+def _comment_deleted(mapper, connection, target):
+    _bump_comments_count(connection, target.tweet_id, -1)
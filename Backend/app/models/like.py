@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from app.models.tweet import Tweet
 
 class Like(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -8,4 +9,24 @@ class Like(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # 添加唯一约束防止重复点赞
-    __table_args__ = (db.UniqueConstraint('user_id', 'tweet_id', name='unique_user_like'),) 
\ No newline at end of file
+    __table_args__ = (db.UniqueConstraint('user_id', 'tweet_id', name='unique_user_like'),)
+
+def _bump_likes_count(connection, tweet_id, delta):
+    tweet = Tweet.__table__
+    connection.execute(
+        tweet.update()
+        .where(tweet.c.id == tweet_id)
+        # 计数变化不算内容修改，保持 updated_at 不变
+        .values(likes_count=tweet.c.likes_count + delta, updated_at=tweet.c.updated_at)
+    )
+
+@db.event.listens_for(Like, 'after_insert')
+def _like_inserted(mapper, connection, target):
+    _bump_likes_count(connection, target.tweet_id, 1)
+    # 通知推文作者（写后缓冲，事务提交后才入队）
+    from app.services.notification_service import notify_like
+    notify_like(target, connection)
+
+@db.event.listens_for(Like, 'after_delete')
+def _like_deleted(mapper, connection, target):
+    _bump_likes_count(connection, target.tweet_id, -1)
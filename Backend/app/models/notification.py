@@ -15,10 +15,36 @@ class Notification(db.Model):
     comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True)  # 可能为空
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 合并的同类事件数（"A 和其他 41 人赞了你的推文"），sender_id 为最近一位发送者
+    actor_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # 收件人维度单调递增的变更序号，新建或合并时由通知写入器从 user.notification_seq 分配，
+    # 增量同步与收件箱分页都基于它（合并会更新 created_at，但 id 不变）
+    updated_seq = db.Column(db.Integer, nullable=False)
+    
+    # 收件箱分页/增量同步 (user_id, updated_seq)，未读列表与批量标记已读 (user_id, is_read, updated_seq)
+    __table_args__ = (
+        db.Index('uq_notification_user_id_updated_seq', 'user_id', 'updated_seq', unique=True),
+        db.Index('ix_notification_user_id_is_read_updated_seq', 'user_id', 'is_read', 'updated_seq'),
+    )
     
     # 发送者关系
     sender = db.relationship('User', foreign_keys=[sender_id])
     # tweet关系
     tweet = db.relationship('Tweet', backref='notifications', foreign_keys=[tweet_id])
     # comment关系
-    comment = db.relationship('Comment', backref='notifications', foreign_keys=[comment_id]) 
\ No newline at end of file
+    comment = db.relationship('Comment', backref='notifications', foreign_keys=[comment_id])
+    
+    def summary(self):
+        """通知摘要文本，合并的事件显示为 "A and N others ..." """
+        actions = {
+            NotificationType.FOLLOW: 'followed you',
+            NotificationType.LIKE: 'liked your tweet',
+            NotificationType.COMMENT: 'commented on your tweet'
+        }
+        name = self.sender.nickname or self.sender.username
+        others = self.actor_count - 1
+        if others == 1:
+            name = f"{name} and 1 other"
+        elif others > 1:
+            name = f"{name} and {others} others"
+        return f"{name} {actions.get(self.type, self.type)}" 
\ No newline at end of file
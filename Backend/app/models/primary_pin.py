@@ -0,0 +1,8 @@
+from app import db
+
+class PrimaryReadPin(db.Model):
+    """用户提交写入后，其读取在 until 之前留在主库（读己之写），所有进程共享"""
+    __tablename__ = 'primary_read_pin'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # JWT identity，不加外键，注册请求也可写入
+    until = db.Column(db.Float, nullable=False)  # Unix 时间戳（秒）
@@ -19,6 +19,13 @@ class Report(db.Model):
     status = db.Column(db.String(20), default='pending')  # pending, reviewed, resolved
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 审核队列按目标聚合待处理举报、按目标批量处理
+    __table_args__ = (
+        db.Index('ix_report_status_tweet_id', 'status', 'tweet_id'),
+        db.Index('ix_report_status_comment_id', 'status', 'comment_id'),
+        db.Index('ix_report_status_reported_user_id', 'status', 'reported_user_id'),
+    )
+    
     # 被举报用户
     reported_user = db.relationship('User', foreign_keys=[reported_user_id])
     # 评论
@@ -0,0 +1,11 @@
+from app import db
+
+class TimelineEntry(db.Model):
+    """预计算的主页时间线条目（fan-out-on-write）"""
+    __tablename__ = 'timeline_entry'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), primary_key=True)
+
+    # 主键 (user_id, tweet_id) 支持按用户倒序扫描；tweet_id 索引用于删除推文时清理
+    __table_args__ = (db.Index('ix_timeline_entry_tweet_id', 'tweet_id'),)
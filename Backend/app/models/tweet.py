@@ -9,6 +9,16 @@ class Tweet(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 反规范化计数器，与点赞/评论写入在同一事务中更新
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comments_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # 按作者分页的复合索引 (user_id, created_at, id)；(updated_at, id) 供搜索索引按修改时间补录
+    __table_args__ = (
+        db.Index('ix_tweet_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_tweet_updated_at_id', 'updated_at', 'id'),
+    )
+    
     # 关系
     likes = db.relationship('Like', backref='tweet', lazy='dynamic', cascade='all, delete-orphan')
     comments = db.relationship('Comment', backref='tweet', lazy='dynamic', cascade='all, delete-orphan')
@@ -16,7 +26,19 @@ class Tweet(db.Model):
                               foreign_keys='Report.tweet_id', cascade='all, delete-orphan')
     
     def like_count(self):
-        return self.likes.count()
+        return self.likes_count
         
     def comment_count(self):
-        return self.comments.count() 
\ No newline at end of file
+        return self.comments_count
+
+# 发推时写入作者和粉丝的预计算时间线，与推文在同一事务中
+@db.event.listens_for(Tweet, 'after_insert')
+def _tweet_inserted(mapper, connection, target):
+    from app.services.timeline_service import push_tweet
+    push_tweet(target, connection)
+
+# 删除推文前先清理时间线条目（timeline_entry.tweet_id 外键引用推文）
+@db.event.listens_for(Tweet, 'before_delete')
+def _tweet_deleting(mapper, connection, target):
+    from app.services.timeline_service import remove_tweet
+    remove_tweet(target, connection)
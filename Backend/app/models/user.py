@@ -1,12 +1,15 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
 import logging
 
+logger = logging.getLogger(__name__)
+
 # 用户关注关系（自引用多对多）
 followers = db.Table('followers',
     db.Column('follower_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    # 主键 (follower_id, followed_id) 覆盖"关注列表"，该索引覆盖"粉丝列表"
+    db.Index('ix_followers_followed_id_follower_id', 'followed_id', 'follower_id')
 )
 
 class User(db.Model):
@@ -21,6 +24,15 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 反规范化计数器，与关注/取关写入在同一事务中更新
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    unread_notification_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 未读通知数，由通知写入器维护
+    notification_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 最近分配的通知变更序号
+    
+    # 搜索索引按 (updated_at, id) 补录其他进程修改的资料
+    __table_args__ = (db.Index('ix_user_updated_at_id', 'updated_at', 'id'),)
+    
     # 关系
     tweets = db.relationship('Tweet', backref='author', lazy='dynamic', cascade='all, delete-orphan')
     likes = db.relationship('Like', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -41,48 +53,88 @@ class User(db.Model):
     def set_password(self, password):
         """生成密码哈希并存储"""
         if not password:
-            logging.error("Attempt to set empty password")
+            logger.error("Attempt to set empty password")
             raise ValueError("Password cannot be empty")
         
-        # 使用Werkzeug的generate_password_hash生成安全的密码哈希
-        self.password_hash = generate_password_hash(password)
-        logging.info(f"Password hash generated for user {self.username}: {self.password_hash[:15]}...")
+        # 在哈希进程池中计算，避免占用请求线程的CPU
+        from app.services.password_service import hash_password
+        self.password_hash = hash_password(password)
+        logger.debug("Password hash generated for user %s", self.username)
         
     def check_password(self, password):
         """验证密码是否匹配"""
         # 对输入进行验证
         if not password:
-            logging.error(f"Empty password provided for user {self.username}")
+            logger.warning("Empty password provided for user %s", self.username)
             return False
             
         if not self.password_hash:
-            logging.error(f"No password hash stored for user {self.username}")
+            logger.error("No password hash stored for user %s", self.username)
             return False
         
-        # 使用Werkzeug的check_password_hash比较提供的密码和存储的哈希值    
-        result = check_password_hash(self.password_hash, password)
+        # 使用Werkzeug的check_password_hash比较提供的密码和存储的哈希值（在哈希进程池中执行）
+        from app.services.password_service import verify_password
+        result = verify_password(self.password_hash, password)
         
-        if result:
-            logging.info(f"Password verification successful for user {self.username}")
-        else:
-            logging.warning(f"Password verification failed for user {self.username}")
-            # 记录密码哈希的类型和格式，但不记录完整哈希以保护安全
-            hash_type = self.password_hash.split('$')[0] if '$' in self.password_hash else 'unknown'
-            logging.info(f"User {self.username} has hash type: {hash_type}")
+        if not result:
+            # 只记录哈希类型，不记录哈希本身以保护安全
+            logger.debug("Password verification failed for user %s (hash type %s)",
+                         self.username, self.password_hash.split('$', 1)[0] if '$' in self.password_hash else 'unknown')
             
         return result
     
     def follow(self, user):
+        # 写操作前后都使缓存失效：检查基于数据库最新状态，且事务内后续读取能看到本次修改
+        self._invalidate_follow_graph()
         if not self.is_following(user):
             self.followed.append(user)
+            # 使用SQL表达式原子递增，避免并发请求互相覆盖
+            self._bump_counter('following_count', 1)
+            user._bump_counter('followers_count', 1)
+            self._invalidate_follow_graph()
+            self._invalidate_user_cache(user)
+            # 把被关注者的近期推文补进自己的时间线
+            from app.services.timeline_service import on_follow
+            on_follow(self.id, user.id)
+            from app.services.notification_service import notify_follow
+            notify_follow(self.id, user.id)
             return True
         return False
             
     def unfollow(self, user):
+        self._invalidate_follow_graph()
         if self.is_following(user):
             self.followed.remove(user)
+            self._bump_counter('following_count', -1)
+            user._bump_counter('followers_count', -1)
+            self._invalidate_follow_graph()
+            self._invalidate_user_cache(user)
+            from app.services.timeline_service import on_unfollow
+            on_unfollow(self.id, user.id)
             return True
         return False
             
     def is_following(self, user):
-        return self.followed.filter(followers.c.followed_id == user.id).count() > 0 
\ No newline at end of file
+        # 从关注图缓存中查询，避免每次检查都发起 COUNT 查询
+        from app.services.follow_graph import follow_graph
+        return follow_graph.is_following(self.id, user.id)
+    
+    def password_needs_rehash(self):
+        """存储的哈希是否使用了旧的哈希参数"""
+        from app.services.password_service import needs_rehash
+        return bool(self.password_hash) and needs_rehash(self.password_hash)
+    
+    def _bump_counter(self, name, delta):
+        setattr(self, name, getattr(User, name) + delta)
+        # 计数变化不算资料修改，保持 updated_at 不变
+        self.updated_at = User.updated_at
+    
+    def _invalidate_follow_graph(self):
+        from app.services.follow_graph import follow_graph
+        follow_graph.mark_dirty(db.session, self.id)
+    
+    def _invalidate_user_cache(self, *users):
+        # 关注数/粉丝数包含在用户快照中
+        from app.services.user_cache import user_cache
+        for user in (self,) + users:
+            user_cache.mark_dirty(db.session, user.id)
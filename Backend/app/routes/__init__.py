@@ -2,6 +2,18 @@ from flask import Blueprint
 
 main_bp = Blueprint('main', __name__)
 auth_bp = Blueprint('auth', __name__)
+timeline_bp = Blueprint('timeline', __name__)
+notifications_bp = Blueprint('notifications', __name__)
+search_bp = Blueprint('search', __name__)
+trends_bp = Blueprint('trends', __name__)
+admin_bp = Blueprint('admin', __name__)
+tweets_bp = Blueprint('tweets', __name__)
 
 from app.routes import routes
-from app.routes import auth
\ No newline at end of file
+from app.routes import auth
+from app.routes import timeline
+from app.routes import notifications
+from app.routes import search
+from app.routes import trends
+from app.routes import admin
+from app.routes import tweets
\ No newline at end of file
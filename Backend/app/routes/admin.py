@@ -0,0 +1,10 @@
+from app.routes import admin_bp
+from app.controllers.moderation_controller import ModerationController
+
+@admin_bp.route('/moderation/queue', methods=['GET'])
+def moderation_queue():
+    return ModerationController.get_queue()
+
+@admin_bp.route('/moderation/resolve', methods=['POST'])
+def moderation_resolve():
+    return ModerationController.resolve()
@@ -1,5 +1,6 @@
 from app.routes import auth_bp
 from app.controllers.auth_controller import AuthController
+from app.utils.compression import conditional
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
 import os
@@ -15,6 +16,7 @@ def login():
     return AuthController.login()
 
 @auth_bp.route('/me', methods=['GET'])
+@conditional()
 def get_current_user():
     return AuthController.get_current_user()
 
@@ -0,0 +1,20 @@
+from app.routes import notifications_bp
+from app.controllers.notification_controller import NotificationController
+from app.utils.compression import conditional
+
+@notifications_bp.route('', methods=['GET'])
+@conditional()
+def list_notifications():
+    return NotificationController.list_notifications()
+
+@notifications_bp.route('/since', methods=['GET'])
+def notifications_since():
+    return NotificationController.notifications_since()
+
+@notifications_bp.route('/mark-read', methods=['POST'])
+def mark_read():
+    return NotificationController.mark_read()
+
+@notifications_bp.route('/unread-count', methods=['GET'])
+def unread_count():
+    return NotificationController.get_unread_count()
@@ -1,21 +1,33 @@
-from flask import jsonify
+from flask import jsonify, current_app, abort, Response
 from app.routes import main_bp
 from app import db
-from sqlalchemy import text
+from app.services.health_service import check_database
+from app.utils.db_pool import pool_status
+from app.utils.metrics import metrics, CONTENT_TYPE
 
 @main_bp.route('/')
 def index():
     return jsonify(message="Welcome to Echo API")
 
-@main_bp.route('/test-db')
-def test_db():
-    try:
-        # 使用with语句和connection()方法代替直接使用execute()
-        with db.engine.connect() as connection:
-            result = connection.execute(text('SELECT 1'))
-            if result.scalar() == 1:
-                return jsonify({"status": "success", "message": "数据库连接成功！"})
-            else:
-                return jsonify({"status": "error", "message": "数据库查询未返回预期结果"})
-    except Exception as e:
-        return jsonify({"status": "error", "message": f"数据库连接失败: {str(e)}"})
\ No newline at end of file
+@main_bp.route('/health/live')
+def liveness():
+    # 只说明进程能处理请求，不访问数据库
+    return jsonify({"status": "success"})
+
+@main_bp.route('/health/ready')
+def readiness():
+    # 数据库探测结果在 HEALTH_CHECK_CACHE_SECONDS 内复用
+    database = check_database()
+    body = {
+        "status": "success" if database["ok"] else "error",
+        "database": database,
+        "pool": pool_status(db.engine)
+    }
+    return jsonify(body), 200 if database["ok"] else 503
+
+@main_bp.route('/metrics')
+def prometheus_metrics():
+    # 多进程部署时汇总 METRICS_MULTIPROC_DIR 下所有 worker 的数据
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
\ No newline at end of file
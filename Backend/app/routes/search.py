@@ -0,0 +1,10 @@
+from app.routes import search_bp
+from app.controllers.search_controller import SearchController
+
+@search_bp.route('/tweets', methods=['GET'])
+def search_tweets():
+    return SearchController.search_tweets()
+
+@search_bp.route('/users', methods=['GET'])
+def search_users():
+    return SearchController.search_users()
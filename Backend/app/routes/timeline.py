@@ -0,0 +1,8 @@
+from app.routes import timeline_bp
+from app.controllers.timeline_controller import TimelineController
+from app.utils.compression import conditional
+
+@timeline_bp.route('/home', methods=['GET'])
+@conditional()
+def home_timeline():
+    return TimelineController.home_timeline()
@@ -0,0 +1,8 @@
+from app.routes import trends_bp
+from app.controllers.trend_controller import TrendController
+from app.utils.compression import conditional
+
+@trends_bp.route('', methods=['GET'])
+@conditional()
+def get_trends():
+    return TrendController.get_trends()
@@ -0,0 +1,8 @@
+from app.routes import tweets_bp
+from app.controllers.comment_controller import CommentController
+from app.utils.compression import conditional
+
+@tweets_bp.route('/<int:tweet_id>/comments', methods=['GET'])
+@conditional()
+def get_comments(tweet_id):
+    return CommentController.get_comments(tweet_id=tweet_id)
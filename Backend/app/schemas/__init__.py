@@ -0,0 +1,2 @@
+from app.schemas.base import BaseSchema, InvalidFields, requested_fields, dump
+from app.schemas.user import UserSchema
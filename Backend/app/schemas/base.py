@@ -0,0 +1,45 @@
+from functools import lru_cache
+from flask import request
+from marshmallow import Schema
+
+class InvalidFields(ValueError):
+    """Raised when ?fields= names fields the schema does not have"""
+
+
+class BaseSchema(Schema):
+    """
+    Base for response schemas. Fields listed in DEFAULT_FIELDS are returned
+    when the client does not ask for specific ones; None means all fields.
+    Computed fields should be fields.Method so they only run when selected.
+    """
+    DEFAULT_FIELDS = None
+
+
+def requested_fields(schema_class):
+    """
+    Field names selected with ?fields=a,b,c, or None when not given.
+    Raises InvalidFields for unknown names.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in schema_class._declared_fields]
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+@lru_cache(maxsize=256)
+def _schema(schema_class, only):
+    # Building a schema copies its declared fields; reuse one per selection
+    return schema_class(only=only)
+
+def dump(schema_class, obj, only=None, sparse=True):
+    """
+    Serialize obj with schema_class, restricted to the ?fields= selection
+    (when sparse) or else to only / the schema's DEFAULT_FIELDS
+    """
+    fields = requested_fields(schema_class) if sparse else None
+    if fields is None:
+        fields = only or schema_class.DEFAULT_FIELDS
+    return _schema(schema_class, None if fields is None else tuple(sorted(set(fields)))).dump(obj)
@@ -0,0 +1,34 @@
+from marshmallow import fields
+from app.schemas.base import BaseSchema
+from app.services.avatar_service import thumbnail_urls
+
+class UserSchema(BaseSchema):
+    """
+    User profile payload; works on User rows and cached UserSnapshots
+    """
+    id = fields.Integer()
+    username = fields.String()
+    nickname = fields.String()
+    email = fields.String()
+    bio = fields.String()
+    avatar = fields.Method('get_avatar')
+    avatar_thumbnails = fields.Method('get_avatar_thumbnails')
+    created_at = fields.DateTime(format='iso')
+    followers_count = fields.Integer()
+    following_count = fields.Integer()
+    is_admin = fields.Boolean()
+
+    # Fields returned to the client after login
+    LOGIN_FIELDS = ('id', 'username', 'nickname', 'email', 'avatar', 'bio', 'is_admin')
+    # Fields returned after registration
+    REGISTER_FIELDS = ('id', 'username', 'nickname', 'email')
+
+    def get_avatar(self, user):
+        # 返回 avatar 字段为相对路径
+        avatar = user.avatar
+        if avatar and not avatar.startswith("/uploads/"):
+            return f"/uploads/avatars/{avatar}"
+        return avatar or "/default-avatar.png"
+
+    def get_avatar_thumbnails(self, user):
+        return thumbnail_urls(user.avatar)
@@ -1,7 +1,9 @@
+import inspect
 import re
 from flask import jsonify, request
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt, get_jwt_identity, verify_jwt_in_request
 from functools import wraps
+from app.services.user_cache import user_cache
 
 def validate_registration_data(data):
     """
@@ -40,13 +42,15 @@ def validate_registration_data(data):
     
     return None
 
-def generate_tokens(user_id):
+def generate_tokens(user_id, is_admin=False):
     """
-    Generate access and refresh tokens
+    Generate access and refresh tokens.
+    Non-sensitive claims (is_admin) are embedded in the access token so
+    permission checks need no database lookup.
     """
     # Ensure user_id is a string
     user_id_str = str(user_id)
-    access_token = create_access_token(identity=user_id_str)
+    access_token = create_access_token(identity=user_id_str, additional_claims={'is_admin': bool(is_admin)})
     refresh_token = create_refresh_token(identity=user_id_str)
     
     return {
@@ -56,8 +60,12 @@ def generate_tokens(user_id):
 
 def token_required(fn):
     """
-    JWT authentication decorator for protected routes
+    JWT authentication decorator for protected routes.
+    If the decorated function accepts a current_user argument it receives
+    a cached UserSnapshot (or None if the user no longer exists).
     """
+    wants_user = 'current_user' in inspect.signature(fn).parameters
+
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
@@ -70,6 +78,8 @@ def token_required(fn):
                 current_user_id = int(current_user_id)
             # Add user ID to kwargs for the decorated function
             kwargs['current_user_id'] = current_user_id
+            if wants_user:
+                kwargs['current_user'] = user_cache.get(current_user_id)
             return fn(*args, **kwargs)
         except Exception as e:
             # Check Authorization header
@@ -85,4 +95,23 @@ def token_required(fn):
                 "message": "Unauthorized access, please login", 
                 "error_detail": error_detail
             }), 401
-    return wrapper 
\ No newline at end of file
+    return wrapper
+
+def admin_required(fn):
+    """
+    token_required plus an admin check against the is_admin claim
+    (or the cached user for tokens issued without it); 403 otherwise
+    """
+    @token_required
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        claims = get_jwt()
+        if 'is_admin' in claims:
+            is_admin = claims['is_admin']
+        else:
+            user = user_cache.get(kwargs['current_user_id'])
+            is_admin = bool(user and user.is_admin)
+        if not is_admin:
+            return jsonify({"status": "error", "message": "Admin privileges required"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
\ No newline at end of file
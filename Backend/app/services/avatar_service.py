@@ -0,0 +1,295 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request, abort, send_file, Response
+from werkzeug.security import safe_join
+from PIL import Image, ImageOps
+from app import db
+from app.models import User
+from app.utils.metrics import metrics
+
+CHUNK_SIZE = 64 * 1024
+
+# Pillow format -> stored extension
+_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+
+_CONTENT_ADDRESSED = re.compile(r'^([0-9a-f]{64})\.(jpg|png|gif)$')
+# Originals and thumbnails whose name embeds the content hash
+_VERSIONED = re.compile(r'^([0-9a-f]{64})(?:_\d+)?\.(jpg|png|gif)$')
+
+class AvatarTooLarge(Exception):
+    """Raised when an upload exceeds AVATAR_MAX_BYTES"""
+
+
+class InvalidAvatar(Exception):
+    """Raised when an upload is not a supported image"""
+
+
+def avatar_dir():
+    """
+    Directory avatars are stored in and served from
+    """
+    return current_app.config.get('AVATAR_UPLOAD_DIR') or \
+        os.path.join(current_app.root_path, '..', 'uploads', 'avatars')
+
+def thumbnail_name(filename, size):
+    """
+    Name of the size x size thumbnail of a content-addressed avatar.
+    GIFs get PNG thumbnails (first frame).
+    """
+    digest, ext = _CONTENT_ADDRESSED.match(filename).groups()
+    return f"{digest}_{size}.{'jpg' if ext == 'jpg' else 'png'}"
+
+def thumbnail_urls(filename):
+    """
+    {size: url} for an avatar's thumbnails; empty for legacy uploads,
+    which were stored before thumbnails existed
+    """
+    if not filename or not _CONTENT_ADDRESSED.match(filename):
+        return {}
+    return {
+        size: f"/uploads/avatars/{thumbnail_name(filename, size)}"
+        for size in current_app.config['AVATAR_THUMBNAIL_SIZES']
+    }
+
+def _copy_limited(stream, dest, limit):
+    """
+    Copy stream to dest in chunks, hashing as we go and aborting as soon as
+    more than limit bytes have been read. Returns the hex digest.
+    """
+    digest = hashlib.sha256()
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > limit:
+            raise AvatarTooLarge()
+        digest.update(chunk)
+        dest.write(chunk)
+    return digest.hexdigest()
+
+def _detect_extension(path):
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            image.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise InvalidAvatar() from e
+    if image_format not in _EXTENSIONS:
+        raise InvalidAvatar()
+    return _EXTENSIONS[image_format]
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _write_thumbnails(directory, filename):
+    """
+    Write the missing thumbnails of a stored avatar. If one fails, the
+    thumbnails this call wrote are removed before the error propagates.
+    """
+    path = os.path.join(directory, filename)
+    written = []
+    try:
+        with Image.open(path) as image:
+            image.seek(0)
+            image = ImageOps.exif_transpose(image)
+            for size in current_app.config['AVATAR_THUMBNAIL_SIZES']:
+                thumb_path = os.path.join(directory, thumbnail_name(filename, size))
+                if os.path.exists(thumb_path):
+                    os.utime(thumb_path)
+                    continue
+                thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+                if thumb_path.endswith('.jpg'):
+                    thumb = thumb.convert('RGB')
+                    save_kwargs = {'quality': 85, 'optimize': True}
+                else:
+                    thumb = thumb.convert('RGBA')
+                    save_kwargs = {'optimize': True}
+                # Write-then-rename so a concurrent reader never sees a partial file
+                tmp_path = f"{thumb_path}.tmp{os.getpid()}"
+                try:
+                    thumb.save(tmp_path, format='JPEG' if thumb_path.endswith('.jpg') else 'PNG', **save_kwargs)
+                    os.replace(tmp_path, thumb_path)
+                finally:
+                    _remove_quietly(tmp_path)
+                written.append(thumb_path)
+    except Exception:
+        for thumb_path in written:
+            _remove_quietly(thumb_path)
+        raise
+
+def store_avatar(file):
+    """
+    Stream an uploaded avatar to disk, content-addressed by its SHA-256, and
+    generate its thumbnails. Identical uploads share one file.
+    Returns the stored filename.
+    """
+    directory = avatar_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp, metrics.timer('echo_avatar_io_seconds', operation='upload'):
+            digest = _copy_limited(file.stream, tmp, current_app.config['AVATAR_MAX_BYTES'])
+        ext = _detect_extension(tmp_path)
+
+        filename = f"{digest}.{ext}"
+        final_path = os.path.join(directory, filename)
+        created = not os.path.exists(final_path)
+        if created:
+            os.replace(tmp_path, final_path)
+        else:
+            # Duplicate upload: reuse the stored file, refreshing its age for prune_unreferenced
+            os.remove(tmp_path)
+            os.utime(final_path)
+    except Exception:
+        _remove_quietly(tmp_path)
+        raise
+
+    try:
+        with metrics.timer('echo_avatar_io_seconds', operation='thumbnails'):
+            _write_thumbnails(directory, filename)
+    except Exception:
+        # Nothing references a new original yet; a shared one stays
+        if created:
+            _remove_quietly(final_path)
+        raise
+    return filename
+
+def prune_unreferenced(min_age=3600, dry_run=False):
+    """
+    Delete avatar files (and thumbnails) no user references any more.
+    Shared, content-addressed files cannot be removed when one user changes
+    avatar, so cleanup happens here instead of in the request. Files younger
+    than min_age seconds are kept so uploads whose commit is still in flight
+    survive. Returns the list of removed filenames.
+    """
+    directory = avatar_dir()
+    if not os.path.isdir(directory):
+        return []
+
+    referenced = set()
+    for (avatar,) in db.session.query(User.avatar).filter(User.avatar.isnot(None)).distinct():
+        referenced.add(avatar)
+        if _CONTENT_ADDRESSED.match(avatar):
+            referenced.update(thumbnail_name(avatar, size) for size in current_app.config['AVATAR_THUMBNAIL_SIZES'])
+
+    cutoff = time.time() - min_age
+    removed = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name in referenced or not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+            continue
+        if not dry_run:
+            os.remove(path)
+        removed.append(name)
+    return removed
+
+
+class _ByteCache:
+    """
+    Small LRU of hot avatar files held in memory, bounded by total bytes
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, mtime):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != mtime:
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def put(self, path, mtime, data, max_bytes):
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= len(old[1])
+            self._entries[path] = (mtime, data)
+            self._size += len(data)
+            while self._size > max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_byte_cache = _ByteCache()
+
+def _cache_headers(response, filename):
+    # send_file marks responses no-cache when no max_age is given
+    response.cache_control.no_cache = None
+    if _VERSIONED.match(filename):
+        # The name changes whenever the content does
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['AVATAR_LEGACY_MAX_AGE']
+    return response
+
+def serve_avatar(filename):
+    """
+    Response for GET /uploads/avatars/<filename> with ETag/Last-Modified
+    validation, long-lived immutable caching for content-addressed names,
+    optional X-Accel-Redirect/X-Sendfile offload and an in-memory cache
+    for small hot files.
+    """
+    directory = avatar_dir()
+    path = safe_join(directory, filename)
+    if path is None:
+        abort(404)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    match = _VERSIONED.match(filename)
+    etag = match.group(1) if match else f"{int(stat.st_mtime)}-{stat.st_size}"
+
+    mode = current_app.config['AVATAR_SENDFILE_MODE']
+    if mode in ('x-accel', 'x-sendfile'):
+        response = Response(mimetype=mimetype)
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        response = response.make_conditional(request)
+        # On a 304 there is nothing for the front-end server to send
+        if response.status_code != 304:
+            if mode == 'x-accel':
+                response.headers['X-Accel-Redirect'] = current_app.config['AVATAR_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+            else:
+                response.headers['X-Sendfile'] = os.path.abspath(path)
+        return _cache_headers(response, filename)
+
+    if stat.st_size <= current_app.config['AVATAR_MEMORY_CACHE_MAX_FILE']:
+        data = _byte_cache.get(path, stat.st_mtime)
+        if data is None:
+            with open(path, 'rb') as f, metrics.timer('echo_avatar_io_seconds', operation='read'):
+                data = f.read()
+            _byte_cache.put(path, stat.st_mtime, data, current_app.config['AVATAR_MEMORY_CACHE_BYTES'])
+        response = Response(data, mimetype=mimetype)
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        response = response.make_conditional(request)
+        return _cache_headers(response, filename)
+
+    response = send_file(path, mimetype=mimetype, etag=etag, last_modified=stat.st_mtime, conditional=True)
+    return _cache_headers(response, filename)
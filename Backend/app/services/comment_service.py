@@ -0,0 +1,70 @@
+from sqlalchemy import select, func
+from sqlalchemy.orm import load_only
+from app.models import User, Comment
+from app.utils.pagination import keyset_paginate
+
+# Served by ix_comment_tweet_id_created_at_id
+THREAD_KEYS = (Comment.created_at, Comment.id)
+
+def _load_authors(comments):
+    author_ids = {c.user_id for c in comments}
+    if not author_ids:
+        return {}
+    return {
+        u.id: u for u in User.query
+        .options(load_only(User.id, User.username, User.nickname, User.avatar))
+        .filter(User.id.in_(author_ids))
+    }
+
+def _serialize(comment, author):
+    return {
+        "id": comment.id,
+        "tweet_id": comment.tweet_id,
+        "content": comment.content,
+        "created_at": comment.created_at.isoformat(),
+        "author": {
+            "id": author.id,
+            "username": author.username,
+            "nickname": author.nickname,
+            "avatar": author.avatar
+        } if author else None
+    }
+
+def get_thread(tweet_id, limit=20, cursor=None):
+    """
+    One page of a tweet's comments, oldest first, with all authors loaded
+    in a single query. Returns (comment dicts, Page).
+    Raises InvalidCursor if the cursor is malformed.
+    """
+    page = keyset_paginate(Comment.query.filter(Comment.tweet_id == tweet_id), THREAD_KEYS,
+                           limit=limit, cursor=cursor, descending=False)
+    authors = _load_authors(page.items)
+    return [_serialize(c, authors.get(c.user_id)) for c in page.items], page
+
+def get_previews(tweet_ids, per_tweet=3):
+    """
+    {tweet_id: [first per_tweet comments]} for a batch of tweets, using
+    one ROW_NUMBER() window query plus one query for the authors
+    """
+    if not tweet_ids or per_tweet <= 0:
+        return {}
+
+    ranked = select(
+        Comment.id,
+        func.row_number().over(
+            partition_by=Comment.tweet_id,
+            order_by=(Comment.created_at, Comment.id)
+        ).label('position')
+    ).where(Comment.tweet_id.in_(tweet_ids)).subquery()
+
+    comments = Comment.query \
+        .join(ranked, Comment.id == ranked.c.id) \
+        .filter(ranked.c.position <= per_tweet) \
+        .order_by(Comment.tweet_id, ranked.c.position) \
+        .all()
+    authors = _load_authors(comments)
+
+    previews = {tweet_id: [] for tweet_id in tweet_ids}
+    for comment in comments:
+        previews[comment.tweet_id].append(_serialize(comment, authors.get(comment.user_id)))
+    return previews
@@ -0,0 +1,68 @@
+from sqlalchemy import select, update, func
+from app import db
+from app.models import User, Tweet, Like, Comment, followers
+
+def _reconcile_in_chunks(model, assignments, chunk_size):
+    """
+    Recompute the given counter columns for model in id-ordered chunks,
+    touching only rows whose stored value has drifted. updated_at is kept as
+    is, since a counter repair is not an edit. Commits per chunk.
+    """
+    table = model.__table__
+    max_id = db.session.scalar(select(func.max(table.c.id))) or 0
+    fixed = 0
+
+    for start in range(1, max_id + 1, chunk_size):
+        end = start + chunk_size - 1
+        drifted = [table.c[name] != expr for name, expr in assignments.items()]
+        result = db.session.execute(
+            update(table)
+            .where(table.c.id.between(start, end), db.or_(*drifted))
+            .values(updated_at=table.c.updated_at, **assignments)
+        )
+        db.session.commit()
+        fixed += result.rowcount
+
+    return fixed
+
+def reconcile_tweet_counters(chunk_size=1000):
+    """
+    Rebuild tweet.likes_count and tweet.comments_count from the like and
+    comment tables. Returns the number of tweets corrected.
+    """
+    tweet = Tweet.__table__
+    like_count = (
+        select(func.count()).select_from(Like.__table__)
+        .where(Like.__table__.c.tweet_id == tweet.c.id)
+        .scalar_subquery()
+    )
+    comment_count = (
+        select(func.count()).select_from(Comment.__table__)
+        .where(Comment.__table__.c.tweet_id == tweet.c.id)
+        .scalar_subquery()
+    )
+    return _reconcile_in_chunks(Tweet, {
+        'likes_count': like_count,
+        'comments_count': comment_count
+    }, chunk_size)
+
+def reconcile_user_counters(chunk_size=1000):
+    """
+    Rebuild user.followers_count and user.following_count from the followers
+    table. Returns the number of users corrected.
+    """
+    user = User.__table__
+    followers_count = (
+        select(func.count()).select_from(followers)
+        .where(followers.c.followed_id == user.c.id)
+        .scalar_subquery()
+    )
+    following_count = (
+        select(func.count()).select_from(followers)
+        .where(followers.c.follower_id == user.c.id)
+        .scalar_subquery()
+    )
+    return _reconcile_in_chunks(User, {
+        'followers_count': followers_count,
+        'following_count': following_count
+    }, chunk_size)
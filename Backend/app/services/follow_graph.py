@@ -0,0 +1,106 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.db_routing import primary_reads
+
+_DIRTY_KEY = 'follow_graph_dirty'
+
+class FollowGraphCache:
+    """
+    Per-process cache of each user's followed ids as a sorted integer array.
+
+    Entries are loaded lazily from the followers table, evicted LRU beyond
+    FOLLOW_GRAPH_MAX_USERS and expire after FOLLOW_GRAPH_TTL seconds so other
+    workers' writes become visible. Writes in this process invalidate
+    immediately and again when the transaction commits or rolls back.
+    Entries are loaded from the primary, not a read replica.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, user_id):
+        ttl = current_app.config['FOLLOW_GRAPH_TTL']
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                loaded_at, ids = entry
+                if time.monotonic() - loaded_at < ttl:
+                    self._entries.move_to_end(user_id)
+                    return ids
+                del self._entries[user_id]
+
+        from app.models.user import followers
+        # From the primary even in read-only requests, see primary_reads
+        with primary_reads(db.session):
+            ids = array('q', db.session.scalars(
+                select(followers.c.followed_id)
+                .where(followers.c.follower_id == user_id)
+                .order_by(followers.c.followed_id)
+            ))
+
+        max_users = current_app.config['FOLLOW_GRAPH_MAX_USERS']
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), ids)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_users:
+                self._entries.popitem(last=False)
+        return ids
+
+    @staticmethod
+    def _contains(ids, candidate_id):
+        i = bisect_left(ids, candidate_id)
+        return i < len(ids) and ids[i] == candidate_id
+
+    def following_ids(self, user_id):
+        """
+        Sorted array of ids followed by user_id
+        """
+        return self._get(user_id)
+
+    def is_following(self, user_id, candidate_id):
+        return self._contains(self._get(user_id), candidate_id)
+
+    def are_following(self, user_id, candidate_ids):
+        """
+        Answer a batch of follow checks from memory: {candidate_id: bool}
+        """
+        ids = self._get(user_id)
+        return {candidate_id: self._contains(ids, candidate_id) for candidate_id in candidate_ids}
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def mark_dirty(self, session, user_id):
+        """
+        Invalidate user_id now and once more when session's transaction ends
+        """
+        self.invalidate(user_id)
+        session.info.setdefault(_DIRTY_KEY, set()).add(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+follow_graph = FollowGraphCache()
+
+def _flush_dirty(session, *args):
+    for user_id in session.info.pop(_DIRTY_KEY, ()):
+        follow_graph.invalidate(user_id)
+
+event.listen(Session, 'after_commit', _flush_dirty)
+event.listen(Session, 'after_soft_rollback', _flush_dirty)
+
+def are_following(user_id, candidate_ids):
+    """
+    Which of candidate_ids user_id follows, answered in memory: {candidate_id: bool}
+    """
+    return follow_graph.are_following(user_id, candidate_ids)
@@ -0,0 +1,48 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import text
+from app import db
+
+class _DatabaseProbe:
+    """
+    Result of the last SELECT 1, reused for HEALTH_CHECK_CACHE_SECONDS so
+    load balancer polling costs at most one connection checkout per
+    interval per process. Concurrent callers wait for the probe in flight
+    instead of starting their own.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked = None
+
+    def check(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._checked is not None and now - self._checked < current_app.config['HEALTH_CHECK_CACHE_SECONDS']:
+                return dict(self._result, cached=True)
+            self._result = self._probe()
+            self._checked = time.monotonic()
+            return dict(self._result, cached=False)
+
+    def _probe(self):
+        start = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                ok = connection.execute(text('SELECT 1')).scalar() == 1
+        except Exception:
+            logging.exception("Database health probe failed")
+            ok = False
+        return {
+            "ok": ok,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "checked_at": datetime.utcnow().isoformat()
+        }
+
+
+database_probe = _DatabaseProbe()
+
+def check_database():
+    return database_probe.check()
@@ -0,0 +1,101 @@
+from sqlalchemy import update, case
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import User, Notification
+from app.utils.pagination import keyset_paginate, decode_cursor
+
+# Inbox ordering, most recent activity first. updated_seq is unique per
+# recipient and grows when a notification is created or coalesced, so a
+# coalesced row moves to the top instead of jumping between pages.
+# (user_id, updated_seq) and (user_id, is_read, updated_seq) serve the listings
+INBOX_KEYS = (Notification.updated_seq,)
+
+def serialize(notification):
+    sender = notification.sender
+    return {
+        "id": notification.id,
+        "type": notification.type,
+        "summary": notification.summary(),
+        "actor_count": notification.actor_count,
+        "sender": {
+            "id": sender.id,
+            "username": sender.username,
+            "nickname": sender.nickname,
+            "avatar": sender.avatar
+        },
+        "tweet_id": notification.tweet_id,
+        "comment_id": notification.comment_id,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at.isoformat(),
+        "updated_seq": notification.updated_seq
+    }
+
+def _inbox_query(user_id, unread_only=False):
+    # Senders are joined in so serializing a page is a single query
+    query = Notification.query.options(joinedload(Notification.sender)).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    return query
+
+def get_inbox(user_id, limit=20, cursor=None, unread_only=False):
+    """
+    One page of user_id's notifications, newest first.
+    Raises InvalidCursor if the cursor is malformed.
+    """
+    return keyset_paginate(_inbox_query(user_id, unread_only), INBOX_KEYS, limit=limit, cursor=cursor)
+
+def get_since(user_id, since_seq, limit=100):
+    """
+    Notifications created or coalesced after since_seq, in change order,
+    for incremental sync. A coalesced notification comes back with its id
+    and new actor_count; clients replace their copy by id. Marking read
+    does not advance updated_seq.
+    """
+    return _inbox_query(user_id) \
+        .filter(Notification.updated_seq > since_seq) \
+        .order_by(Notification.updated_seq.asc()) \
+        .limit(limit) \
+        .all()
+
+def _at_or_before(cursor):
+    # The cursor points at the last notification the client saw; it and
+    # everything older match
+    _, (updated_seq,) = decode_cursor(cursor, len(INBOX_KEYS))
+    return Notification.updated_seq <= updated_seq
+
+def mark_read(user_id, from_id=None, to_id=None, before_cursor=None):
+    """
+    Mark user_id's unread notifications read with one UPDATE: those with
+    from_id <= id <= to_id, those at or before before_cursor, or all of
+    them when no bound is given. unread_notification_count is decremented
+    by the number of rows changed. The caller commits.
+
+    Returns the number of notifications marked read.
+    Raises InvalidCursor if before_cursor is malformed.
+    """
+    table = Notification.__table__
+    conditions = [Notification.user_id == user_id, Notification.is_read == False]
+    if from_id is not None:
+        conditions.append(Notification.id >= from_id)
+    if to_id is not None:
+        conditions.append(Notification.id <= to_id)
+    if before_cursor:
+        conditions.append(_at_or_before(before_cursor))
+
+    result = db.session.execute(update(table).where(*conditions).values(is_read=True))
+    marked = result.rowcount
+    if marked:
+        user = User.__table__
+        db.session.execute(
+            update(user)
+            .where(user.c.id == user_id)
+            .values(
+                # Never below zero if the counter has drifted
+                unread_notification_count=case(
+                    (user.c.unread_notification_count > marked, user.c.unread_notification_count - marked),
+                    else_=0
+                ),
+                updated_at=user.c.updated_at
+            )
+        )
+    return marked
@@ -0,0 +1,179 @@
+import math
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import Float, Integer, func, case, literal, select, union_all, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql.functions import FunctionElement
+from app import db
+from app.models import User, Tweet, Comment, Report, ReportType
+from app.utils.pagination import keyset_paginate
+
+PENDING = 'pending'
+RESOLUTION_STATUSES = ('reviewed', 'resolved')
+
+# Relative weight of one report of each type
+SEVERITY = {
+    ReportType.VIOLENCE: 5,
+    ReportType.HATE_SPEECH: 4,
+    ReportType.MISINFORMATION: 3,
+    ReportType.SPAM: 1,
+    ReportType.OTHER: 1
+}
+
+# A report targets its comment if it has one, else its tweet, else the
+# reported user. Each target type is aggregated with its own
+# (status, <column>) index.
+TARGETS = {
+    'comment': (Report.comment_id, ()),
+    'tweet': (Report.tweet_id, (Report.comment_id.is_(None),)),
+    'user': (Report.reported_user_id, (Report.comment_id.is_(None), Report.tweet_id.is_(None)))
+}
+
+# Stable number per target type: (kind, target_id) identifies a queue row
+KINDS = {'comment': 0, 'tweet': 1, 'user': 2}
+TARGET_TYPES = {kind: target_type for target_type, kind in KINDS.items()}
+
+# Queue order, all descending; the last two make it total
+QUEUE_KEYS = ('rank', 'last_reported_at', 'kind', 'target_id')
+
+# Rank of targets whose reports carry no known type (score 0)
+_ZERO_SCORE_RANK = -1e9
+
+def _target_filter(target_type, target_ids):
+    column, conditions = TARGETS[target_type]
+    return (column.in_(target_ids),) + conditions
+
+def score(type_reporters, last_reported_at, now=None):
+    """
+    Priority of a target: severity-weighted reporter count on a log scale,
+    halved for every MODERATION_HALF_LIFE_HOURS since the latest report
+    """
+    now = now or datetime.utcnow()
+    weighted = sum(SEVERITY.get(t, 1) * n for t, n in type_reporters.items())
+    age_hours = max((now - last_reported_at).total_seconds(), 0) / 3600
+    return math.log2(1 + weighted) * 0.5 ** (age_hours / current_app.config['MODERATION_HALF_LIFE_HOURS'])
+
+class _epoch_hours(FunctionElement):
+    """Hours since the Unix epoch of a DATETIME expression"""
+    type = Float()
+    name = 'epoch_hours'
+    inherit_cache = True
+
+# MySQL
+@compiles(_epoch_hours)
+def _epoch_hours_default(element, compiler, **kw):
+    return f"(UNIX_TIMESTAMP({compiler.process(element.clauses, **kw)}) / 3600.0)"
+
+@compiles(_epoch_hours, 'sqlite')
+def _epoch_hours_sqlite(element, compiler, **kw):
+    return f"((julianday({compiler.process(element.clauses, **kw)}) - 2440587.5) * 24.0)"
+
+@compiles(_epoch_hours, 'postgresql')
+def _epoch_hours_postgresql(element, compiler, **kw):
+    return f"(EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)}) / 3600.0)"
+
+def _aggregate(target_type):
+    column, conditions = TARGETS[target_type]
+    # Distinct reporters per type, so one account filing many reports counts once
+    type_columns = [func.count(func.distinct(case((Report.type == t, Report.reporter_id)))) for t in SEVERITY]
+    weighted = sum(SEVERITY[t] * c for t, c in zip(SEVERITY, type_columns))
+    last_at = func.max(Report.created_at)
+    # ln(score) + ln2 * now / half-life: orders like score() at any "now"
+    # but does not change with it, so it can be a keyset column
+    rank = case(
+        (weighted > 0, func.ln(func.ln(1 + weighted))
+         + _epoch_hours(last_at) * (math.log(2) / current_app.config['MODERATION_HALF_LIFE_HOURS'])),
+        else_=_ZERO_SCORE_RANK
+    )
+    return select(
+        literal(KINDS[target_type], Integer).label('kind'),
+        column.label('target_id'),
+        func.count(Report.id).label('report_count'),
+        func.count(func.distinct(Report.reporter_id)).label('reporter_count'),
+        func.min(Report.created_at).label('first_reported_at'),
+        last_at.label('last_reported_at'),
+        *[c.label(t) for t, c in zip(SEVERITY, type_columns)],
+        rank.label('rank')
+    ).where(Report.status == PENDING, column.isnot(None), *conditions).group_by(column)
+
+def _previews(items):
+    # One query per target type on the page
+    ids = {target_type: [i["target_id"] for i in items if i["target_type"] == target_type] for target_type in TARGETS}
+    previews = {}
+    if ids['tweet']:
+        for tweet in Tweet.query.options(load_only(Tweet.id, Tweet.content, Tweet.user_id)).filter(Tweet.id.in_(ids['tweet'])):
+            previews[('tweet', tweet.id)] = {"content": tweet.content, "user_id": tweet.user_id}
+    if ids['comment']:
+        for comment in Comment.query.options(load_only(Comment.id, Comment.content, Comment.user_id, Comment.tweet_id)) \
+                .filter(Comment.id.in_(ids['comment'])):
+            previews[('comment', comment.id)] = {"content": comment.content, "user_id": comment.user_id, "tweet_id": comment.tweet_id}
+    if ids['user']:
+        for user in User.query.options(load_only(User.id, User.username, User.nickname)).filter(User.id.in_(ids['user'])):
+            previews[('user', user.id)] = {"username": user.username, "nickname": user.nickname}
+    return previews
+
+def get_queue(limit=20, cursor=None):
+    """
+    Pending reports grouped per target, highest priority first, ranked
+    and paged in SQL over a UNION ALL of the per-type aggregates.
+    Returns (page, total number of targets); total is only counted for
+    the first page and is None otherwise.
+    Raises InvalidCursor if the cursor is malformed.
+    """
+    queue = union_all(*(_aggregate(target_type) for target_type in TARGETS)).subquery('queue')
+    page = keyset_paginate(db.session.query(queue), [queue.c[name] for name in QUEUE_KEYS],
+                           limit=limit, cursor=cursor)
+    total = None
+    if cursor is None:
+        total = db.session.scalar(select(func.count()).select_from(queue))
+
+    now = datetime.utcnow()
+    items = []
+    for row in page.items:
+        types = {t: int(getattr(row, t)) for t in SEVERITY if getattr(row, t)}
+        items.append({
+            "target_type": TARGET_TYPES[row.kind],
+            "target_id": row.target_id,
+            "score": round(score(types, row.last_reported_at, now), 4),
+            "report_count": row.report_count,
+            "reporter_count": row.reporter_count,
+            "types": types,
+            "first_reported_at": row.first_reported_at,
+            "last_reported_at": row.last_reported_at
+        })
+
+    previews = _previews(items)
+    for item in items:
+        # Targets that were deleted meanwhile have no preview
+        item["target"] = previews.get((item["target_type"], item["target_id"]))
+        item["first_reported_at"] = item["first_reported_at"].isoformat()
+        item["last_reported_at"] = item["last_reported_at"].isoformat()
+    page.items = items
+    return page, total
+
+def resolve(targets, status='resolved'):
+    """
+    Set the status of every pending report on the given (target_type,
+    target_id) pairs with one UPDATE per target type. The caller commits.
+    Returns the number of reports updated.
+    """
+    if status not in RESOLUTION_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(RESOLUTION_STATUSES)}")
+
+    by_type = {}
+    for target_type, target_id in targets:
+        if target_type not in TARGETS:
+            raise ValueError(f"Unknown target type: {target_type}")
+        by_type.setdefault(target_type, set()).add(target_id)
+
+    table = Report.__table__
+    updated = 0
+    for target_type, target_ids in by_type.items():
+        result = db.session.execute(
+            update(table)
+            .where(Report.status == PENDING, *_target_filter(target_type, target_ids))
+            .values(status=status)
+        )
+        updated += result.rowcount
+    return updated
@@ -0,0 +1,235 @@
+import atexit
+import logging
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, update, insert, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models import User, Tweet, Notification, NotificationType
+
+_EVENTS_KEY = 'notification_events'
+
+class NotificationWriter:
+    """
+    Write-behind buffer for notification events.
+
+    Events are queued in memory and written in batches by a background
+    thread every NOTIFICATION_FLUSH_INTERVAL seconds, or as soon as
+    NOTIFICATION_BUFFER_MAX events are pending. Same-type events on the same
+    target (recipient, type, tweet) are coalesced: first within the batch,
+    then into the recipient's existing unread notification, whose
+    actor_count grows instead of a new row being inserted. user's
+    unread_notification_count is bumped by the number of rows inserted.
+    Every inserted or coalesced row takes the next updated_seq from the
+    recipient's notification_seq counter for delta sync.
+
+    Events raised inside a transaction are buffered only once it commits,
+    so a rolled-back like or follow never notifies. Buffered events are
+    lost if the process dies before a flush; they are flushed on normal
+    interpreter exit.
+    """
+    def __init__(self):
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._app = None
+
+    def enqueue(self, user_id, sender_id, type, tweet_id=None, comment_id=None, connection=None):
+        if user_id == sender_id:
+            return
+
+        event = {
+            'user_id': user_id,
+            'sender_id': sender_id,
+            'type': type,
+            'tweet_id': tweet_id,
+            'comment_id': comment_id,
+            'created_at': datetime.utcnow()
+        }
+
+        # Synchronous mode writes into the caller's transaction; the caller commits
+        if not current_app.config['NOTIFICATION_WRITE_BEHIND']:
+            self._write([event], connection or db.session)
+            return
+
+        # Held on the session until its transaction commits, see _release_events
+        db.session.info.setdefault(_EVENTS_KEY, []).append(event)
+
+    def buffer(self, events):
+        """
+        Queue committed events for the next batch write
+        """
+        with self._lock:
+            self._pending.extend(events)
+            full = len(self._pending) >= current_app.config['NOTIFICATION_BUFFER_MAX']
+            if self._thread is None:
+                self._start(current_app._get_current_object())
+        if full:
+            self._wakeup.set()
+
+    def _start(self, app):
+        self._app = app
+        self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        interval = self._app.config['NOTIFICATION_FLUSH_INTERVAL']
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logging.exception("Notification flush failed")
+
+    def flush(self):
+        """
+        Write all buffered events now
+        """
+        with self._lock:
+            events, self._pending = self._pending, []
+        if not events:
+            return
+        with self._app.app_context():
+            try:
+                self._write(events, db.session)
+                db.session.commit()
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _coalesce(events):
+        groups = {}
+        for event in events:
+            key = (event['user_id'], event['type'], event['tweet_id'])
+            group = groups.get(key)
+            if group is None:
+                groups[key] = dict(event, actor_count=1)
+            else:
+                # Keep the most recent sender and comment
+                group.update(
+                    sender_id=event['sender_id'],
+                    comment_id=event['comment_id'] or group['comment_id'],
+                    created_at=event['created_at'],
+                    actor_count=group['actor_count'] + 1
+                )
+        return list(groups.values())
+
+    @staticmethod
+    def _reserve_seqs(groups, connection):
+        # One change number per group from each recipient's counter. The
+        # UPDATE locks the user row until commit, so a recipient's numbers
+        # become visible in increasing order and delta sync misses none
+        user = User.__table__
+        per_user = {}
+        for group in groups:
+            per_user.setdefault(group['user_id'], []).append(group)
+        for user_id in sorted(per_user):
+            user_groups = per_user[user_id]
+            connection.execute(
+                update(user)
+                .where(user.c.id == user_id)
+                .values(notification_seq=user.c.notification_seq + len(user_groups), updated_at=user.c.updated_at)
+            )
+            last = connection.scalar(select(user.c.notification_seq).where(user.c.id == user_id))
+            for seq, group in enumerate(user_groups, last - len(user_groups) + 1):
+                group['updated_seq'] = seq
+
+    def _write(self, events, connection):
+        table = Notification.__table__
+        groups = self._coalesce(events)
+        self._reserve_seqs(groups, connection)
+        new_rows = []
+        for group in groups:
+            tweet_match = table.c.tweet_id.is_(None) if group['tweet_id'] is None else table.c.tweet_id == group['tweet_id']
+            values = dict(
+                sender_id=group['sender_id'],
+                created_at=group['created_at'],
+                actor_count=table.c.actor_count + group['actor_count'],
+                updated_seq=group['updated_seq']
+            )
+            if group['comment_id'] is not None:
+                values['comment_id'] = group['comment_id']
+            result = connection.execute(
+                update(table)
+                .where(
+                    table.c.user_id == group['user_id'],
+                    table.c.type == group['type'],
+                    tweet_match,
+                    table.c.is_read == False
+                )
+                .values(**values)
+            )
+            if result.rowcount == 0:
+                new_rows.append(dict(group, is_read=False))
+
+        if new_rows:
+            connection.execute(insert(table), new_rows)
+
+            per_user = {}
+            for row in new_rows:
+                per_user[row['user_id']] = per_user.get(row['user_id'], 0) + 1
+            user = User.__table__
+            for user_id, count in per_user.items():
+                connection.execute(
+                    update(user)
+                    .where(user.c.id == user_id)
+                    .values(
+                        unread_notification_count=user.c.unread_notification_count + count,
+                        updated_at=user.c.updated_at
+                    )
+                )
+
+
+notification_writer = NotificationWriter()
+
+def _release_events(session):
+    events = session.info.pop(_EVENTS_KEY, None)
+    if events:
+        notification_writer.buffer(events)
+
+def _drop_events(session, previous_transaction):
+    session.info.pop(_EVENTS_KEY, None)
+
+event.listen(Session, 'after_commit', _release_events)
+event.listen(Session, 'after_soft_rollback', _drop_events)
+
+def notify(user_id, sender_id, type, tweet_id=None, comment_id=None, connection=None):
+    """
+    Queue a notification for user_id; self-notifications are dropped.
+    connection is the flush's connection when called from a model hook.
+    """
+    notification_writer.enqueue(user_id, sender_id, type, tweet_id=tweet_id, comment_id=comment_id,
+                                connection=connection)
+
+def _tweet_author_id(tweet_id, connection):
+    return (connection or db.session).scalar(select(Tweet.user_id).where(Tweet.id == tweet_id))
+
+def notify_follow(follower_id, followed_id):
+    """
+    Called from User.follow
+    """
+    notify(followed_id, follower_id, NotificationType.FOLLOW)
+
+def notify_like(like, connection=None):
+    """
+    Called from the Like after_insert hook with the flush's connection
+    """
+    notify(_tweet_author_id(like.tweet_id, connection), like.user_id, NotificationType.LIKE,
+           tweet_id=like.tweet_id, connection=connection)
+
+def notify_comment(comment, connection=None):
+    """
+    Called from the Comment after_insert hook with the flush's connection
+    """
+    notify(_tweet_author_id(comment.tweet_id, connection), comment.user_id, NotificationType.COMMENT,
+           tweet_id=comment.tweet_id, comment_id=comment.id, connection=connection)
+
+def unread_count(user_id):
+    """
+    Badge count from the denormalized counter, without scanning notification
+    """
+    return db.session.query(User.unread_notification_count).filter(User.id == user_id).scalar() or 0
@@ -0,0 +1,162 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from sqlalchemy import select, update, bindparam
+from werkzeug.security import generate_password_hash, check_password_hash
+from app import db
+from app.models import User
+
+# Passwords the old check/fix scripts assigned; {id} is the user's id
+DEFAULT_WEAK_PASSWORDS = ('Password123!', 'Test{id}Password!')
+
+# Issues that leave the account unable to log in and are repaired by --fix
+BROKEN = ('missing', 'malformed', 'unsupported')
+
+_HEX = re.compile(r'^[0-9a-f]+$')
+
+def audit_hash(task):
+    """
+    Classify one stored hash. Runs in a pool worker, so it only touches
+    its arguments: (user_id, password_hash, method, weak_passwords).
+    Returns (user_id, [issues]).
+    """
+    user_id, password_hash, method, weak_passwords = task
+    if not password_hash:
+        return user_id, ['missing']
+    parts = password_hash.split('$')
+    if len(parts) != 3 or not parts[1] or not _HEX.match(parts[2]):
+        return user_id, ['malformed']
+    if not parts[0].startswith(('pbkdf2:', 'scrypt')):
+        return user_id, ['unsupported']
+
+    issues = []
+    if parts[0] != method:
+        issues.append('outdated')
+    for template in weak_passwords:
+        if check_password_hash(password_hash, template.replace('{id}', str(user_id))):
+            issues.append('weak')
+            break
+    return user_id, issues
+
+def _hash_task(task):
+    password, method = task
+    return generate_password_hash(password, method)
+
+
+class Checkpoint:
+    """
+    Progress of an audit run, rewritten atomically after every chunk
+    """
+    def __init__(self, path):
+        self.path = path
+        self.last_id = 0
+        self.report_offset = 0
+        self.counts = {'scanned': 0, 'fixed': 0}
+        self.completed = False
+
+    def load(self):
+        with open(self.path) as f:
+            state = json.load(f)
+        self.last_id = state['last_id']
+        self.report_offset = state['report_offset']
+        self.counts = state['counts']
+        self.completed = state['completed']
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'last_id': self.last_id,
+                'report_offset': self.report_offset,
+                'counts': self.counts,
+                'completed': self.completed
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def _chunks(after_id, chunk_size):
+    user = User.__table__
+    while True:
+        rows = db.session.execute(
+            select(user.c.id, user.c.username, user.c.password_hash)
+            .where(user.c.id > after_id)
+            .order_by(user.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+
+def run_audit(report_path, checkpoint_path, chunk_size=500, workers=None, resume=False,
+              weak_passwords=DEFAULT_WEAK_PASSWORDS, temporary_password=None, progress=None):
+    """
+    Audit every user's password hash, streaming users in id order.
+
+    Findings are appended to report_path as JSON lines; after each chunk
+    any repairs are committed and the checkpoint is saved, so an
+    interrupted run resumes from the last finished chunk (the report is
+    truncated back to match). With temporary_password, accounts whose
+    hash is missing, malformed or unsupported are reset to it.
+
+    Returns the checkpoint's counts.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    if resume and os.path.exists(checkpoint_path):
+        checkpoint.load()
+        if checkpoint.completed:
+            return checkpoint.counts
+
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    weak_passwords = tuple(weak_passwords)
+    user = User.__table__
+    fix_statement = update(user).where(user.c.id == bindparam('user_id')).values(password_hash=bindparam('new_hash'))
+
+    with open(report_path, 'a+b') as report, ProcessPoolExecutor(max_workers=workers) as pool:
+        # Drop lines written after the last saved checkpoint
+        report.truncate(checkpoint.report_offset)
+        report.seek(checkpoint.report_offset)
+
+        for rows in _chunks(checkpoint.last_id, chunk_size):
+            tasks = [(row.id, row.password_hash, method, weak_passwords) for row in rows]
+            chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+            issues = dict(pool.map(audit_hash, tasks, chunksize=chunksize))
+
+            to_fix = [row.id for row in rows if any(i in BROKEN for i in issues[row.id])]
+            if temporary_password is not None and to_fix:
+                # Hash per user so every account gets its own salt
+                hashes = pool.map(_hash_task, [(temporary_password, method)] * len(to_fix))
+                db.session.execute(fix_statement, [
+                    {'user_id': user_id, 'new_hash': new_hash} for user_id, new_hash in zip(to_fix, hashes)
+                ])
+            db.session.commit()
+            fixed = set(to_fix) if temporary_password is not None else set()
+
+            for row in rows:
+                found = issues[row.id]
+                for issue in found:
+                    checkpoint.counts[issue] = checkpoint.counts.get(issue, 0) + 1
+                if found:
+                    line = json.dumps({
+                        'user_id': row.id,
+                        'username': row.username,
+                        'issues': found,
+                        'fixed': row.id in fixed
+                    }, ensure_ascii=False)
+                    report.write(line.encode('utf-8') + b'\n')
+            report.flush()
+            os.fsync(report.fileno())
+
+            checkpoint.counts['scanned'] += len(rows)
+            checkpoint.counts['fixed'] += len(fixed)
+            checkpoint.last_id = rows[-1].id
+            checkpoint.report_offset = report.tell()
+            checkpoint.save()
+            if progress:
+                progress(checkpoint)
+
+    checkpoint.completed = True
+    checkpoint.save()
+    return checkpoint.counts
@@ -0,0 +1,74 @@
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.metrics import metrics
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 503"""
+
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    """
+    Lazily create the process pool in the current (worker) process so it is
+    never inherited across a gunicorn fork. Returns None when hashing runs inline.
+    """
+    global _pool, _slots
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                max_pending = current_app.config['PASSWORD_HASH_MAX_PENDING']
+                _slots = threading.BoundedSemaphore(workers + max_pending)
+                _pool = ProcessPoolExecutor(max_workers=workers)
+                atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+def _run(fn, *args):
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+
+    # Fail fast instead of queueing unboundedly behind a login burst
+    if not _slots.acquire(blocking=False):
+        raise PasswordHashingBusy("Password hashing queue is full")
+    try:
+        future = pool.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+
+    try:
+        return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+    except FutureTimeoutError:
+        raise PasswordHashingBusy("Password hashing timed out")
+
+def hash_password(password):
+    """
+    Hash a password with the configured PASSWORD_HASH_METHOD
+    """
+    with metrics.timer('echo_password_hash_seconds', operation='hash'):
+        return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(password_hash, password):
+    """
+    Check a password against a stored Werkzeug hash
+    """
+    with metrics.timer('echo_password_hash_seconds', operation='verify'):
+        return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """
+    Whether a stored hash was produced with parameters other than the
+    configured PASSWORD_HASH_METHOD (e.g. fewer PBKDF2 iterations)
+    """
+    method = password_hash.split('$', 1)[0]
+    return method != current_app.config['PASSWORD_HASH_METHOD']
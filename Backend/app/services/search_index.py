@@ -0,0 +1,370 @@
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from datetime import datetime
+
+MAGIC = b'ECHOSEG1'
+# magic, byte order, doc count, term count, posting count, total doc length
+_HEADER = struct.Struct('<8sBxxxIIIQ')
+_BYTE_ORDER = 1 if sys.byteorder == 'little' else 2
+
+MANIFEST = 'manifest.json'
+MAX_TF = 0xffff
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+def write_segment(path, docs):
+    """
+    Write an immutable segment file from (doc_id, {term: tf}) pairs given
+    in ascending doc_id order.
+
+    Layout after the header, each section a native-endian array so a
+    reader can map it straight into memoryviews:
+    doc ids (int64), doc lengths (uint32), term offsets (uint32, +1),
+    posting offsets (uint32, +1), posting doc indexes (uint32),
+    posting term frequencies (uint16), then the sorted UTF-8 term blob.
+    """
+    doc_ids = array('q')
+    doc_lengths = array('I')
+    postings = {}
+    for doc_id, terms in docs:
+        index = len(doc_ids)
+        doc_ids.append(doc_id)
+        doc_lengths.append(sum(terms.values()))
+        for term, tf in terms.items():
+            postings.setdefault(term.encode('utf-8'), []).append((index, min(tf, MAX_TF)))
+
+    term_offsets = array('I', [0])
+    posting_offsets = array('I', [0])
+    posting_docs = array('I')
+    posting_tfs = array('H')
+    blob = bytearray()
+    for term in sorted(postings):
+        blob += term
+        term_offsets.append(len(blob))
+        for index, tf in postings[term]:
+            posting_docs.append(index)
+            posting_tfs.append(tf)
+        posting_offsets.append(len(posting_docs))
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, _BYTE_ORDER, len(doc_ids), len(postings),
+                             len(posting_docs), sum(doc_lengths)))
+        for section in (doc_ids, doc_lengths, term_offsets, posting_offsets, posting_docs, posting_tfs):
+            section.tofile(f)
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(doc_ids)
+
+
+class Segment:
+    """
+    Read-only, memory-mapped segment. Nothing is copied at load time; term
+    lookup is a binary search over the mapped term blob.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byte_order, self.doc_count, self.term_count, posting_count, self.total_length = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or byte_order != _BYTE_ORDER:
+            self._mmap.close()
+            raise ValueError(f"Unsupported search segment: {path}")
+
+        self._views = []
+        offset = _HEADER.size
+
+        def section(fmt, count):
+            nonlocal offset
+            size = struct.calcsize(fmt) * count
+            view = memoryview(self._mmap)[offset:offset + size].cast(fmt)
+            self._views.append(view)
+            offset += size
+            return view
+
+        self._doc_ids = section('q', self.doc_count)
+        self._doc_lengths = section('I', self.doc_count)
+        self._term_offsets = section('I', self.term_count + 1)
+        self._posting_offsets = section('I', self.term_count + 1)
+        self._posting_docs = section('I', posting_count)
+        self._posting_tfs = section('H', posting_count)
+        self._blob = memoryview(self._mmap)[offset:]
+        self._views.append(self._blob)
+
+    def _term(self, i):
+        return self._blob[self._term_offsets[i]:self._term_offsets[i + 1]].tobytes()
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _term_range(self, term, prefix):
+        key = term.encode('utf-8')
+        first = self._lower_bound(key)
+        last = first
+        if prefix:
+            while last < self.term_count and self._term(last).startswith(key):
+                last += 1
+        elif last < self.term_count and self._term(last) == key:
+            last += 1
+        return first, last
+
+    def document_frequency(self, term, prefix=False):
+        first, last = self._term_range(term, prefix)
+        return self._posting_offsets[last] - self._posting_offsets[first]
+
+    def postings(self, term, prefix=False):
+        """
+        Yield (doc_id, tf, doc_length) for documents containing term (or,
+        with prefix, any term starting with it)
+        """
+        first, last = self._term_range(term, prefix)
+        for i in range(self._posting_offsets[first], self._posting_offsets[last]):
+            index = self._posting_docs[i]
+            yield self._doc_ids[index], self._posting_tfs[i], self._doc_lengths[index]
+
+    def close(self):
+        # Views must be released before the map can be closed
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+
+class SearchIndex:
+    """
+    Inverted index over one kind of document (tweets or users).
+
+    The bulk of the index lives in immutable on-disk segments listed in
+    the directory's manifest and memory-mapped on load, so workers share
+    pages through the OS cache. Changes made since the segments were built
+    live in an in-memory delta: added documents are indexed there, and
+    deleted or re-indexed documents are tombstoned so their segment
+    postings are skipped. Results are ranked with BM25; every query term
+    must match.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.max_id = 0
+        # Rows changed before indexed_at (naive UTC) are reflected: set from
+        # the manifest on load, advanced by each completed catch-up, None
+        # until segments exist. catch_up_cursor is the (updated_at, id) an
+        # unfinished catch-up resumes from.
+        self.indexed_at = None
+        self.catch_up_cursor = None
+        self._segments = []
+        self._manifest_mtime = None
+        self._live_terms = {}
+        self._live_docs = {}
+        self._tombstones = set()
+        self._lock = threading.RLock()
+
+    def load(self):
+        """
+        (Re)open the segments in the manifest if it changed since the last
+        load. Returns True if a new manifest was loaded.
+        """
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._manifest_mtime:
+            return False
+
+        with open(path) as f:
+            manifest = json.load(f)
+        segments = []
+        try:
+            for name in manifest['segments']:
+                segments.append(Segment(os.path.join(self.directory, name)))
+        except (OSError, ValueError):
+            logging.exception("Failed to load search segments from %s", self.directory)
+            for segment in segments:
+                segment.close()
+            return False
+
+        with self._lock:
+            old, self._segments = self._segments, segments
+            self._manifest_mtime = mtime
+            self.max_id = manifest['max_id']
+            # Manifests written before indexed_at was recorded: the build
+            # finished at mtime, so edits during it rely on the catch-up overlap
+            self.indexed_at = datetime.fromisoformat(manifest['indexed_at']) if manifest.get('indexed_at') \
+                else datetime.utcfromtimestamp(mtime / 1e9)
+            self.catch_up_cursor = None
+            # The new segments cover everything up to max_id
+            for doc_id in [d for d in self._live_docs if d <= self.max_id]:
+                self._remove_live(doc_id)
+            self._tombstones.clear()
+            for segment in old:
+                segment.close()
+        return True
+
+    def _remove_live(self, doc_id):
+        terms = self._live_docs.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._live_terms[term]
+            del postings[doc_id]
+            if not postings:
+                del self._live_terms[term]
+
+    def add(self, doc_id, terms):
+        """
+        Index (or re-index) doc_id with a {term: tf} mapping
+        """
+        with self._lock:
+            self.remove(doc_id)
+            if not terms:
+                return
+            self._live_docs[doc_id] = {term: min(tf, MAX_TF) for term, tf in terms.items()}
+            for term, tf in self._live_docs[doc_id].items():
+                self._live_terms.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_live(doc_id)
+            self._tombstones.add(doc_id)
+
+    def _live_postings(self, term, prefix):
+        if prefix:
+            # Only lone CJK characters are prefix-matched; the delta is small
+            terms = [t for t in self._live_terms if t.startswith(term)]
+        else:
+            terms = [term] if term in self._live_terms else []
+        for t in terms:
+            for doc_id, tf in self._live_terms[t].items():
+                yield doc_id, tf, sum(self._live_docs[doc_id].values())
+
+    def _matches(self, term, prefix):
+        hits = {}
+        for segment in self._segments:
+            for doc_id, tf, length in segment.postings(term, prefix):
+                if doc_id in self._tombstones or doc_id in self._live_docs:
+                    continue
+                previous = hits.get(doc_id)
+                hits[doc_id] = (tf + previous[0] if previous else tf, length)
+        for doc_id, tf, length in self._live_postings(term, prefix):
+            previous = hits.get(doc_id)
+            hits[doc_id] = (tf + previous[0] if previous else tf, length)
+        return hits
+
+    def search(self, terms, limit=20, offset=0):
+        """
+        Ids of the best-matching documents for (term, is_prefix) pairs,
+        highest score first, ties broken by newest id
+        """
+        if not terms:
+            return []
+        with self._lock:
+            doc_count = sum(s.doc_count for s in self._segments) + len(self._live_docs)
+            total_length = sum(s.total_length for s in self._segments) + \
+                sum(sum(t.values()) for t in self._live_docs.values())
+            if doc_count == 0:
+                return []
+            average_length = total_length / doc_count
+
+            # Rarest term first so later terms only score surviving candidates
+            ordered = sorted(terms, key=lambda t: sum(s.document_frequency(*t) for s in self._segments))
+            scores = None
+            for term, prefix in ordered:
+                hits = self._matches(term, prefix)
+                if not hits:
+                    return []
+                # Document frequency over the whole index, before narrowing to candidates
+                frequency = len(hits)
+                idf = math.log(1 + (doc_count - frequency + 0.5) / (frequency + 0.5))
+                if scores is not None:
+                    hits = {d: h for d, h in hits.items() if d in scores}
+                    if not hits:
+                        return []
+                term_scores = {
+                    doc_id: idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+                    for doc_id, (tf, length) in hits.items()
+                }
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {d: scores[d] + s for d, s in term_scores.items()}
+
+        ranked = heapq.nlargest(offset + limit, scores, key=lambda d: (scores[d], d))
+        return ranked[offset:]
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._manifest_mtime = None
+
+
+def build_segments(directory, docs, segment_docs=200000, indexed_at=None):
+    """
+    Write docs ((doc_id, {term: tf}) in ascending id order) as a fresh set
+    of segments of at most segment_docs documents each, then switch the
+    manifest to them atomically and delete the previous generation.
+    indexed_at (naive UTC, default now) is when reading docs started;
+    readers catch up on rows changed since. Processes that still map old
+    segments keep reading them until they reload. Returns the number of
+    documents written.
+    """
+    indexed_at = indexed_at or datetime.utcnow()
+    os.makedirs(directory, exist_ok=True)
+    generation = 1
+    previous = []
+    path = os.path.join(directory, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        generation = manifest.get('generation', 0) + 1
+        previous = manifest['segments']
+
+    names, batch, written, max_id = [], [], 0, 0
+
+    def flush():
+        nonlocal written
+        name = f"seg-{generation:06d}-{len(names):04d}.seg"
+        written += write_segment(os.path.join(directory, name), batch)
+        names.append(name)
+        batch.clear()
+
+    for doc in docs:
+        batch.append(doc)
+        max_id = doc[0]
+        if len(batch) >= segment_docs:
+            flush()
+    if batch or not names:
+        flush()
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump({'generation': generation, 'segments': names, 'max_id': max_id,
+                   'indexed_at': indexed_at.isoformat()}, f)
+    os.replace(tmp_path, path)
+
+    for name in previous:
+        if name not in names:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    return written
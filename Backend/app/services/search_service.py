@@ -0,0 +1,258 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, and_, or_
+from sqlalchemy.orm import Session, load_only
+from app import db
+from app.models import User, Tweet
+from app.services.search_index import SearchIndex, build_segments
+from app.services.tweet_service import load_tweets
+from app.utils.tokenizer import tokenize, query_terms
+from app.utils.db_routing import primary_reads
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = 'search_index_pending'
+
+# Username and nickname matches outrank bio matches
+NAME_WEIGHT = 3
+
+_USER_FIELDS = ('username', 'nickname', 'bio')
+
+def tweet_terms(content):
+    return Counter(tokenize(content))
+
+def user_terms(username, nickname, bio):
+    terms = Counter(tokenize(bio))
+    for term in tokenize(username) + tokenize(nickname):
+        terms[term] += NAME_WEIGHT
+    return terms
+
+def _tweet_rows():
+    query = db.session.query(Tweet.id, Tweet.content).order_by(Tweet.id)
+    for tweet_id, content in query.yield_per(1000):
+        yield tweet_id, tweet_terms(content)
+
+def _user_rows():
+    query = db.session.query(User.id, User.username, User.nickname, User.bio).order_by(User.id)
+    for user_id, username, nickname, bio in query.yield_per(1000):
+        yield user_id, user_terms(username, nickname, bio)
+
+# Every row in id order, for building segments
+_ROWS = {'tweets': _tweet_rows, 'users': _user_rows}
+
+def _changed_tweets(after, limit):
+    updated_at, last_id = after
+    query = db.session.query(Tweet.id, Tweet.updated_at, Tweet.content) \
+        .filter(or_(Tweet.updated_at > updated_at, and_(Tweet.updated_at == updated_at, Tweet.id > last_id))) \
+        .order_by(Tweet.updated_at, Tweet.id).limit(limit)
+    for tweet_id, changed_at, content in query:
+        yield tweet_id, changed_at, tweet_terms(content)
+
+def _changed_users(after, limit):
+    updated_at, last_id = after
+    query = db.session.query(User.id, User.updated_at, User.username, User.nickname, User.bio) \
+        .filter(or_(User.updated_at > updated_at, and_(User.updated_at == updated_at, User.id > last_id))) \
+        .order_by(User.updated_at, User.id).limit(limit)
+    for user_id, changed_at, username, nickname, bio in query:
+        yield user_id, changed_at, user_terms(username, nickname, bio)
+
+# Rows inserted or edited after a (updated_at, id) key, in key order
+_CHANGED = {'tweets': _changed_tweets, 'users': _changed_users}
+
+
+class _Registry:
+    """
+    One SearchIndex per document kind for this process, reloaded when the
+    on-disk manifest changes and caught up with rows other workers inserted
+    or edited since, at most every SEARCH_REFRESH_INTERVAL seconds
+    """
+    def __init__(self):
+        self._indexes = {}
+        self._refreshed = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind, refresh=True):
+        with self._lock:
+            index = self._indexes.get(kind)
+            if index is None:
+                # Map the segments before any live change is applied on top
+                index = self._indexes[kind] = SearchIndex(os.path.join(index_dir(), kind))
+                index.load()
+                self._refreshed[kind] = None
+            now = time.monotonic()
+            last = self._refreshed[kind]
+            due = last is None or now - last >= current_app.config['SEARCH_REFRESH_INTERVAL']
+            if refresh and due:
+                self._refreshed[kind] = now
+        if refresh and due:
+            index.load()
+            # The catch-up watermark must not run ahead of a lagging replica
+            with primary_reads(db.session):
+                _catch_up(kind, index)
+        return index
+
+    def clear(self):
+        with self._lock:
+            for index in self._indexes.values():
+                index.close()
+            self._indexes.clear()
+            self._refreshed.clear()
+
+
+indexes = _Registry()
+_warned_unbuilt = set()
+
+def index_dir():
+    """
+    Directory holding the tweets/ and users/ segment sets
+    """
+    return current_app.config.get('SEARCH_INDEX_DIR') or \
+        os.path.join(current_app.root_path, '..', 'search_index')
+
+def _catch_up(kind, index):
+    """
+    Re-index rows inserted or edited (by updated_at) since the segments or
+    the last catch-up, looking SEARCH_CATCHUP_OVERLAP seconds further back
+    for transactions that committed late. At most SEARCH_CATCHUP_MAX_ROWS
+    per call; a larger backlog resumes on the next refresh. Without built
+    segments nothing is read, so a fresh deployment does not index the
+    whole table on the request path of every worker; build it with
+    `flask search-index`.
+
+    Deletes made by other workers are not seen here. Their documents stay
+    in the index until the next rebuild and drop out when results are
+    loaded from the database.
+    """
+    if index.indexed_at is None:
+        if kind not in _warned_unbuilt:
+            _warned_unbuilt.add(kind)
+            logger.warning("No %s search index in %s; run `flask search-index` to build it", kind, index.directory)
+        return
+
+    config = current_app.config
+    started = datetime.utcnow()
+    after = index.catch_up_cursor or \
+        (index.indexed_at - timedelta(seconds=config['SEARCH_CATCHUP_OVERLAP']), 0)
+    remaining = config['SEARCH_CATCHUP_MAX_ROWS']
+    while remaining > 0:
+        limit = min(config['SEARCH_CATCHUP_BATCH'], remaining)
+        count = 0
+        for doc_id, changed_at, terms in _CHANGED[kind](after, limit):
+            index.add(doc_id, terms)
+            after = (changed_at, doc_id)
+            count += 1
+        remaining -= count
+        if count < limit:
+            # Caught up: next time start from now, less the overlap
+            index.indexed_at = started
+            index.catch_up_cursor = None
+            return
+    index.catch_up_cursor = after
+    logger.warning("Search index for %s is more than %d changes behind; run `flask search-index`",
+                   kind, config['SEARCH_CATCHUP_MAX_ROWS'])
+
+def rebuild_index(kind, segment_docs=200000):
+    """
+    Rebuild one kind's on-disk segments from the database.
+    Returns the number of documents indexed.
+    """
+    # Rows changed while the build reads the table are caught up from indexed_at
+    indexed_at = datetime.utcnow()
+    return build_segments(os.path.join(index_dir(), kind), _ROWS[kind](), segment_docs=segment_docs,
+                          indexed_at=indexed_at)
+
+def search_tweets(query, limit=20, offset=0, viewer_id=None):
+    """
+    Ranked tweets matching every term of query. Deleted tweets the index
+    still holds drop out when the results are loaded.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    tweet_ids = indexes.get('tweets').search(terms, limit=limit, offset=offset)
+    return load_tweets(tweet_ids, viewer_id=viewer_id)
+
+def search_users(query, limit=20, offset=0):
+    """
+    Ranked users whose username, nickname or bio match every term of query
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    user_ids = indexes.get('users').search(terms, limit=limit, offset=offset)
+    if not user_ids:
+        return []
+    users = {
+        u.id: u for u in User.query
+        .options(load_only(User.id, User.username, User.nickname, User.bio, User.avatar, User.followers_count))
+        .filter(User.id.in_(user_ids))
+    }
+    return [
+        {
+            "id": user.id,
+            "username": user.username,
+            "nickname": user.nickname,
+            "bio": user.bio,
+            "avatar": user.avatar,
+            "followers_count": user.followers_count
+        }
+        for user in (users.get(user_id) for user_id in user_ids) if user is not None
+    ]
+
+
+# Incremental updates: changes are collected during flush and applied to
+# this process's index only once the transaction commits
+
+def _queue(target, op):
+    session = Session.object_session(target)
+    session.info.setdefault(_PENDING_KEY, []).append(op)
+
+@event.listens_for(Tweet, 'after_insert')
+def _tweet_inserted(mapper, connection, target):
+    _queue(target, ('tweets', target.id, tweet_terms(target.content)))
+
+@event.listens_for(Tweet, 'after_update')
+def _tweet_updated(mapper, connection, target):
+    if inspect(target).attrs.content.history.has_changes():
+        _queue(target, ('tweets', target.id, tweet_terms(target.content)))
+
+@event.listens_for(Tweet, 'after_delete')
+def _tweet_deleted(mapper, connection, target):
+    _queue(target, ('tweets', target.id, None))
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    _queue(target, ('users', target.id, user_terms(target.username, target.nickname, target.bio)))
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    # Counter bumps also update the row; only re-index on profile changes
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _USER_FIELDS):
+        _queue(target, ('users', target.id, user_terms(target.username, target.nickname, target.bio)))
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _queue(target, ('users', target.id, None))
+
+def _apply_pending(session):
+    pending = session.info.pop(_PENDING_KEY, ())
+    if not has_app_context():
+        return
+    for kind, doc_id, terms in pending:
+        index = indexes.get(kind, refresh=False)
+        if terms is None:
+            index.remove(doc_id)
+        else:
+            index.add(doc_id, terms)
+
+def _discard_pending(session, *args):
+    session.info.pop(_PENDING_KEY, None)
+
+event.listen(Session, 'after_commit', _apply_pending)
+event.listen(Session, 'after_soft_rollback', _discard_pending)
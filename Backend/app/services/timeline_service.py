@@ -0,0 +1,185 @@
+import heapq
+from flask import current_app
+from sqlalchemy import select, insert, delete, literal, func
+from app import db
+from app.models import User, Tweet, TimelineEntry, followers
+
+def _max_length():
+    return current_app.config['TIMELINE_MAX_LENGTH']
+
+def _fanout_threshold():
+    return current_app.config['TIMELINE_FANOUT_THRESHOLD']
+
+def is_high_fanout(user_id, connection=None):
+    """
+    Whether an author has too many followers to fan out on write
+    """
+    count = (connection or db.session).scalar(select(User.followers_count).where(User.id == user_id))
+    return (count or 0) > _fanout_threshold()
+
+def high_fanout_followed_ids(user_id):
+    """
+    Ids of accounts followed by user_id whose tweets are merged in at read time
+    """
+    stmt = (
+        select(User.id)
+        .join(followers, followers.c.followed_id == User.id)
+        .where(followers.c.follower_id == user_id, User.followers_count > _fanout_threshold())
+    )
+    return list(db.session.scalars(stmt))
+
+def push_tweet(tweet, connection=None):
+    """
+    Fan a newly created tweet out to its author's and followers' timelines.
+    Called from the Tweet after_insert hook with the flush's connection;
+    the caller is responsible for committing.
+    """
+    connection = connection or db.session
+    connection.execute(insert(TimelineEntry).values(user_id=tweet.user_id, tweet_id=tweet.id))
+
+    # High fan-out authors are merged in at read time instead
+    if is_high_fanout(tweet.user_id, connection):
+        return
+
+    connection.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'tweet_id'],
+            select(followers.c.follower_id, literal(tweet.id))
+            .where(followers.c.followed_id == tweet.user_id)
+        )
+    )
+
+def remove_tweet(tweet, connection=None):
+    """
+    Remove a deleted tweet from every timeline it was fanned out to.
+    Called from the Tweet before_delete hook, ahead of the tweet row.
+    """
+    (connection or db.session).execute(delete(TimelineEntry).where(TimelineEntry.tweet_id == tweet.id))
+
+def trim_timeline(user_id):
+    """
+    Drop the oldest entries beyond TIMELINE_MAX_LENGTH. Called from
+    on_follow and the trim-timelines command, never on the read path.
+    """
+    cutoff = db.session.scalar(
+        select(TimelineEntry.tweet_id)
+        .where(TimelineEntry.user_id == user_id)
+        .order_by(TimelineEntry.tweet_id.desc())
+        .offset(_max_length())
+        .limit(1)
+    )
+    if cutoff is not None:
+        db.session.execute(
+            delete(TimelineEntry).where(
+                TimelineEntry.user_id == user_id,
+                TimelineEntry.tweet_id <= cutoff
+            )
+        )
+
+def trim_timelines(chunk_size=500):
+    """
+    Trim every timeline that has grown past TIMELINE_MAX_LENGTH through
+    fan-out, committing per chunk of users. Returns the number trimmed.
+    """
+    trimmed, last_id = 0, 0
+    while True:
+        # The (user_id, tweet_id) primary key serves the grouped count
+        user_ids = list(db.session.scalars(
+            select(TimelineEntry.user_id)
+            .where(TimelineEntry.user_id > last_id)
+            .group_by(TimelineEntry.user_id)
+            .having(func.count() > _max_length())
+            .order_by(TimelineEntry.user_id)
+            .limit(chunk_size)
+        ))
+        if not user_ids:
+            return trimmed
+        for user_id in user_ids:
+            trim_timeline(user_id)
+        db.session.commit()
+        trimmed += len(user_ids)
+        last_id = user_ids[-1]
+
+def _latest_tweet_ids(author_ids, limit, max_id=None):
+    stmt = select(Tweet.id).where(Tweet.user_id.in_(author_ids))
+    if max_id is not None:
+        stmt = stmt.where(Tweet.id < max_id)
+    return list(db.session.scalars(stmt.order_by(Tweet.id.desc()).limit(limit)))
+
+def on_follow(follower_id, followed_id):
+    """
+    Backfill a timeline with the recent tweets of a newly followed account.
+    Called from User.follow inside the follow's transaction.
+    """
+    if is_high_fanout(followed_id):
+        return
+
+    existing = select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == follower_id)
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'tweet_id'],
+            select(literal(follower_id), Tweet.id)
+            .where(Tweet.user_id == followed_id, Tweet.id.not_in(existing))
+            .order_by(Tweet.id.desc())
+            .limit(_max_length())
+        )
+    )
+    trim_timeline(follower_id)
+
+def on_unfollow(follower_id, followed_id):
+    """
+    Remove an unfollowed account's tweets from a timeline.
+    Called from User.unfollow inside the unfollow's transaction.
+    """
+    db.session.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id,
+            TimelineEntry.tweet_id.in_(select(Tweet.id).where(Tweet.user_id == followed_id))
+        )
+    )
+
+def rebuild_timeline(user_id):
+    """
+    Recompute a user's timeline from scratch (own tweets plus followed
+    accounts that are fanned out on write). Used by the rebuild-timelines
+    command to backfill existing users.
+    """
+    db.session.execute(delete(TimelineEntry).where(TimelineEntry.user_id == user_id))
+
+    high_fanout = high_fanout_followed_ids(user_id)
+    author_ids = select(followers.c.followed_id).where(followers.c.follower_id == user_id)
+    stmt = (
+        select(literal(user_id), Tweet.id)
+        .where((Tweet.user_id == user_id) | Tweet.user_id.in_(author_ids))
+    )
+    if high_fanout:
+        stmt = stmt.where(Tweet.user_id.not_in(high_fanout))
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'tweet_id'],
+            stmt.order_by(Tweet.id.desc()).limit(_max_length())
+        )
+    )
+
+def get_home_timeline_ids(user_id, limit=20, max_id=None):
+    """
+    Return a page of home timeline tweet ids, newest first.
+    Precomputed entries are merged with recent tweets from high fan-out authors.
+    """
+    stmt = select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == user_id)
+    if max_id is not None:
+        stmt = stmt.where(TimelineEntry.tweet_id < max_id)
+    precomputed = list(db.session.scalars(stmt.order_by(TimelineEntry.tweet_id.desc()).limit(limit)))
+
+    high_fanout = high_fanout_followed_ids(user_id)
+    pulled = _latest_tweet_ids(high_fanout, limit, max_id) if high_fanout else []
+
+    # Both lists are sorted descending; a tweet may appear in both if its
+    # author crossed the threshold after it was fanned out
+    tweet_ids = []
+    for tweet_id in heapq.merge(precomputed, pulled, reverse=True):
+        if not tweet_ids or tweet_ids[-1] != tweet_id:
+            tweet_ids.append(tweet_id)
+        if len(tweet_ids) == limit:
+            break
+    return tweet_ids
@@ -0,0 +1,261 @@
+import atexit
+import calendar
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import Tweet
+from app.utils.tokenizer import tokenize
+
+# name -> (span in seconds, buckets)
+WINDOWS = {'1h': (3600, 12), '24h': (86400, 24)}
+KINDS = ('hashtags', 'phrases')
+
+# Weibo-style #话题# first, then Twitter-style #tag
+_WEIBO_TAG = re.compile(r'#([^#\s][^#\n]{0,49})#')
+_TAG = re.compile(r'#(\w{1,50})')
+
+_STOPWORDS = frozenset("""
+    the and for you that this with are was have not but all can just
+    我们 你们 他们 一个 没有 什么 自己 这个 那个 就是 不是 可以 今天 现在 因为 所以 但是 还是 真的 知道
+""".split())
+
+def extract_hashtags(content):
+    text = unicodedata.normalize('NFKC', content or '').lower()
+    tags = [t.strip() for t in _WEIBO_TAG.findall(text)]
+    tags.extend(_TAG.findall(_WEIBO_TAG.sub(' ', text)))
+    return {t for t in tags if t}
+
+def extract_phrases(content):
+    """
+    Words of three or more letters and CJK bigrams, each counted once per tweet
+    """
+    return {
+        term for term in tokenize(content)
+        if len(term) >= 2 and term not in _STOPWORDS and not term.isdigit()
+        and (len(term) >= 3 or not term.isascii())
+    }
+
+
+class CountMinSketch:
+    """
+    depth x width counter matrix; estimates never undercount and
+    overcount by at most ~2N/width with high probability
+    """
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.table = array('l', bytes(array('l').itemsize * width * depth))
+
+    def _cells(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key, count=1):
+        for cell in self._cells(key):
+            self.table[cell] += count
+
+    def estimate(self, key):
+        return min(self.table[cell] for cell in self._cells(key))
+
+    def merge(self, other, sign=1):
+        table = self.table
+        for i, value in enumerate(other.table):
+            if value:
+                table[i] += sign * value
+
+
+class SlidingWindow:
+    """
+    Approximate counts over the last span seconds, kept as one sketch per
+    bucket plus a running total sketch from which expired buckets are
+    subtracted. A bounded candidate set tracks the heaviest keys.
+    """
+    def __init__(self, span, buckets, width, depth, capacity):
+        self.bucket_seconds = span // buckets
+        self.buckets = buckets
+        self.capacity = capacity
+        self._width = width
+        self._depth = depth
+        self._sketches = {}
+        self._total = CountMinSketch(width, depth)
+        self._candidates = {}
+        self._current = None
+
+    def _advance(self, bucket):
+        if self._current is not None and bucket <= self._current:
+            return
+        self._current = bucket
+        oldest = bucket - self.buckets + 1
+        expired = [b for b in self._sketches if b < oldest]
+        for b in expired:
+            self._total.merge(self._sketches.pop(b), sign=-1)
+        if expired:
+            self._candidates = {
+                key: count for key, count in
+                ((key, self._total.estimate(key)) for key in self._candidates) if count > 0
+            }
+
+    def advance(self, timestamp):
+        self._advance(int(timestamp // self.bucket_seconds))
+
+    def add(self, keys, timestamp):
+        bucket = int(timestamp // self.bucket_seconds)
+        self._advance(bucket)
+        if bucket <= self._current - self.buckets:
+            return
+        sketch = self._sketches.get(bucket)
+        if sketch is None:
+            sketch = self._sketches[bucket] = CountMinSketch(self._width, self._depth)
+        for key in keys:
+            sketch.add(key)
+            self._total.add(key)
+            count = self._total.estimate(key)
+            if key in self._candidates or len(self._candidates) < self.capacity:
+                self._candidates[key] = count
+            else:
+                weakest = min(self._candidates, key=self._candidates.get)
+                if count > self._candidates[weakest]:
+                    del self._candidates[weakest]
+                    self._candidates[key] = count
+
+    def top(self, k):
+        return sorted(self._candidates.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+class TrendTracker:
+    """
+    Per-process trending hashtags and phrases over the WINDOWS.
+
+    A background thread started on first use replays the last 24 hours,
+    then reads tweets committed by any worker, in id order, every
+    TRENDS_POLL_INTERVAL seconds. Until the replay finishes, top() answers
+    from what has been read so far and ready is False. Each poll re-reads
+    tweets created in the last TRENDS_POLL_OVERLAP seconds, skipping ids
+    already counted, so a transaction that commits after a higher id was
+    read is still counted. Reads never touch the database. Memory is
+    bounded by the sketch size and TRENDS_CANDIDATES regardless of how
+    many distinct tags appear. Deleted tweets are not subtracted.
+    """
+    def __init__(self):
+        self._windows = None
+        self._last_id = None
+        # Tweets counted that a later poll may read again: {id: created_at}
+        self._seen = {}
+        self.ready = False
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._app = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            config = current_app.config
+            self._windows = {
+                (kind, name): SlidingWindow(span, buckets, config['TRENDS_SKETCH_WIDTH'],
+                                            config['TRENDS_SKETCH_DEPTH'], config['TRENDS_CANDIDATES'])
+                for kind in KINDS for name, (span, buckets) in WINDOWS.items()
+            }
+            self._app = current_app._get_current_object()
+            # The 24 hour replay runs in the consumer thread, not in this request
+            self._thread = threading.Thread(target=self._run, name='trend-consumer', daemon=True)
+            self._thread.start()
+            atexit.register(self._stop.set)
+
+    def _run(self):
+        interval = self._app.config['TRENDS_POLL_INTERVAL']
+        while True:
+            try:
+                with self._app.app_context():
+                    try:
+                        self.poll()
+                        self.ready = True
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logging.exception("Trend poll failed")
+            if self._stop.wait(interval):
+                return
+
+    def poll(self, batch=1000):
+        """
+        Consume tweets committed since the last poll, re-reading the
+        overlap window for ones that committed late
+        """
+        if self._last_id is None:
+            since = datetime.utcnow() - timedelta(seconds=max(span for span, _ in WINDOWS.values()))
+            first_id = db.session.query(func.min(Tweet.id)).filter(Tweet.created_at >= since).scalar()
+            self._last_id = (first_id - 1) if first_id is not None else \
+                (db.session.query(func.max(Tweet.id)).scalar() or 0)
+
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['TRENDS_POLL_OVERLAP'])
+        # Tweets whose transaction committed after a higher id was read
+        late = db.session.query(Tweet.id, Tweet.content, Tweet.created_at) \
+            .filter(Tweet.created_at >= cutoff, Tweet.id <= self._last_id) \
+            .all()
+        self._consume(late, cutoff)
+
+        while True:
+            rows = db.session.query(Tweet.id, Tweet.content, Tweet.created_at) \
+                .filter(Tweet.id > self._last_id) \
+                .order_by(Tweet.id) \
+                .limit(batch) \
+                .all()
+            self._consume(rows, cutoff)
+            if len(rows) < batch:
+                break
+
+        # Only tweets created after the cutoff are read again
+        self._seen = {i: created_at for i, created_at in self._seen.items() if created_at >= cutoff}
+
+    def _consume(self, rows, cutoff):
+        for tweet_id, content, created_at in rows:
+            if tweet_id in self._seen:
+                continue
+            self.record(content, created_at)
+            if created_at >= cutoff:
+                self._seen[tweet_id] = created_at
+            self._last_id = max(self._last_id, tweet_id)
+
+    def record(self, content, created_at):
+        timestamp = calendar.timegm(created_at.utctimetuple())
+        keys = {'hashtags': extract_hashtags(content), 'phrases': extract_phrases(content)}
+        with self._lock:
+            for (kind, _), window in self._windows.items():
+                window.add(keys[kind], timestamp)
+
+    def top(self, window, kind, limit=10):
+        """
+        [(key, approximate count)] heaviest first
+        """
+        self._ensure_started()
+        with self._lock:
+            sliding = self._windows[(kind, window)]
+            sliding.advance(time.time())
+            return sliding.top(limit)
+
+
+trends = TrendTracker()
+
+def get_trends(window='1h', limit=10):
+    result = {
+        kind: [{"name": name, "count": count} for name, count in trends.top(window, kind, limit)]
+        for kind in KINDS
+    }
+    # False while this process is still replaying the last 24 hours
+    result["complete"] = trends.ready
+    return result
@@ -0,0 +1,51 @@
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+from app import db
+from app.models import User, Tweet, Like
+
+def load_tweets(tweet_ids, viewer_id=None):
+    """
+    Hydrate a page of tweets into response dicts, preserving the order of
+    tweet_ids. Runs a fixed number of queries regardless of page size:
+    tweets (with their denormalized counters), authors, and the viewer's likes.
+    """
+    if not tweet_ids:
+        return []
+
+    tweets = {t.id: t for t in Tweet.query.filter(Tweet.id.in_(tweet_ids))}
+
+    author_ids = {t.user_id for t in tweets.values()}
+    authors = {
+        u.id: u for u in User.query
+        .options(load_only(User.id, User.username, User.nickname, User.avatar))
+        .filter(User.id.in_(author_ids))
+    }
+
+    liked = set()
+    if viewer_id is not None:
+        liked = set(db.session.scalars(
+            select(Like.tweet_id).where(Like.user_id == viewer_id, Like.tweet_id.in_(tweets.keys()))
+        ))
+
+    result = []
+    for tweet_id in tweet_ids:
+        tweet = tweets.get(tweet_id)
+        if tweet is None:
+            continue
+        author = authors.get(tweet.user_id)
+        result.append({
+            "id": tweet.id,
+            "content": tweet.content,
+            "image_url": tweet.image_url,
+            "created_at": tweet.created_at.isoformat(),
+            "author": {
+                "id": author.id,
+                "username": author.username,
+                "nickname": author.nickname,
+                "avatar": author.avatar
+            } if author else None,
+            "like_count": tweet.likes_count,
+            "comment_count": tweet.comments_count,
+            "liked": tweet.id in liked
+        })
+    return result
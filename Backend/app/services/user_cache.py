@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import User
+from app.utils.db_routing import primary_reads
+
+_DIRTY_KEY = 'user_cache_dirty'
+
+UserSnapshot = namedtuple('UserSnapshot', [
+    'id', 'username', 'nickname', 'email', 'bio', 'avatar', 'is_admin',
+    'created_at', 'followers_count', 'following_count'
+])
+
+def snapshot_of(user):
+    return UserSnapshot(
+        id=user.id,
+        username=user.username,
+        nickname=user.nickname,
+        email=user.email,
+        bio=user.bio,
+        avatar=user.avatar,
+        is_admin=user.is_admin,
+        created_at=user.created_at,
+        followers_count=user.followers_count,
+        following_count=user.following_count
+    )
+
+
+class UserCache:
+    """
+    Per-process, TTL-bounded cache of immutable user snapshots for
+    authenticated requests.
+
+    Each user id carries a version that is bumped on invalidation; a load
+    that started before an invalidation is not stored, so a slow reader
+    cannot put a stale snapshot back. Other workers' writes become visible
+    after USER_CACHE_TTL seconds. Misses are loaded from the primary, not
+    a read replica.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Snapshot for user_id, loading it from the database on a miss.
+        Returns None if the user does not exist.
+        """
+        user_id = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            version = self._versions.get(user_id, 0)
+
+        # From the primary even in read-only requests: a snapshot of a
+        # lagging replica would be served for the whole TTL
+        with primary_reads(db.session):
+            user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = snapshot_of(user)
+
+        with self._lock:
+            if self._versions.get(user_id, 0) == version:
+                if len(self._entries) >= current_app.config['USER_CACHE_MAX_ENTRIES']:
+                    self._evict_expired(now)
+                self._entries[user_id] = (now + current_app.config['USER_CACHE_TTL'], snapshot)
+        return snapshot
+
+    def _evict_expired(self, now):
+        expired = [uid for uid, (expires, _) in self._entries.items() if expires <= now]
+        for uid in expired:
+            del self._entries[uid]
+        # Still full: drop everything rather than grow without bound
+        if len(self._entries) >= current_app.config['USER_CACHE_MAX_ENTRIES']:
+            self._entries.clear()
+
+    def invalidate(self, user_id):
+        user_id = int(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def mark_dirty(self, session, user_id):
+        """
+        Invalidate user_id now and once more when session's transaction ends
+        """
+        self.invalidate(user_id)
+        session.info.setdefault(_DIRTY_KEY, set()).add(int(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+user_cache = UserCache()
+
+def _flush_dirty(session, *args):
+    for user_id in session.info.pop(_DIRTY_KEY, ()):
+        user_cache.invalidate(user_id)
+
+event.listen(Session, 'after_commit', _flush_dirty)
+event.listen(Session, 'after_soft_rollback', _flush_dirty)
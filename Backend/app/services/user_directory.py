@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import User
+from app.utils.db_routing import primary_reads, pin_to_primary
+
+class DuplicateUserError(Exception):
+    """Raised when a username or email is already registered"""
+    def __init__(self, field):
+        super().__init__(f"{field} already exists")
+        self.field = field
+
+
+class InvalidUsernameError(ValueError):
+    """Raised when a username contains '@' and would be resolved as an email"""
+
+
+def _duplicate_field(message):
+    """
+    Which unique constraint an IntegrityError message refers to, e.g.
+    MySQL "Duplicate entry 'x' for key 'user.email'" or SQLite
+    "UNIQUE constraint failed: user.email". Only the constraint part is
+    inspected so the duplicated value itself cannot mislead the match.
+    """
+    if 'duplicate' not in message and 'unique' not in message:
+        return None
+    constraint = message.rsplit('for key', 1)[-1] if 'for key' in message else message.rsplit(':', 1)[-1]
+    return 'email' if 'email' in constraint else 'username'
+
+
+class UserDirectory:
+    """
+    Resolves usernames and emails to users.
+
+    Keeps a per-process LRU of username/email -> id so repeat logins become
+    primary-key lookups, and relies on the user table's unique constraints
+    (not check-then-insert) to reject duplicates at registration.
+    """
+    def __init__(self):
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, user):
+        max_size = current_app.config['USER_DIRECTORY_CACHE_SIZE']
+        with self._lock:
+            for key in (('username', user.username), ('email', user.email)):
+                self._ids[key] = user.id
+                self._ids.move_to_end(key)
+            while len(self._ids) > max_size:
+                self._ids.popitem(last=False)
+
+    def _cached_id(self, key):
+        with self._lock:
+            user_id = self._ids.get(key)
+            if user_id is not None:
+                self._ids.move_to_end(key)
+            return user_id
+
+    def _forget(self, key):
+        with self._lock:
+            self._ids.pop(key, None)
+
+    @staticmethod
+    def _key(identifier):
+        # register() rejects usernames containing '@', so the identifier
+        # type is known up front and one indexed query suffices
+        return ('email', identifier) if '@' in identifier else ('username', identifier)
+
+    def resolve(self, identifier):
+        """
+        Find a user by username or email with a single query
+        """
+        key = self._key(identifier)
+        # The LRU is filled from what this returns, so read the primary
+        with primary_reads(db.session):
+            user_id = self._cached_id(key)
+            if user_id is not None:
+                user = db.session.get(User, user_id)
+                if user is not None and getattr(user, key[0]) == identifier:
+                    return user
+                self._forget(key)
+
+            field, value = key
+            user = User.query.filter(getattr(User, field) == value).first()
+        if user is not None:
+            self._remember(user)
+        return user
+
+    def known_taken(self, username, email):
+        """
+        Cheap pre-check against the LRU only, so obvious duplicates are rejected
+        before paying for a password hash. Returns the taken field or None;
+        a None answer is not authoritative.
+        """
+        if self._cached_id(('username', username)) is not None:
+            return 'username'
+        if self._cached_id(('email', email)) is not None:
+            return 'email'
+        return None
+
+    def register(self, user):
+        """
+        Insert and commit a new user. Raises InvalidUsernameError if the
+        username contains '@', DuplicateUserError if the username or email
+        unique constraint rejects it.
+        """
+        # Every path that creates users comes through here, including
+        # create-admin, which skips validate_registration_data
+        if '@' in user.username:
+            raise InvalidUsernameError("Username cannot contain '@'")
+        db.session.add(user)
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            field = _duplicate_field(str(e.orig).lower())
+            if field is None:
+                raise
+            raise DuplicateUserError(field) from e
+        self._remember(user)
+        # The client has no token for the new account yet; key its
+        # read-your-writes window on the new id
+        pin_to_primary(user.id)
+        return user
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+user_directory = UserDirectory()
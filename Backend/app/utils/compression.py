@@ -0,0 +1,96 @@
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip is offered without it
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+
+def compress(enabled=True):
+    """
+    Per-endpoint override of COMPRESS_DEFAULT. Place it under the route
+    decorator: @compress(False) opts an endpoint out, @compress() in.
+    """
+    def decorator(view):
+        view.compress = enabled
+        return view
+    return decorator
+
+def conditional(enabled=True):
+    """
+    Per-endpoint override of ETAG_DEFAULT: GET responses get a weak ETag
+    and repeat requests with a matching If-None-Match receive a 304
+    """
+    def decorator(view):
+        view.conditional = enabled
+        return view
+    return decorator
+
+def _policy(name, default):
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, name, default)
+
+def _choose_encoding():
+    accept = request.accept_encodings
+    options = [('br', accept.quality('br'))] if brotli is not None else []
+    options.append(('gzip', accept.quality('gzip')))
+    # Ties go to br, which compresses JSON noticeably better
+    encoding, quality = max(options, key=lambda option: option[1])
+    return encoding if quality > 0 else None
+
+def _encode(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_QUALITY'])
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+def _is_candidate(response):
+    return response.mimetype in COMPRESSIBLE_MIMETYPES and \
+        not response.direct_passthrough and not response.is_streamed
+
+def add_etag(response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    if not response.get_etag()[0]:
+        response.add_etag(weak=True)
+    # The body depends on the bearer token, so shared caches must not reuse
+    # it and browsers must revalidate before every use
+    response.vary.add('Authorization')
+    if not response.cache_control:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def compress_response(response):
+    config = current_app.config
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    data = response.get_data()
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    response.set_data(_encode(data, encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def register_compression(app):
+    """
+    Weak ETags with 304s, then gzip/br compression, for JSON API responses
+    """
+    @app.after_request
+    def optimize_response(response):
+        if not _is_candidate(response):
+            return response
+        if _policy('conditional', current_app.config['ETAG_DEFAULT']):
+            # The ETag is taken from the uncompressed body; being weak, it
+            # stays valid for every encoding of it
+            response = add_etag(response)
+        if _policy('compress', current_app.config['COMPRESS_DEFAULT']):
+            response = compress_response(response)
+        return response
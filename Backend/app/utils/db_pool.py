@@ -0,0 +1,75 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that also records how long checkouts take to obtain a
+    connection, whether from the idle queue, by opening a new one or by
+    waiting for one to be returned, and how many gave up after pool_timeout
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+        return entry
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_* settings. SQLite
+    keeps SQLAlchemy's own pool, which does not take the sizing options.
+    """
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+def pool_status(engine):
+    """
+    Snapshot of the engine's connection pool for this process
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # overflow() counts down from -size while the pool is filling
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            status.update({
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "avg_wait_ms": round(pool.wait_seconds / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                "max_wait_ms": round(pool.max_wait_seconds * 1000, 3)
+            })
+    return status
@@ -0,0 +1,271 @@
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from itsdangerous import BadSignature, URLSafeSerializer
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Signed stickiness deadline returned after a write and echoed by the client
+PRIMARY_UNTIL_HEADER = 'X-Primary-Until'
+
+# session.info keys
+_ROUTE_READS = 'route_reads_to_replica'
+_REPLICA = 'replica_bind_key'
+_WROTE = 'wrote_to_primary'
+_PRIMARY_READS = 'primary_reads'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs of read-only requests to a replica.
+
+    Everything else goes to the primary: writes, flushes, SELECT ... FOR
+    UPDATE, textual SQL, nested transactions, models with their own bind,
+    reads inside primary_reads(), and all reads of a request once it has
+    written. A session sticks to one randomly chosen replica.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_replica(mapper, clause):
+            key = self.info.get(_REPLICA)
+            if key is None:
+                keys = [k for k in self._db.engines if k and k.startswith(REPLICA_BIND_PREFIX)]
+                key = self.info[_REPLICA] = random.choice(keys)
+            return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_replica(self, mapper, clause):
+        if not self.info.get(_ROUTE_READS) or self.info.get(_WROTE) or self.info.get(_PRIMARY_READS) \
+                or self._flushing:
+            return False
+        if self.in_nested_transaction():
+            return False
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            return False
+        # Models on a non-default bind keep Flask-SQLAlchemy's routing
+        if mapper is not None and getattr(mapper, 'local_table', None) is not None and \
+                mapper.local_table.metadata.info.get('bind_key') is not None:
+            return False
+        return True
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info[_WROTE] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    # Bulk UPDATE/DELETE and textual statements issued through the session
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop(_WROTE, False) and has_request_context():
+        # Replicas may not have the write yet, for the rest of this request too
+        session.info[_ROUTE_READS] = False
+        g.primary_until = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+
+
+@contextmanager
+def primary_reads(session):
+    """
+    Send session's reads in this block to the primary.
+
+    For loaders of the per-process caches (user snapshots, follow graph,
+    user directory, search catch-up): a cache filled from a lagging
+    replica would keep the stale row for its whole TTL and serve it even
+    to the writer's own requests, which are pinned to the primary but hit
+    the cache first.
+    """
+    previous = session.info.get(_PRIMARY_READS)
+    session.info[_PRIMARY_READS] = True
+    try:
+        yield
+    finally:
+        session.info[_PRIMARY_READS] = previous
+
+
+def replica_binds(config):
+    """
+    SQLALCHEMY_BINDS entries for the comma-separated SQLALCHEMY_REPLICA_URIS,
+    with the primary's engine options
+    """
+    uris = [uri.strip() for uri in (config.get('SQLALCHEMY_REPLICA_URIS') or '').split(',') if uri.strip()]
+    options = config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    return {
+        f"{REPLICA_BIND_PREFIX}{i}": dict(options, url=uri) for i, uri in enumerate(uris)
+    }
+
+
+def pin_to_primary(user_id):
+    """
+    Also keep user_id's reads on the primary after this request's write,
+    for requests that write on behalf of a user before the client holds
+    a token for it (registration)
+    """
+    if has_request_context():
+        g.setdefault('primary_pin_user_ids', set()).add(int(user_id))
+
+def _request_identity():
+    # The JWT identity if the request carries a valid token, else None
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        return None
+    return int(identity) if identity is not None and str(identity).isdigit() else None
+
+class PinCache:
+    """
+    Per-process view of the primary_read_pin table.
+
+    A live pin is trusted until it expires, since pins are only ever
+    extended. A missing or expired pin is trusted for
+    REPLICA_PIN_CACHE_SECONDS after the lookup, so a write served by
+    another worker within that window can be missed by clients that do
+    not echo X-Primary-Until. Pins written by this process are recorded
+    immediately.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, user_id, now):
+        """
+        True or False if the cached entry answers, None if the table must be read
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        until, checked_at = entry
+        if until > now:
+            return True
+        if now - checked_at < current_app.config['REPLICA_PIN_CACHE_SECONDS']:
+            return False
+        return None
+
+    def store(self, user_id, until, checked_at):
+        max_users = current_app.config['REPLICA_PIN_CACHE_MAX_USERS']
+        with self._lock:
+            self._entries[user_id] = (until, checked_at)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_users:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+pin_cache = PinCache()
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='primary-until')
+
+def primary_until_token(user_ids, until):
+    """
+    Signed X-Primary-Until value pinning user_ids to the primary until then
+    """
+    return _serializer().dumps([sorted(user_ids), until])
+
+def _header_pinned(user_id, now):
+    token = request.headers.get(PRIMARY_UNTIL_HEADER)
+    if not token:
+        return False
+    try:
+        user_ids, until = _serializer().loads(token)
+        return user_id in user_ids and float(until) > now
+    except (BadSignature, TypeError, ValueError):
+        return False
+
+def _pinned(engine, user_id, now):
+    # Cheapest first: the deadline the client echoes, this process's view
+    # of the pin table, and only then a primary key lookup on the primary
+    if _header_pinned(user_id, now):
+        return True
+    pinned = pin_cache.lookup(user_id, now)
+    if pinned is not None:
+        return pinned
+
+    from app.models import PrimaryReadPin
+    # A short-lived primary connection, so the request does not hold one
+    with engine.connect() as connection:
+        until = connection.scalar(select(PrimaryReadPin.until).where(PrimaryReadPin.user_id == user_id))
+    pin_cache.store(user_id, until or 0, now)
+    return until is not None and until > now
+
+def _pin(engine, user_ids, until):
+    from app.models import PrimaryReadPin
+    table = PrimaryReadPin.__table__
+    # Its own transaction: the request's has already committed
+    for user_id in user_ids:
+        pin_cache.store(user_id, until, time.time())
+        try:
+            with engine.begin() as connection:
+                updated = connection.execute(
+                    update(table).where(table.c.user_id == user_id).values(until=until)
+                ).rowcount
+                if not updated:
+                    connection.execute(insert(table).values(user_id=user_id, until=until))
+        except IntegrityError:
+            # A concurrent request inserted the pin first
+            with engine.begin() as connection:
+                connection.execute(update(table).where(table.c.user_id == user_id).values(until=until))
+
+def register_read_replicas(app, db):
+    """
+    Route read-only requests to the configured replicas, with
+    read-your-writes stickiness after a committed write.
+
+    Stickiness is keyed on the JWT identity, which the frontend sends on
+    every authenticated request. A request that commits a write returns
+    the signed deadline in X-Primary-Until; clients that echo it are
+    routed without a lookup. The pins are also kept in the primary's
+    primary_read_pin table so every worker and host sees them, read
+    through PinCache so most requests do not touch the primary.
+    Anonymous reads always use a replica.
+    """
+    if not any(key and key.startswith(REPLICA_BIND_PREFIX) for key in app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+
+    @app.before_request
+    def choose_database():
+        info = db.session.info
+        info.pop(_REPLICA, None)
+        info.pop(_WROTE, None)
+        info.pop(_PRIMARY_READS, None)
+        info[_ROUTE_READS] = False
+        if request.method not in READ_ONLY_METHODS:
+            return
+        user_id = _request_identity()
+        info[_ROUTE_READS] = user_id is None or not _pinned(db.engine, user_id, time.time())
+
+    @app.after_request
+    def remember_write(response):
+        until = g.pop('primary_until', None)
+        user_ids = g.pop('primary_pin_user_ids', set())
+        if until is not None:
+            user_id = _request_identity()
+            if user_id is not None:
+                user_ids.add(user_id)
+            if user_ids:
+                response.headers[PRIMARY_UNTIL_HEADER] = primary_until_token(user_ids, until)
+            try:
+                _pin(db.engine, user_ids, until)
+            except Exception:
+                logger.exception("Failed to record primary read pin for users %s", sorted(user_ids))
+        return response
@@ -0,0 +1,67 @@
+import logging
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib provider is used instead
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes and decodes with orjson.
+
+    Output matches DefaultJSONProvider apart from whitespace and non-ASCII
+    text being written as UTF-8 rather than \\u escapes: keys are sorted,
+    non-string keys are converted, and datetimes and other types orjson
+    does not handle go through the same default() hook. Anything orjson
+    rejects (e.g. integers beyond 64 bits) falls back to the stdlib.
+    """
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj, indent=False, default=None):
+        return orjson.dumps(obj, default=default or self.default, option=self._option(indent))
+
+    def dumps(self, obj, **kwargs):
+        # json.dumps-specific options are only honoured by the stdlib
+        if set(kwargs) - {'default', 'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._encode(obj, bool(kwargs.get('indent')), kwargs.get('default')).decode('utf-8')
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._encode(obj, indent) + b'\n'
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+PROVIDERS = {'orjson': OrjsonProvider, 'stdlib': DefaultJSONProvider}
+
+def json_provider_for(app):
+    """
+    JSON provider instance selected by JSON_PROVIDER, falling back to the
+    stdlib provider when orjson is not installed
+    """
+    name = app.config.get('JSON_PROVIDER', 'orjson')
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER: {name}")
+    if name == 'orjson' and orjson is None:
+        logging.warning("orjson is not installed, using the standard library JSON provider")
+        name = 'stdlib'
+    return PROVIDERS[name](app)
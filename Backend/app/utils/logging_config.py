@@ -0,0 +1,158 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from app.utils.metrics import metrics
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, request_id,
+    any extra= fields and the formatted exception
+    """
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, 'request_id', None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of DEBUG and INFO records; warnings and above always
+    pass. rates maps logger name prefixes to a rate, the longest matching
+    prefix winning over default_rate. Kept records carry sample_rate so
+    counts derived from the logs can be scaled back up.
+    """
+    def __init__(self, default_rate=1.0, rates=None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rates = dict(rates or {})
+        self._resolved = {}
+
+    def _rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            matches = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + '.')]
+            rate = self._resolved[name] = self.rates[max(matches, key=len)] if matches else self.default_rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class RequestQueueHandler(QueueHandler):
+    """
+    Hands records to the background listener without formatting them.
+
+    Only the request id and any exception traceback are captured on the
+    calling thread; the message itself is built by the listener. When the
+    queue is full, records are dropped and counted in /metrics rather
+    than blocking the request.
+    """
+    def prepare(self, record):
+        record.request_id = g.get('request_id') if has_request_context() else None
+        if record.exc_info:
+            # The traceback's frames may be gone by the time the listener runs
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc('echo_log_records_dropped_total')
+
+
+def parse_sample_rates(value):
+    """
+    'app.models.user=0.1,app.controllers=0.5' -> {prefix: rate}
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+def _restart_in_child():
+    # The listener thread does not survive a fork (e.g. gunicorn --preload)
+    # and the queue's locks may have been held by another thread at fork time
+    global _listener
+    if _listener is not None:
+        _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+        _listener = QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+def register_logging(app):
+    """
+    Route all logging through a bounded queue to a background writer and
+    tag records with the request's correlation id (X-Request-ID)
+    """
+    global _listener, _handler
+    config = app.config
+    root = logging.getLogger()
+
+    if _listener is None:
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter() if config['LOG_FORMAT'] == 'json' else logging.Formatter(TEXT_FORMAT))
+        log_queue = queue.Queue(maxsize=config['LOG_QUEUE_SIZE'])
+        _handler = RequestQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+        os.register_at_fork(after_in_child=_restart_in_child)
+        root.addHandler(_handler)
+
+    # Re-applied for every app so the latest config's sampling wins
+    _handler.filters = [SamplingFilter(config['LOG_INFO_SAMPLE_RATE'], parse_sample_rates(config['LOG_SAMPLE_RATES']))]
+    root.setLevel(config['LOG_LEVEL'])
+
+    @app.before_request
+    def assign_request_id():
+        # Reuse the id from an upstream proxy so logs line up across services
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+
+    @app.after_request
+    def expose_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
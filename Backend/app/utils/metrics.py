@@ -0,0 +1,251 @@
+import atexit
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Metric:
+    def __init__(self, name, kind, help, labelnames=(), buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+
+    def key(self, labels):
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"{self.name} needs label {e.args[0]}")
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms for this process.
+
+    Without a directory the values are simply this process's. With one
+    (METRICS_MULTIPROC_DIR, shared by all gunicorn workers) each process
+    also writes its values to worker-<pid>.json every flush interval and
+    on exit, and collect() sums every file in the directory.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._values = {}
+        self._lock = threading.Lock()
+        self._directory = None
+        self._interval = None
+        self._writer_pid = None
+
+    def counter(self, name, help, labelnames=()):
+        return self._define(Metric(name, 'counter', help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._define(Metric(name, 'histogram', help, labelnames, buckets))
+
+    def _define(self, metric):
+        self._metrics[metric.name] = metric
+        self._values[metric.name] = {}
+        return metric
+
+    def configure(self, directory=None, interval=5):
+        self._directory = directory
+        self._interval = interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def inc(self, name, amount=1, **labels):
+        key = self._metrics[name].key(labels)
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+        self._ensure_writer()
+
+    def observe(self, name, value, **labels):
+        metric = self._metrics[name]
+        key = metric.key(labels)
+        # Per-bucket (not cumulative) counts, then sum and count
+        index = next((i for i, bound in enumerate(metric.buckets) if value <= bound), len(metric.buckets))
+        with self._lock:
+            values = self._values[name]
+            state = values.get(key)
+            if state is None:
+                state = values[key] = [0] * (len(metric.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+        self._ensure_writer()
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: [[list(key), list(value) if isinstance(value, list) else value] for key, value in values.items()]
+                for name, values in self._values.items()
+            }
+
+    # Multi-worker aggregation
+
+    def _ensure_writer(self):
+        # Started in each worker on first use, so it is never inherited
+        # across a fork; values recorded before a fork stay with the parent
+        if not self._directory or self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            if self._writer_pid is not None:
+                for values in self._values.values():
+                    values.clear()
+            self._writer_pid = os.getpid()
+        threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True).start()
+        atexit.register(self.write)
+
+    def _write_loop(self):
+        while True:
+            time.sleep(self._interval)
+            try:
+                self.write()
+            except Exception:
+                logging.exception("Writing metrics failed")
+
+    def write(self):
+        if not self._directory:
+            return
+        path = os.path.join(self._directory, f"worker-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """
+        {name: {label values: value}}, summed over every worker's file
+        when aggregating, otherwise this process's values
+        """
+        if not self._directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.write()
+            snapshots = []
+            for path in glob.glob(os.path.join(self._directory, 'worker-*.json')):
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    # A worker replacing its file mid-read; it is picked up next scrape
+                    continue
+
+        merged = {name: {} for name in self._metrics}
+        for snapshot in snapshots:
+            for name, entries in snapshot.items():
+                if name not in merged:
+                    continue
+                values = merged[name]
+                for key, value in entries:
+                    key = tuple(key)
+                    if isinstance(value, list):
+                        current = values.get(key)
+                        values[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        values[key] = values.get(key, 0) + value
+        return merged
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for name, values in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+metrics = MetricsRegistry()
+
+metrics.counter('echo_http_requests_total', 'HTTP requests by endpoint and status code',
+                ('method', 'endpoint', 'status'))
+metrics.histogram('echo_http_request_duration_seconds', 'Time to build the response',
+                  ('method', 'endpoint'))
+metrics.histogram('echo_http_request_db_seconds', 'Database time spent per request',
+                  ('endpoint',))
+metrics.counter('echo_db_queries_total', 'SQL statements executed while handling requests',
+                ('endpoint',))
+metrics.histogram('echo_password_hash_seconds', 'Password hashing and verification, including queueing',
+                  ('operation',), buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+metrics.histogram('echo_avatar_io_seconds', 'Avatar file reads, uploads and thumbnail generation',
+                  ('operation',), buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+metrics.counter('echo_log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+def _record_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    # Unmatched URLs share one label so scanners cannot grow the series
+    endpoint = request.endpoint or 'unmatched'
+    metrics.inc('echo_http_requests_total', method=request.method, endpoint=endpoint, status=response.status_code)
+    metrics.observe('echo_http_request_duration_seconds', time.perf_counter() - start,
+                    method=request.method, endpoint=endpoint)
+    profile = g.get('sql_profile')
+    if profile is not None:
+        metrics.observe('echo_http_request_db_seconds', profile.seconds, endpoint=endpoint)
+        metrics.inc('echo_db_queries_total', profile.queries, endpoint=endpoint)
+    return response
+
+def register_metrics(app):
+    """
+    Record every request and set up multi-worker aggregation when
+    METRICS_MULTIPROC_DIR is configured; /metrics is served by main_bp
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+    metrics.configure(app.config.get('METRICS_MULTIPROC_DIR'), app.config['METRICS_FLUSH_INTERVAL'])
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
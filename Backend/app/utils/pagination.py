@@ -0,0 +1,120 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class Page:
+    """
+    One page of a keyset-paginated listing
+    """
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def to_dict(self):
+        return {
+            "next_cursor": self.next_cursor,
+            "prev_cursor": self.prev_cursor
+        }
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values, direction):
+    """
+    Encode key values and a direction ('next' or 'prev') into an opaque cursor
+    """
+    payload = json.dumps([direction, [_encode_value(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, key_count):
+    """
+    Decode a cursor produced by encode_cursor into (direction, values)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in values]
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if direction not in ('next', 'prev') or len(values) != key_count:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return direction, values
+
+def _after(columns, values):
+    """
+    Expanded row comparison (a < x) OR (a = x AND b < y) ... which, unlike
+    tuple_() comparison, MySQL can turn into an index range scan
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < values[i]))
+    return or_(*clauses)
+
+def _before(columns, values):
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column > values[i]))
+    return or_(*clauses)
+
+def keyset_paginate(query, columns, limit=20, cursor=None, descending=True):
+    """
+    Paginate a query newest-first (or, with descending=False, oldest-first)
+    on the given key columns, e.g. (Tweet.created_at, Tweet.id). The last
+    column must be unique so the ordering is total. Works on Model.query
+    and lazy='dynamic' relationships.
+
+    Raises InvalidCursor if the cursor is malformed.
+    """
+    columns = list(columns)
+    direction, values = ('next', None)
+    if cursor:
+        direction, values = decode_cursor(cursor, len(columns))
+
+    forward, backward = (_after, _before) if descending else (_before, _after)
+    if direction == 'next':
+        if values is not None:
+            query = query.filter(forward(columns, values))
+        query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    else:
+        query = query.filter(backward(columns, values)).order_by(*[c.asc() if descending else c.desc() for c in columns])
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == 'prev':
+        rows.reverse()
+
+    if not rows:
+        return Page([])
+
+    def keys_of(item):
+        return [getattr(item, c.key) for c in columns]
+
+    # Walking forward there is a previous page whenever we started from a
+    # cursor; walking backward there is always a next page
+    if direction == 'next':
+        has_next, has_prev = has_more, values is not None
+    else:
+        has_next, has_prev = True, has_more
+
+    return Page(
+        rows,
+        next_cursor=encode_cursor(keys_of(rows[-1]), 'next') if has_next else None,
+        prev_cursor=encode_cursor(keys_of(rows[0]), 'prev') if has_prev else None
+    )
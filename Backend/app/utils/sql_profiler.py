@@ -0,0 +1,117 @@
+import functools
+import logging
+import os
+import re
+import time
+import traceback
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_logger = logging.getLogger('echo.sql.slow')
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Placeholder lists, e.g. the expanded IN (?, ?, ?) of a batch load
+_PLACEHOLDERS = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=2048)
+def statement_shape(statement):
+    """
+    Statement text with whitespace and placeholder lists collapsed, so
+    the same query with a different number of bound values has one shape
+    """
+    return _PLACEHOLDERS.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+def _caller():
+    # Innermost frame in application code outside this module
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(_APP_DIR) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, _APP_DIR)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class RequestProfile:
+    """
+    Queries and database time of one request, with how often each
+    statement shape ran
+    """
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.shapes = {}
+        self.callers = {}
+
+    def record(self, statement, seconds, threshold):
+        self.queries += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        count = self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if count == threshold:
+            # Only pay for a stack walk once a shape looks repeated
+            self.callers[shape] = _caller()
+
+    def repeated(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+
+def _profile():
+    profile = g.get('sql_profile')
+    if profile is None:
+        profile = g.sql_profile = RequestProfile()
+    return profile
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if not has_app_context():
+        return
+    config = current_app.config
+    if not config['SQL_PROFILER_ENABLED']:
+        return
+
+    in_request = has_request_context()
+    if in_request:
+        _profile().record(statement, elapsed, config['SQL_N_PLUS_ONE_THRESHOLD'])
+    if elapsed * 1000 >= config['SLOW_QUERY_MS']:
+        slow_query_logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            elapsed * 1000, request.endpoint if in_request else 'background', statement_shape(statement)
+        )
+
+def _report(response):
+    profile = g.get('sql_profile')
+    if profile is None:
+        return response
+    config = current_app.config
+    for shape, count in profile.repeated(config['SQL_N_PLUS_ONE_THRESHOLD']):
+        logging.warning(
+            "Possible N+1 on %s %s: %d x %s (first repeated at %s)",
+            request.method, request.endpoint, count, shape, profile.callers.get(shape)
+        )
+    if config['SQL_PROFILER_HEADERS']:
+        response.headers['X-DB-Queries'] = str(profile.queries)
+        response.headers['X-DB-Time'] = f"{profile.seconds * 1000:.3f}"
+    return response
+
+def register_sql_profiler(app):
+    """
+    Per-request query counts and DB time, N+1 warnings and the slow query
+    log. The engine listeners are global; this adds the per-request report
+    and the slow log's file handler.
+    """
+    log_file = app.config.get('SLOW_QUERY_LOG_FILE')
+    if log_file and not any(getattr(h, 'baseFilename', None) == os.path.abspath(log_file)
+                            for h in slow_query_logger.handlers):
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        slow_query_logger.addHandler(handler)
+
+    app.after_request(_report)
+    # Kept until teardown so other after_request hooks (metrics) can read it
+    app.teardown_request(lambda exc: g.pop('sql_profile', None))
@@ -0,0 +1,81 @@
+import unicodedata
+
+# Longest word term kept; longer runs are truncated
+MAX_WORD_LENGTH = 64
+
+_CJK_RANGES = (
+    (0x3040, 0x30ff),    # Hiragana, Katakana
+    (0x3400, 0x4dbf),    # CJK Extension A
+    (0x4e00, 0x9fff),    # CJK Unified Ideographs
+    (0xac00, 0xd7af),    # Hangul syllables
+    (0xf900, 0xfaff),    # CJK Compatibility Ideographs
+    (0x20000, 0x2fa1f),  # CJK Extension B-F, Compatibility Supplement
+)
+
+def is_cjk(char):
+    code = ord(char)
+    for start, end in _CJK_RANGES:
+        if start <= code <= end:
+            return True
+    return False
+
+def _runs(text):
+    """
+    Split normalized text into (is_cjk, run) pairs; everything that is
+    neither CJK nor alphanumeric separates runs
+    """
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    run, run_cjk = [], False
+    for char in text:
+        if is_cjk(char):
+            kind = True
+        elif char.isalnum():
+            kind = False
+        else:
+            if run:
+                yield run_cjk, ''.join(run)
+            run = []
+            continue
+        if run and kind != run_cjk:
+            yield run_cjk, ''.join(run)
+            run = []
+        run_cjk = kind
+        run.append(char)
+    if run:
+        yield run_cjk, ''.join(run)
+
+def tokenize(text):
+    """
+    Index terms for text, with repeats. Alphanumeric runs become whole
+    words; CJK runs become overlapping bigrams plus the run's last
+    character, so every character starts at least one term and a
+    single-character query can be answered by a prefix scan.
+
+    >>> tokenize('我爱北京 Flask')
+    ['我爱', '爱北', '北京', '京', 'flask']
+    """
+    terms = []
+    for cjk, run in _runs(text):
+        if not cjk:
+            terms.append(run[:MAX_WORD_LENGTH])
+            continue
+        terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        terms.append(run[-1])
+    return terms
+
+def query_terms(text):
+    """
+    Distinct (term, is_prefix) pairs a document must all contain to match
+    text. Multi-character CJK runs need only their bigrams; a lone CJK
+    character matches any term starting with it.
+    """
+    seen = {}
+    for cjk, run in _runs(text):
+        if not cjk:
+            seen.setdefault(run[:MAX_WORD_LENGTH], False)
+        elif len(run) == 1:
+            seen.setdefault(run, True)
+        else:
+            for i in range(len(run) - 1):
+                seen.setdefault(run[i:i + 2], False)
+    return list(seen.items())
@@ -0,0 +1,3 @@
+"""
+Load-test and benchmark suite for the Echo API; see benchmarks/run.py
+"""
@@ -0,0 +1,162 @@
+import http.client
+import io
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from PIL import Image
+
+class Scenario:
+    """
+    One endpoint to drive. build(rng, state) returns (headers, body) for
+    the next request; state is per client thread.
+    """
+    def __init__(self, name, method, path, build):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.build = build
+
+
+def _json(payload):
+    return {'Content-Type': 'application/json'}, json.dumps(payload).encode('utf-8')
+
+def _multipart(field, filename, content_type, data):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode('utf-8') + data + f"\r\n--{boundary}--\r\n".encode('utf-8')
+    return {'Content-Type': f"multipart/form-data; boundary={boundary}"}, body
+
+def avatar_images(count=16, size=256, seed=0):
+    """
+    Distinct PNGs, so uploads are not all deduplicated into one file
+    """
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        image = Image.new('RGB', (size, size), tuple(rng.randrange(256) for _ in range(3)))
+        for _ in range(64):
+            x, y = rng.randrange(size), rng.randrange(size)
+            image.putpixel((x, y), tuple(rng.randrange(256) for _ in range(3)))
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        images.append(buffer.getvalue())
+    return images
+
+def build_scenarios(usernames, tokens, password, images):
+    """
+    The auth endpoints: tokens are (access token, is_admin) pairs minted
+    for seeded users, usernames the seeded accounts that can log in
+    """
+    run_id = uuid.uuid4().hex[:6]
+
+    def register(rng, state):
+        state['n'] = state.get('n', 0) + 1
+        # Usernames are limited to 20 characters
+        username = f"r{run_id}{state['client']:03x}{state['n']:x}"[:20]
+        return _json({'username': username, 'email': f"{username}@bench.example", 'password': password})
+
+    def login(rng, state):
+        return _json({'username': rng.choice(usernames), 'password': password})
+
+    def authorized(rng, state):
+        return {'Authorization': f"Bearer {rng.choice(tokens)}"}, None
+
+    def upload(rng, state):
+        headers, body = _multipart('avatar', 'avatar.png', 'image/png', rng.choice(images))
+        headers['Authorization'] = f"Bearer {rng.choice(tokens)}"
+        return headers, body
+
+    return {
+        'register': Scenario('register', 'POST', '/api/auth/register', register),
+        'login': Scenario('login', 'POST', '/api/auth/login', login),
+        'me': Scenario('me', 'GET', '/api/auth/me', authorized),
+        'check-admin': Scenario('check-admin', 'GET', '/api/auth/check-admin', authorized),
+        'upload-avatar': Scenario('upload-avatar', 'POST', '/api/auth/upload-avatar', upload)
+    }
+
+
+def percentile(ordered, fraction):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def summarize(latencies, statuses, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': ms(sum(ordered) / len(ordered)) if ordered else None,
+            'p50': ms(percentile(ordered, 0.50)),
+            'p95': ms(percentile(ordered, 0.95)),
+            'p99': ms(percentile(ordered, 0.99)),
+            'max': ms(ordered[-1]) if ordered else None
+        }
+    }
+
+def drive(host, port, scenario, concurrency, duration, warmup=2.0, seed=0):
+    """
+    Run scenario from concurrency keep-alive clients for warmup + duration
+    seconds; only requests started after the warmup are measured.
+    Connection failures and non-2xx responses count as errors; every
+    response is timed, whatever its status.
+    """
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    results = []
+    lock = threading.Lock()
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        state = {'client': index}
+        latencies, statuses, errors = [], [], 0
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        while True:
+            began = time.perf_counter()
+            if began >= stop_at:
+                break
+            headers, body = scenario.build(rng, state)
+            try:
+                connection.request(scenario.method, scenario.path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                status = None
+            elapsed = time.perf_counter() - began
+            if began < measure_from:
+                continue
+            if status is None or not 200 <= status < 300:
+                errors += 1
+            if status is not None:
+                latencies.append(elapsed)
+                statuses.append(status)
+        connection.close()
+        with lock:
+            results.append((latencies, statuses, errors))
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = [value for result in results for value in result[0]]
+    statuses = [value for result in results for value in result[1]]
+    errors = sum(result[2] for result in results)
+    return summarize(latencies, statuses, errors, duration)
@@ -0,0 +1,253 @@
+"""
+Benchmark the auth API under a real WSGI server.
+
+    python -m benchmarks.run run --users 2000 --concurrency 16 --duration 15
+    python -m benchmarks.run run --baseline benchmarks/results/baseline.json
+    python -m benchmarks.run compare OLD.json NEW.json --threshold 10
+
+`run` seeds a fresh database (a temporary SQLite file unless
+--database-url is given), starts gunicorn on it, drives each scenario in
+turn and writes the results as JSON. Run from the Backend directory.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+SCENARIOS = ('register', 'login', 'me', 'check-admin', 'upload-avatar')
+METRICS = ('p50', 'p95', 'p99')
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _server_env(args, workdir):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': args.database_url,
+        'AVATAR_UPLOAD_DIR': os.path.join(workdir, 'avatars'),
+        'SEARCH_INDEX_DIR': os.path.join(workdir, 'search_index'),
+        'METRICS_MULTIPROC_DIR': os.path.join(workdir, 'metrics'),
+        'LOG_LEVEL': 'WARNING',
+        'SQL_PROFILER_HEADERS': 'false'
+    })
+    return env
+
+def prepare_database(args):
+    """
+    Migrate and seed the database, then mint access tokens for a sample
+    of users. Returns (dataset counts, usernames, tokens).
+    """
+    from app import create_app, db
+    from app.models import User
+    from app.services.auth_service import generate_tokens
+    from flask_migrate import upgrade
+    from benchmarks.seed import seed_dataset
+
+    app = create_app()
+    with app.app_context():
+        if args.skip_seed:
+            dataset = {'users': User.query.filter(User.username.like('bench_u%')).count()}
+        else:
+            upgrade(directory=os.path.join(BACKEND_DIR, 'migrations'))
+            dataset = seed_dataset(users=args.users, seed=args.seed)
+        rows = db.session.query(User.id, User.username, User.is_admin) \
+            .filter(User.username.like('bench_u%')).order_by(User.id).all()
+        if not rows:
+            raise SystemExit("No seeded bench_u* users found; run without --skip-seed first")
+        rng = random.Random(args.seed)
+        sample = rng.sample(rows, min(len(rows), 200))
+        tokens = [generate_tokens(row.id, is_admin=row.is_admin)['access_token'] for row in sample]
+        usernames = [row.username for row in rows]
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    return dataset, usernames, tokens
+
+def start_server(args, env, workdir, port):
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--workers', str(args.workers), '--threads', str(args.threads),
+        '--bind', f"127.0.0.1:{port}", '--log-level', 'warning',
+        'app:create_app()'
+    ]
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with {server.returncode}, see {log.name}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health/live", timeout=1).read()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"Server did not become ready, see {log.name}")
+
+def compare(baseline, current, threshold):
+    """
+    Print per-scenario changes against baseline. Returns the regressions:
+    a p95 latency increase or throughput drop beyond threshold percent,
+    or a higher error rate.
+    """
+    def change(old, new):
+        if old in (None, 0) or new is None:
+            return None
+        return (new - old) / old * 100
+
+    regressions = []
+    print(f"{'scenario':<14}{'rps':>16}{'p50 ms':>22}{'p95 ms':>22}{'p99 ms':>22}")
+    for name, new in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        cells = []
+        rps_change = change(old['throughput_rps'], new['throughput_rps'])
+        cells.append(f"{new['throughput_rps']:>9.1f} {_percent(rps_change):>6}")
+        for metric in METRICS:
+            value = new['latency_ms'][metric]
+            cells.append(f"{value if value is not None else '-':>13} {_percent(change(old['latency_ms'][metric], value)):>8}")
+        print(f"{name:<14}" + ''.join(f"{cell:>22}" if i else f"{cell:>16}" for i, cell in enumerate(cells)))
+
+        p95_change = change(old['latency_ms']['p95'], new['latency_ms']['p95'])
+        if p95_change is not None and p95_change > threshold:
+            regressions.append(f"{name}: p95 latency +{p95_change:.1f}%")
+        if rps_change is not None and rps_change < -threshold:
+            regressions.append(f"{name}: throughput {rps_change:.1f}%")
+        old_rate = old['errors'] / old['requests'] if old['requests'] else 0
+        new_rate = new['errors'] / new['requests'] if new['requests'] else 0
+        if new_rate > old_rate:
+            regressions.append(f"{name}: error rate {old_rate:.2%} -> {new_rate:.2%}")
+    return regressions
+
+def _percent(value):
+    return '' if value is None else f"{value:+.1f}%"
+
+def run(args):
+    from benchmarks.load import build_scenarios, drive, avatar_images
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix='echo-bench-')
+    if not args.database_url:
+        args.database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env = _server_env(args, workdir)
+    os.environ.update(env)
+    # Only now import the app, whose Config reads the environment on import
+    from benchmarks.seed import BENCH_PASSWORD
+
+    print(f"Seeding {args.database_url} ...", flush=True)
+    dataset, usernames, tokens = prepare_database(args)
+    print(f"Dataset: {dataset}", flush=True)
+
+    port = _free_port()
+    server = start_server(args, env, workdir, port)
+    try:
+        available = build_scenarios(usernames, tokens, BENCH_PASSWORD, avatar_images(seed=args.seed))
+        results = {}
+        for name in scenarios:
+            results[name] = drive('127.0.0.1', port, available[name], args.concurrency,
+                                  args.duration, warmup=args.warmup, seed=args.seed)
+            latency = results[name]['latency_ms']
+            print(f"{name:<14} {results[name]['throughput_rps']:>8.1f} req/s  p50 {latency['p50']} ms  "
+                  f"p95 {latency['p95']} ms  p99 {latency['p99']} ms  errors {results[name]['errors']}",
+                  flush=True)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'database': args.database_url.split(':', 1)[0],
+            'workers': args.workers,
+            'threads': args.threads,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'dataset': dataset
+        },
+        'scenarios': results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {output} (server log and data in {workdir})")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        return _report_regressions(regressions)
+    return 0
+
+def _report_regressions(regressions):
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='seed, start gunicorn and benchmark')
+    run_parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    run_parser.add_argument('--skip-seed', action='store_true', help='reuse bench_u* users already in --database-url')
+    run_parser.add_argument('--users', type=int, default=2000)
+    run_parser.add_argument('--seed', type=int, default=42, help='random seed for data and request mix')
+    run_parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='gunicorn workers')
+    run_parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    run_parser.add_argument('--concurrency', type=int, default=16, help='concurrent keep-alive clients')
+    run_parser.add_argument('--duration', type=float, default=15, help='measured seconds per scenario')
+    run_parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds per scenario')
+    run_parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    run_parser.add_argument('--output', help='results file, defaults to benchmarks/results/<timestamp>.json')
+    run_parser.add_argument('--baseline', help='results file to compare against')
+    run_parser.add_argument('--threshold', type=float, default=10, help='regression threshold in percent')
+
+    compare_parser = commands.add_parser('compare', help='compare two results files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10, help='regression threshold in percent')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return _report_regressions(compare(baseline, current, args.threshold))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
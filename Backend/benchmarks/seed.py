@@ -0,0 +1,209 @@
+import random
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, update, bindparam
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet, Like, Comment, Notification
+from app.models.user import followers
+
+# Every seeded account uses this password so login can be driven
+BENCH_PASSWORD = 'BenchPass123!'
+
+BATCH = 5000
+
+_WORDS = (
+    "today coffee music weekend deploy python flask release coding bug travel photo "
+    "game football movie book cat dog rain summer dinner launch team meeting idea "
+    "今天 天气 音乐 周末 电影 旅行 工作 学习 咖啡 晚安"
+).split()
+_HASHTAGS = ("#python", "#flask", "#music", "#travel", "#周末#", "#电影#", "#gamedev", "#news")
+
+def _insert(table, rows):
+    for start in range(0, len(rows), BATCH):
+        db.session.execute(insert(table), rows[start:start + BATCH])
+
+def _popularity(rng, count, exponent):
+    # Zipf-like weights over a shuffled order, so popular ids are spread out
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return [rank ** -exponent for rank in ranks]
+
+def _text(rng, min_words, max_words):
+    words = rng.choices(_WORDS, k=rng.randint(min_words, max_words))
+    if rng.random() < 0.25:
+        words.append(rng.choice(_HASHTAGS))
+    return ' '.join(words)
+
+def seed_dataset(users=2000, seed=42, follow_exponent=1.1, mean_follows=30,
+                 mean_tweets=10, mean_likes=4, mean_comments=1.5, notification_ratio=0.3,
+                 read_between=0.5, read_ratio=0.7):
+    """
+    Insert a reproducible dataset into an empty database with bulk Core
+    inserts (no ORM events, so no search/notification side effects):
+
+    - users sharing BENCH_PASSWORD, hashed once with PASSWORD_HASH_METHOD
+    - a follower graph whose in-degree follows a power law: each user
+      follows ~mean_follows accounts picked with Zipf(follow_exponent)
+      popularity, out-degree is itself heavy-tailed
+    - tweets per user (log-normal), likes and comments skewed towards
+      popular authors
+    - notifications for notification_ratio of those events, coalesced
+      like the notification writer's: at most one unread row per
+      (recipient, type, tweet), whose actor_count counts its events.
+      Between two events the recipient has read the row with probability
+      read_between; read_ratio of the final rows are read
+
+    Denormalised counters are filled in to match. Returns the row counts.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(BENCH_PASSWORD, current_app.config['PASSWORD_HASH_METHOD'])
+
+    user_rows = [{
+        'id': i,
+        'username': f"bench_u{i}",
+        'nickname': f"Bench {i}",
+        'email': f"bench_u{i}@bench.example",
+        'password_hash': password_hash,
+        'bio': _text(rng, 3, 12),
+        'avatar': 'default_avatar.jpg',
+        'is_admin': i == 1,
+        'created_at': now - timedelta(days=rng.uniform(30, 365)),
+        'updated_at': now
+    } for i in range(1, users + 1)]
+    _insert(User.__table__, user_rows)
+
+    ids = list(range(1, users + 1))
+    popularity = _popularity(rng, users, follow_exponent)
+    cumulative = []
+    total = 0.0
+    for weight in popularity:
+        total += weight
+        cumulative.append(total)
+
+    edges = set()
+    for follower in ids:
+        # Pareto-distributed out-degree with the requested mean
+        wanted = min(users - 1, int(rng.paretovariate(2.0) * mean_follows / 2))
+        for followed in rng.choices(ids, cum_weights=cumulative, k=wanted):
+            if followed != follower:
+                edges.add((follower, followed))
+    _insert(followers, [{'follower_id': a, 'followed_id': b} for a, b in sorted(edges)])
+
+    followers_count = dict.fromkeys(ids, 0)
+    following_count = dict.fromkeys(ids, 0)
+    for a, b in edges:
+        following_count[a] += 1
+        followers_count[b] += 1
+
+    tweet_rows = []
+    tweet_author = {}
+    for user_id in ids:
+        for _ in range(int(rng.lognormvariate(0, 1) * mean_tweets / 1.65)):
+            tweet_id = len(tweet_rows) + 1
+            created_at = now - timedelta(seconds=rng.uniform(0, 30 * 86400))
+            tweet_rows.append({'id': tweet_id, 'content': _text(rng, 4, 30), 'user_id': user_id,
+                               'created_at': created_at, 'updated_at': created_at})
+            tweet_author[tweet_id] = user_id
+    _insert(Tweet.__table__, tweet_rows)
+
+    like_pairs = set()
+    likes_count = {}
+    comment_rows = []
+    comments_count = {}
+    for tweet in tweet_rows:
+        # Popular authors draw proportionally more engagement
+        boost = 1 + followers_count[tweet['user_id']] / max(mean_follows, 1)
+        for user_id in rng.sample(ids, min(users, int(rng.expovariate(1 / (mean_likes * boost))))):
+            if (user_id, tweet['id']) not in like_pairs:
+                like_pairs.add((user_id, tweet['id']))
+                likes_count[tweet['id']] = likes_count.get(tweet['id'], 0) + 1
+        for _ in range(int(rng.expovariate(1 / (mean_comments * boost)))):
+            created_at = tweet['created_at'] + timedelta(seconds=rng.uniform(1, 86400))
+            comment_rows.append({'id': len(comment_rows) + 1, 'content': _text(rng, 2, 20),
+                                 'user_id': rng.choice(ids), 'tweet_id': tweet['id'],
+                                 'created_at': created_at, 'updated_at': created_at})
+            comments_count[tweet['id']] = comments_count.get(tweet['id'], 0) + 1
+    _insert(Like.__table__, [
+        {'user_id': user_id, 'tweet_id': tweet_id, 'created_at': now} for user_id, tweet_id in sorted(like_pairs)
+    ])
+    _insert(Comment.__table__, comment_rows)
+
+    events = []
+    def notify(recipient, sender, kind, tweet_id=None, comment_id=None, created_at=None):
+        if recipient == sender or rng.random() >= notification_ratio:
+            return
+        created_at = created_at or now - timedelta(seconds=rng.uniform(0, 30 * 86400))
+        events.append((created_at, recipient, sender, kind, tweet_id, comment_id))
+    for follower, followed in sorted(edges):
+        notify(followed, follower, 'follow')
+    for user_id, tweet_id in sorted(like_pairs):
+        notify(tweet_author[tweet_id], user_id, 'like', tweet_id=tweet_id)
+    for comment in comment_rows:
+        notify(tweet_author[comment['tweet_id']], comment['user_id'], 'comment',
+               tweet_id=comment['tweet_id'], comment_id=comment['id'])
+
+    # Coalesce as the notification writer does: events for one (recipient,
+    # type, tweet) fold into its unread row, bumping actor_count, until the
+    # recipient reads it; the next event then starts a new row
+    notification_rows = []
+    open_rows = {}
+    unread = dict.fromkeys(ids, 0)
+    for created_at, recipient, sender, kind, tweet_id, comment_id in sorted(events, key=lambda e: e[0]):
+        key = (recipient, kind, tweet_id)
+        row = open_rows.get(key)
+        if row is not None and rng.random() < read_between:
+            row['is_read'] = True
+            row = None
+        if row is None:
+            row = open_rows[key] = {'user_id': recipient, 'sender_id': sender, 'type': kind,
+                                    'tweet_id': tweet_id, 'comment_id': comment_id, 'is_read': False,
+                                    'created_at': created_at, 'actor_count': 1}
+            notification_rows.append(row)
+        else:
+            row.update(sender_id=sender, comment_id=comment_id or row['comment_id'],
+                       created_at=created_at, actor_count=row['actor_count'] + 1)
+    for row in open_rows.values():
+        if rng.random() < read_ratio:
+            row['is_read'] = True
+        else:
+            unread[row['user_id']] += 1
+    # Change numbers in order of each row's latest event, as the writer assigns them
+    notification_seq = dict.fromkeys(ids, 0)
+    for row in sorted(notification_rows, key=lambda r: r['created_at']):
+        notification_seq[row['user_id']] += 1
+        row['updated_seq'] = notification_seq[row['user_id']]
+    _insert(Notification.__table__, notification_rows)
+
+    # Counters, keeping updated_at as the writes would
+    user = User.__table__
+    db.session.execute(
+        update(user).where(user.c.id == bindparam('user_id')).values(
+            followers_count=bindparam('followers'), following_count=bindparam('following'),
+            unread_notification_count=bindparam('unread'), notification_seq=bindparam('seq'),
+            updated_at=user.c.updated_at),
+        [{'user_id': i, 'followers': followers_count[i], 'following': following_count[i], 'unread': unread[i],
+          'seq': notification_seq[i]}
+         for i in ids]
+    )
+    tweet = Tweet.__table__
+    counted = sorted(set(likes_count) | set(comments_count))
+    if counted:
+        db.session.execute(
+            update(tweet).where(tweet.c.id == bindparam('tweet_id')).values(
+                likes_count=bindparam('likes'), comments_count=bindparam('comments'),
+                updated_at=tweet.c.updated_at),
+            [{'tweet_id': t, 'likes': likes_count.get(t, 0), 'comments': comments_count.get(t, 0)} for t in counted]
+        )
+    db.session.commit()
+
+    return {
+        'users': users,
+        'follows': len(edges),
+        'max_followers': max(followers_count.values(), default=0),
+        'tweets': len(tweet_rows),
+        'likes': len(like_pairs),
+        'comments': len(comment_rows),
+        'notifications': len(notification_rows)
+    }
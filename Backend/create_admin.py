@@ -1,21 +1,12 @@
-from app import create_app, db
+from app import create_app
 from app.models import User
+from app.services.user_directory import user_directory, DuplicateUserError, InvalidUsernameError
 
 def create_admin_user(username, email, password, nickname=None):
     """Create admin user"""
     app = create_app()
     
     with app.app_context():
-        # Check if username already exists
-        if User.query.filter_by(username=username).first():
-            print(f"Username {username} already exists, skipping creation")
-            return
-        
-        # Check if email already exists
-        if User.query.filter_by(email=email).first():
-            print(f"Email {email} already registered, skipping creation")
-            return
-        
         # Create admin user
         admin = User(
             username=username,
@@ -26,9 +17,18 @@ def create_admin_user(username, email, password, nickname=None):
         )
         admin.set_password(password)
         
-        # Save to database
-        db.session.add(admin)
-        db.session.commit()
+        # Save to database; the unique constraints reject duplicates
+        try:
+            user_directory.register(admin)
+        except DuplicateUserError as e:
+            if e.field == 'email':
+                print(f"Email {email} already registered, skipping creation")
+            else:
+                print(f"Username {username} already exists, skipping creation")
+            return
+        except InvalidUsernameError:
+            print(f"Username {username} cannot contain '@', skipping creation")
+            return
         
         print(f"Admin user {username} created successfully!")
 
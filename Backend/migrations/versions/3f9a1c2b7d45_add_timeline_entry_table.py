@@ -0,0 +1,35 @@
+"""Add timeline_entry table for precomputed home timelines
+
+Revision ID: 3f9a1c2b7d45
+Revises: d64d1ae48792
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d45'
+down_revision = 'd64d1ae48792'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('timeline_entry',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tweet_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tweet_id'], ['tweet.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'tweet_id')
+    )
+    with op.batch_alter_table('timeline_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_timeline_entry_tweet_id', ['tweet_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('timeline_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_timeline_entry_tweet_id')
+
+    op.drop_table('timeline_entry')
@@ -0,0 +1,41 @@
+"""Add notification actor_count and user unread notification counter
+
+Revision ID: 5e8c3a1f9b27
+Revises: c41d7e9a2f58
+Create Date: 2026-10-18 15:22:09.660314
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8c3a1f9b27'
+down_revision = 'c41d7e9a2f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('actor_count', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notification_count', sa.Integer(), server_default='0', nullable=False))
+
+    # 回填现有未读通知数
+    user = sa.table('user', sa.column('id'), sa.column('unread_notification_count'))
+    notification = sa.table('notification', sa.column('user_id'), sa.column('is_read'))
+    op.execute(user.update().values(
+        unread_notification_count=sa.select(sa.func.count()).select_from(notification)
+            .where(notification.c.user_id == user.c.id, notification.c.is_read == sa.false())
+            .scalar_subquery()
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('unread_notification_count')
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_column('actor_count')
@@ -0,0 +1,38 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f9a1c2b7d45
+Create Date: 2026-10-18 11:40:07.918254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f9a1c2b7d45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.create_index('ix_tweet_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_tweet_id_created_at_id', ['tweet_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('followers', schema=None) as batch_op:
+        batch_op.create_index('ix_followers_followed_id_follower_id', ['followed_id', 'follower_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('followers', schema=None) as batch_op:
+        batch_op.drop_index('ix_followers_followed_id_follower_id')
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_tweet_id_created_at_id')
+
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.drop_index('ix_tweet_user_id_created_at_id')
@@ -0,0 +1,26 @@
+"""Add notification(user_id, is_read, created_at) index
+
+Revision ID: a7d2f4c8e1b6
+Revises: 5e8c3a1f9b27
+Create Date: 2026-10-18 16:03:51.127845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2f4c8e1b6'
+down_revision = '5e8c3a1f9b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_id_is_read_created_at')
@@ -0,0 +1,28 @@
+"""Add primary_read_pin table for read-your-writes replica routing
+
+Revision ID: b8e1f6a4c2d9
+Revises: f5a8d3c1e7b2
+Create Date: 2026-10-18 22:05:47.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e1f6a4c2d9'
+down_revision = 'f5a8d3c1e7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('primary_read_pin',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('until', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('primary_read_pin')
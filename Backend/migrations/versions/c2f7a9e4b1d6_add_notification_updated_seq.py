@@ -0,0 +1,51 @@
+"""Add notification updated_seq change marker and user notification_seq
+
+Revision ID: c2f7a9e4b1d6
+Revises: b8e1f6a4c2d9
+Create Date: 2026-10-18 23:12:08.415093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a9e4b1d6'
+down_revision = 'b8e1f6a4c2d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('notification_seq', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_seq', sa.Integer(), nullable=True))
+
+    # 回填：id 全局唯一且随插入递增，可直接作为现有通知的变更序号
+    notification = sa.table('notification', sa.column('user_id'), sa.column('id'), sa.column('updated_seq'))
+    op.execute(notification.update().values(updated_seq=notification.c.id))
+    user = sa.table('user', sa.column('id'), sa.column('notification_seq'))
+    op.execute(user.update().values(
+        notification_seq=sa.select(sa.func.coalesce(sa.func.max(notification.c.updated_seq), 0))
+            .where(notification.c.user_id == user.c.id)
+            .scalar_subquery()
+    ))
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.alter_column('updated_seq', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_index('ix_notification_user_id_is_read_created_at')
+        batch_op.create_index('uq_notification_user_id_updated_seq', ['user_id', 'updated_seq'], unique=True)
+        batch_op.create_index('ix_notification_user_id_is_read_updated_seq', ['user_id', 'is_read', 'updated_seq'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_id_is_read_updated_seq')
+        batch_op.drop_index('uq_notification_user_id_updated_seq')
+        batch_op.create_index('ix_notification_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at'], unique=False)
+        batch_op.drop_column('updated_seq')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('notification_seq')
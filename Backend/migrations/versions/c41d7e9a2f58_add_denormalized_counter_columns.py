@@ -0,0 +1,56 @@
+"""Add denormalized like/comment/follower counter columns
+
+Revision ID: c41d7e9a2f58
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-18 13:05:44.231870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e9a2f58'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('likes_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comments_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('followers_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('following_count', sa.Integer(), server_default='0', nullable=False))
+
+    # 回填现有数据（大表可改用 flask reconcile-counters 分批执行）
+    tweet = sa.table('tweet', sa.column('id'), sa.column('likes_count'), sa.column('comments_count'))
+    user = sa.table('user', sa.column('id'), sa.column('followers_count'), sa.column('following_count'))
+    like = sa.table('like', sa.column('tweet_id'))
+    comment = sa.table('comment', sa.column('tweet_id'))
+    followers = sa.table('followers', sa.column('follower_id'), sa.column('followed_id'))
+
+    op.execute(tweet.update().values(
+        likes_count=sa.select(sa.func.count()).select_from(like)
+            .where(like.c.tweet_id == tweet.c.id).scalar_subquery(),
+        comments_count=sa.select(sa.func.count()).select_from(comment)
+            .where(comment.c.tweet_id == tweet.c.id).scalar_subquery()
+    ))
+    op.execute(user.update().values(
+        followers_count=sa.select(sa.func.count()).select_from(followers)
+            .where(followers.c.followed_id == user.c.id).scalar_subquery(),
+        following_count=sa.select(sa.func.count()).select_from(followers)
+            .where(followers.c.follower_id == user.c.id).scalar_subquery()
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('following_count')
+        batch_op.drop_column('followers_count')
+
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.drop_column('comments_count')
+        batch_op.drop_column('likes_count')
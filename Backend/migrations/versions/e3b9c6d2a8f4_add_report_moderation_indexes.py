@@ -0,0 +1,30 @@
+"""Add report moderation queue indexes
+
+Revision ID: e3b9c6d2a8f4
+Revises: a7d2f4c8e1b6
+Create Date: 2026-10-18 17:12:40.583216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9c6d2a8f4'
+down_revision = 'a7d2f4c8e1b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('report', schema=None) as batch_op:
+        batch_op.create_index('ix_report_status_tweet_id', ['status', 'tweet_id'], unique=False)
+        batch_op.create_index('ix_report_status_comment_id', ['status', 'comment_id'], unique=False)
+        batch_op.create_index('ix_report_status_reported_user_id', ['status', 'reported_user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('report', schema=None) as batch_op:
+        batch_op.drop_index('ix_report_status_reported_user_id')
+        batch_op.drop_index('ix_report_status_comment_id')
+        batch_op.drop_index('ix_report_status_tweet_id')
@@ -0,0 +1,32 @@
+"""Add (updated_at, id) indexes for search index catch-up
+
+Revision ID: f5a8d3c1e7b2
+Revises: e3b9c6d2a8f4
+Create Date: 2026-10-18 21:40:12.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a8d3c1e7b2'
+down_revision = 'e3b9c6d2a8f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.create_index('ix_tweet_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_updated_at_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_updated_at_id')
+
+    with op.batch_alter_table('tweet', schema=None) as batch_op:
+        batch_op.drop_index('ix_tweet_updated_at_id')
@@ -0,0 +1,31 @@
+import pytest
+from config import Config
+from app import create_app, db
+from app.services.follow_graph import follow_graph
+from app.services.user_cache import user_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        SQLALCHEMY_BINDS = {}
+        SQLALCHEMY_REPLICA_URIS = None
+        AVATAR_UPLOAD_DIR = str(tmp_path / 'avatars')
+        SEARCH_INDEX_DIR = str(tmp_path / 'search_index')
+        METRICS_MULTIPROC_DIR = None
+        SLOW_QUERY_LOG_FILE = None
+        # Tests opt in to the background writer, see test_notification_service
+        NOTIFICATION_WRITE_BEHIND = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        # Only the default bind: other tests' apps may have added bind keys to db
+        db.create_all(bind_key=None)
+        # Process-wide caches would otherwise carry ids over from earlier tests
+        follow_graph.clear()
+        user_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
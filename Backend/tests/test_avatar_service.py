@@ -0,0 +1,93 @@
+import io
+import os
+import pytest
+from PIL import Image, ImageOps
+from app import db
+from app.models import User
+from app.services import avatar_service
+from app.services.auth_service import generate_tokens
+
+
+def png(color='red', size=(300, 200)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def auth_headers(app):
+    user = User(username='alice', email='alice@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f"Bearer {generate_tokens(user.id)['access_token']}"}
+
+
+def upload(client, headers, data, name='avatar.png'):
+    return client.post('/api/auth/upload-avatar', headers=headers,
+                       data={'avatar': (io.BytesIO(data), name)}, content_type='multipart/form-data')
+
+
+def stored_files(app):
+    return sorted(os.listdir(app.config['AVATAR_UPLOAD_DIR']))
+
+
+def test_identical_uploads_share_one_file_with_thumbnails(app, auth_headers):
+    client = app.test_client()
+
+    first = upload(client, auth_headers, png())
+    second = upload(client, auth_headers, png())
+
+    assert first.status_code == second.status_code == 200
+    assert first.get_json()['avatar_url'] == second.get_json()['avatar_url']
+    filename = first.get_json()['avatar_url'].rsplit('/', 1)[-1]
+    thumbnails = [avatar_service.thumbnail_name(filename, size) for size in app.config['AVATAR_THUMBNAIL_SIZES']]
+    assert stored_files(app) == sorted([filename] + thumbnails)
+    with Image.open(os.path.join(app.config['AVATAR_UPLOAD_DIR'], thumbnails[0])) as thumb:
+        assert thumb.size == (48, 48)
+
+
+@pytest.mark.parametrize('limit', ['AVATAR_MAX_BYTES', 'MAX_CONTENT_LENGTH'])
+def test_oversized_uploads_get_413(app, auth_headers, limit):
+    app.config[limit] = 1024
+    response = upload(app.test_client(), auth_headers, png(size=(600, 600)) + os.urandom(4096))
+
+    assert response.status_code == 413
+    assert db.session.scalar(db.select(User.avatar)) == 'default_avatar.jpg'
+
+
+def test_failed_thumbnail_leaves_no_files(app, auth_headers, monkeypatch):
+    fit = ImageOps.fit
+    calls = []
+
+    def fail_on_second_size(image, size, *args, **kwargs):
+        calls.append(size)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return fit(image, size, *args, **kwargs)
+
+    monkeypatch.setattr(ImageOps, 'fit', fail_on_second_size)
+    response = upload(app.test_client(), auth_headers, png())
+
+    assert response.status_code == 500
+    assert stored_files(app) == []
+
+
+@pytest.mark.parametrize('mode', [None, 'x-accel', 'x-sendfile'])
+def test_avatars_revalidate_with_304(app, auth_headers, mode):
+    app.config['AVATAR_SENDFILE_MODE'] = mode
+    client = app.test_client()
+    url = upload(client, auth_headers, png()).get_json()['avatar_url']
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    etag = response.headers['ETag']
+    offload = {'x-accel': 'X-Accel-Redirect', 'x-sendfile': 'X-Sendfile'}.get(mode)
+    if offload:
+        assert offload in response.headers
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    if offload:
+        assert offload not in response.headers
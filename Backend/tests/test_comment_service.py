@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import User, Tweet, Comment
+from app.services.auth_service import generate_tokens
+from app.services.comment_service import get_thread, get_previews
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def tweets(app):
+    author = User(username='author', email='author@example.com', password_hash='x')
+    db.session.add(author)
+    db.session.flush()
+    tweets = [Tweet(content=f"tweet {i}", user_id=author.id) for i in range(3)]
+    db.session.add_all(tweets)
+    db.session.flush()
+    # Five comments on the first tweet, two sharing a timestamp; one on the second
+    for i, offset in enumerate([0, 1, 1, 2, 3]):
+        db.session.add(Comment(content=f"c{i}", user_id=author.id, tweet_id=tweets[0].id,
+                               created_at=START + timedelta(minutes=offset)))
+    db.session.add(Comment(content='other', user_id=author.id, tweet_id=tweets[1].id, created_at=START))
+    db.session.commit()
+    return tweets
+
+
+def test_thread_pages_cover_every_comment_once(tweets):
+    seen, cursor = [], None
+    while True:
+        comments, page = get_thread(tweets[0].id, limit=2, cursor=cursor)
+        seen.extend(c['content'] for c in comments)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == ['c0', 'c1', 'c2', 'c3', 'c4']
+    assert comments[-1]['author']['username'] == 'author'
+
+
+def test_previews_take_the_first_comments_of_each_tweet(tweets):
+    previews = get_previews([t.id for t in tweets], per_tweet=2)
+
+    assert [c['content'] for c in previews[tweets[0].id]] == ['c0', 'c1']
+    assert [c['content'] for c in previews[tweets[1].id]] == ['other']
+    assert previews[tweets[2].id] == []
+    assert get_previews([], per_tweet=2) == {}
+
+
+def test_comments_endpoint_pages_and_rejects_bad_cursors(app, tweets):
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {generate_tokens(tweets[0].user_id)['access_token']}"}
+
+    body = client.get(f"/api/tweets/{tweets[0].id}/comments?limit=3", headers=headers).get_json()
+    assert [c['content'] for c in body['comments']] == ['c0', 'c1', 'c2']
+    assert body['comment_count'] == 5
+
+    body = client.get(f"/api/tweets/{tweets[0].id}/comments?limit=3&cursor={body['next_cursor']}",
+                      headers=headers).get_json()
+    assert [c['content'] for c in body['comments']] == ['c3', 'c4']
+    assert body['next_cursor'] is None
+
+    response = client.get(f"/api/tweets/{tweets[0].id}/comments?cursor=garbage", headers=headers)
+    assert response.status_code == 400
+    assert client.get('/api/tweets/999/comments', headers=headers).status_code == 404
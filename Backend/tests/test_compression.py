@@ -0,0 +1,50 @@
+import gzip
+import pytest
+from app import db
+from app.models import User
+from app.services.auth_service import generate_tokens
+
+
+@pytest.fixture
+def client_and_headers(app):
+    user = User(username='reader', email='reader@example.com', password_hash='x', bio='b' * 200)
+    db.session.add(user)
+    db.session.commit()
+    return app.test_client(), {'Authorization': f"Bearer {generate_tokens(user.id)['access_token']}"}
+
+
+def test_json_is_gzipped_when_accepted_and_large_enough(app, client_and_headers):
+    client, headers = client_and_headers
+    app.config['COMPRESS_MIN_SIZE'] = 100
+
+    plain = client.get('/api/auth/me', headers=headers)
+    zipped = client.get('/api/auth/me', headers={**headers, 'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+
+    app.config['COMPRESS_MIN_SIZE'] = 10 ** 6
+    small = client.get('/api/auth/me', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_conditional_get_answers_304(app, client_and_headers):
+    client, headers = client_and_headers
+    app.config['COMPRESS_MIN_SIZE'] = 100
+
+    first = client.get('/api/auth/me', headers=headers)
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert 'private' in first.headers['Cache-Control'] and 'no-cache' in first.headers['Cache-Control']
+    assert 'Authorization' in first.headers['Vary']
+    # Weak, so the same tag covers the gzip encoding of the body
+    assert client.get('/api/auth/me', headers={**headers, 'Accept-Encoding': 'gzip'}).headers['ETag'] == etag
+
+    repeat = client.get('/api/auth/me', headers={**headers, 'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+    assert repeat.status_code == 304
+    assert repeat.get_data() == b''
+
+    client.put('/api/auth/update-profile', json={'bio': 'changed'}, headers=headers)
+    assert client.get('/api/auth/me', headers={**headers, 'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,76 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import update
+from app import db
+from app.models import User, Tweet, Like, Comment
+from app.services.counter_service import reconcile_tweet_counters, reconcile_user_counters
+
+EPOCH = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def users(app):
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash='x', updated_at=EPOCH)
+             for i in range(3)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def tweet_by(user):
+    tweet = Tweet(content='hello', user_id=user.id, updated_at=EPOCH)
+    db.session.add(tweet)
+    db.session.commit()
+    return tweet
+
+
+def test_likes_and_comments_keep_tweet_counters_and_updated_at(users):
+    tweet = tweet_by(users[0])
+
+    db.session.add_all([Like(user_id=users[1].id, tweet_id=tweet.id), Like(user_id=users[2].id, tweet_id=tweet.id)])
+    db.session.add(Comment(content='hi', user_id=users[1].id, tweet_id=tweet.id))
+    db.session.commit()
+    db.session.delete(Like.query.filter_by(user_id=users[2].id).one())
+    db.session.commit()
+
+    db.session.refresh(tweet)
+    assert (tweet.likes_count, tweet.comments_count) == (1, 1)
+    assert tweet.updated_at == EPOCH
+
+
+def test_follow_counters_keep_updated_at(users):
+    follower, followed, _ = users
+
+    assert follower.follow(followed)
+    assert not follower.follow(followed)
+    db.session.commit()
+    db.session.refresh(follower)
+    db.session.refresh(followed)
+    assert (follower.following_count, followed.followers_count) == (1, 1)
+    assert follower.updated_at == followed.updated_at == EPOCH
+
+    assert follower.unfollow(followed)
+    db.session.commit()
+    db.session.refresh(followed)
+    assert followed.followers_count == 0
+
+
+def test_reconcile_fixes_only_drifted_rows(users):
+    tweets = [tweet_by(users[0]) for _ in range(3)]
+    db.session.add(Like(user_id=users[1].id, tweet_id=tweets[0].id))
+    users[1].follow(users[0])
+    db.session.commit()
+    db.session.execute(update(Tweet).where(Tweet.id == tweets[0].id).values(likes_count=7, updated_at=Tweet.updated_at))
+    db.session.execute(update(Tweet).where(Tweet.id == tweets[2].id).values(comments_count=3, updated_at=Tweet.updated_at))
+    db.session.execute(update(User).where(User.id == users[0].id).values(followers_count=0, updated_at=User.updated_at))
+    db.session.commit()
+
+    assert reconcile_tweet_counters(chunk_size=2) == 2
+    assert reconcile_user_counters(chunk_size=2) == 1
+    assert reconcile_tweet_counters() == reconcile_user_counters() == 0
+
+    db.session.expire_all()
+    assert [(t.likes_count, t.comments_count) for t in Tweet.query.order_by(Tweet.id)] == [(1, 0), (0, 0), (0, 0)]
+    assert db.session.get(User, users[0].id).followers_count == 1
+    assert all(t.updated_at == EPOCH for t in Tweet.query)
+    assert db.session.get(User, users[0].id).updated_at == EPOCH
@@ -0,0 +1,158 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import event, update
+from config import Config
+from app import create_app, db
+from app.models import User
+from app.services.user_cache import user_cache
+from app.services.user_directory import user_directory
+from app.utils.db_routing import PRIMARY_UNTIL_HEADER, pin_cache
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    class ReplicaConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        SQLALCHEMY_BINDS = {}
+        SQLALCHEMY_REPLICA_URIS = f"sqlite:///{tmp_path / 'replica.db'}"
+        AVATAR_UPLOAD_DIR = str(tmp_path / 'avatars')
+        SEARCH_INDEX_DIR = str(tmp_path / 'search_index')
+        METRICS_MULTIPROC_DIR = None
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+        PASSWORD_HASH_WORKERS = 0
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        # The replica has the schema but never receives the writes: maximal lag
+        db.metadata.create_all(db.engines['replica_0'])
+        user_cache.clear()
+        user_directory.clear()
+        pin_cache.clear()
+        yield app
+        db.session.remove()
+        user_cache.clear()
+        user_directory.clear()
+        pin_cache.clear()
+
+
+def register_and_login(client, pin_headers=None):
+    response = client.post('/api/auth/register', json={
+        'username': 'newuser', 'email': 'new@example.com', 'password': 'Password123!'
+    })
+    assert response.status_code == 201
+    if pin_headers is not None:
+        pin_headers[PRIMARY_UNTIL_HEADER] = response.headers[PRIMARY_UNTIL_HEADER]
+    response = client.post('/api/auth/login', json={'username': 'newuser', 'password': 'Password123!'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+def test_reads_own_registration_without_cookies(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    headers = register_and_login(client)
+
+    response = client.get('/api/auth/me', headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['user']['username'] == 'newuser'
+
+
+def expire_pins():
+    pin = db.metadata.tables['primary_read_pin']
+    with db.engine.begin() as connection:
+        connection.execute(update(pin).values(until=0))
+    # As seen by a worker that has not looked the user up yet
+    pin_cache.clear()
+
+
+def count_pin_lookups(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'primary_read_pin' in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def users_visible_to(app, headers):
+    with app.test_request_context('/api/auth/me', method='GET', headers=headers):
+        app.preprocess_request()
+        try:
+            return db.session.scalars(db.select(User.username)).all()
+        finally:
+            db.session.remove()
+
+
+def test_reads_leave_the_primary_when_the_pin_expires(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    headers = register_and_login(client)
+    assert users_visible_to(replica_app, headers) == ['newuser']
+
+    expire_pins()
+
+    # The row exists only on the primary
+    assert users_visible_to(replica_app, headers) == []
+
+
+def test_cache_refills_from_the_primary(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    headers = register_and_login(client)
+    user_id = db.session.scalar(db.select(User.id))
+    expire_pins()
+    # Seed the replica with an outdated copy of the user
+    user = db.session.get(User, user_id)
+    with db.engines['replica_0'].begin() as connection:
+        connection.execute(User.__table__.insert().values(
+            id=user.id, username=user.username, email=user.email, password_hash=user.password_hash,
+            nickname='stale', created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+        ))
+    db.session.remove()
+    user_cache.clear()
+
+    # An unpinned read-only request fills the cache, which the pinned
+    # writer would then be served from
+    with replica_app.test_request_context('/api/auth/me', method='GET', headers=headers):
+        replica_app.preprocess_request()
+        assert user_cache.get(user_id).nickname == 'newuser'
+        db.session.remove()
+
+
+def test_echoed_deadline_pins_without_a_lookup(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    pin_headers = {}
+    headers = register_and_login(client, pin_headers)
+    expire_pins()
+
+    statements, stop = count_pin_lookups(db.engine)
+    try:
+        assert users_visible_to(replica_app, {**headers, **pin_headers}) == ['newuser']
+    finally:
+        stop()
+    assert statements == []
+
+
+def test_forged_deadline_is_ignored(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    headers = register_and_login(client)
+    expire_pins()
+
+    forged = {PRIMARY_UNTIL_HEADER: '[[1],9999999999].forged'}
+    assert users_visible_to(replica_app, {**headers, **forged}) == []
+
+
+def test_pin_table_is_read_once_per_cache_window(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    headers = register_and_login(client)
+    expire_pins()
+
+    statements, stop = count_pin_lookups(db.engine)
+    try:
+        for _ in range(3):
+            assert users_visible_to(replica_app, headers) == []
+    finally:
+        stop()
+    assert len(statements) == 1
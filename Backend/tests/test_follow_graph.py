@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import User
+from app.services.follow_graph import follow_graph, are_following
+
+
+@pytest.fixture
+def users(app):
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash='x') for i in range(4)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+@pytest.fixture
+def statements(app):
+    seen = []
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_follow_checks_are_answered_from_memory(users, statements):
+    me, a, b, c = users
+    me.follow(c)
+    me.follow(a)
+    db.session.commit()
+
+    me_id, a_id, b_id, c_id = (user.id for user in users)
+
+    assert list(follow_graph.following_ids(me_id)) == sorted([a_id, c_id])
+    statements.clear()
+    assert are_following(me_id, [a_id, b_id, c_id]) == {a_id: True, b_id: False, c_id: True}
+    assert follow_graph.is_following(me_id, a_id) and not follow_graph.is_following(me_id, b_id)
+    assert statements == []
+
+
+def test_follow_and_unfollow_invalidate_the_entry(users):
+    me, a, b, _ = users
+    me.follow(a)
+    db.session.commit()
+    assert not me.is_following(b)
+
+    me.follow(b)
+    db.session.commit()
+    assert me.is_following(b)
+
+    me.unfollow(a)
+    db.session.commit()
+    assert not me.is_following(a)
+
+
+def test_rollback_drops_entries_read_inside_the_transaction(users):
+    me, a, _, _ = users
+    me.follow(a)
+    # Read inside the transaction caches the uncommitted follow
+    assert me.is_following(a)
+    db.session.rollback()
+    assert not follow_graph.is_following(me.id, a.id)
+
+
+def test_entries_expire_and_are_evicted(app, users, statements):
+    me_id, a_id, b_id, _ = (user.id for user in users)
+    app.config['FOLLOW_GRAPH_MAX_USERS'] = 2
+    for user_id in (me_id, a_id, b_id):
+        follow_graph.following_ids(user_id)
+
+    statements.clear()
+    follow_graph.following_ids(b_id)
+    assert statements == []
+    # Least recently used, evicted when b was loaded
+    follow_graph.following_ids(me_id)
+    assert len(statements) == 1
+
+    app.config['FOLLOW_GRAPH_TTL'] = 0
+    statements.clear()
+    follow_graph.following_ids(me_id)
+    assert len(statements) == 1
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.services.health_service import database_probe
+from app.utils.db_pool import TimedQueuePool, engine_options, pool_status
+
+
+def test_liveness_does_not_touch_the_database(app):
+    assert app.test_client().get('/health/live').get_json() == {"status": "success"}
+
+
+def test_readiness_probe_is_cached(app):
+    client = app.test_client()
+    app.config['HEALTH_CHECK_CACHE_SECONDS'] = 0
+    first = client.get('/health/ready')
+    assert first.status_code == 200
+    assert first.get_json()['database']['ok'] and not first.get_json()['database']['cached']
+
+    app.config['HEALTH_CHECK_CACHE_SECONDS'] = 60
+    second = client.get('/health/ready').get_json()
+    assert second['database']['cached']
+    assert second['database']['checked_at'] == first.get_json()['database']['checked_at']
+    assert second['pool']['pool_class']
+
+
+def test_failed_probe_answers_503(app, monkeypatch):
+    app.config['HEALTH_CHECK_CACHE_SECONDS'] = 0
+    monkeypatch.setattr(database_probe, '_probe', lambda: {"ok": False, "latency_ms": 0.0, "checked_at": None})
+
+    response = app.test_client().get('/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'error'
+
+
+def test_engine_options_leave_sqlite_alone():
+    config = {'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'DB_POOL_SIZE': 3, 'DB_MAX_OVERFLOW': 1,
+              'DB_POOL_TIMEOUT': 2, 'DB_POOL_RECYCLE': 60, 'DB_POOL_PRE_PING': True}
+    assert engine_options(config) == {}
+
+    options = engine_options(dict(config, SQLALCHEMY_DATABASE_URI='mysql+pymysql://u:p@db/echo'))
+    assert options['poolclass'] is TimedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_timeout']) == (3, 1, 2)
+
+
+def test_timed_pool_counts_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    try:
+        with engine.connect() as held:
+            held.execute(text('SELECT 1'))
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+            status = pool_status(engine)
+            assert (status['checked_out'], status['overflow']) == (1, 0)
+        with engine.connect():
+            pass
+
+        status = pool_status(engine)
+        assert (status['checkouts'], status['timeouts']) == (2, 1)
+        assert status['checked_out'] == 0
+        assert status['max_wait_ms'] >= status['avg_wait_ms'] >= 0
+    finally:
+        engine.dispose()
@@ -0,0 +1,70 @@
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet, Like
+from app.services import inbox_service
+
+
+def seed(likers=3, tweets=3):
+    password_hash = generate_password_hash('password')
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash=password_hash)
+             for i in range(likers + 1)]
+    db.session.add_all(users)
+    db.session.flush()
+    author, likers = users[0], users[1:]
+    rows = [Tweet(content=f"tweet {i}", user_id=author.id) for i in range(tweets)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return author, likers, rows
+
+
+def like(user, tweet):
+    db.session.add(Like(user_id=user.id, tweet_id=tweet.id))
+    db.session.commit()
+
+
+def test_delta_sync_returns_coalesced_notifications(app):
+    author, likers, tweets = seed()
+    for tweet in tweets:
+        like(likers[0], tweet)
+
+    synced = inbox_service.get_since(author.id, 0)
+    assert [n.tweet_id for n in synced] == [t.id for t in tweets]
+    latest = synced[-1].updated_seq
+
+    # Folds into the first tweet's unread row, which keeps its id
+    like(likers[1], tweets[0])
+
+    changed = inbox_service.get_since(author.id, latest)
+    assert [(n.id, n.actor_count) for n in changed] == [(synced[0].id, 2)]
+    assert changed[0].updated_seq > latest
+
+
+def test_paging_neither_skips_nor_repeats_coalesced_rows(app):
+    author, likers, tweets = seed(tweets=4)
+    for tweet in tweets:
+        like(likers[0], tweet)
+
+    first = inbox_service.get_inbox(author.id, limit=2)
+    assert [n.tweet_id for n in first.items] == [tweets[3].id, tweets[2].id]
+
+    # A row on the next page moves to the top while the client is paging
+    like(likers[1], tweets[1])
+    second = inbox_service.get_inbox(author.id, limit=2, cursor=first.next_cursor)
+    assert [n.tweet_id for n in second.items] == [tweets[0].id]
+
+    top = inbox_service.get_inbox(author.id, limit=1)
+    assert top.items[0].tweet_id == tweets[1].id
+
+
+def test_mark_read_before_cursor(app):
+    author, likers, tweets = seed()
+    for tweet in tweets:
+        like(likers[0], tweet)
+
+    page = inbox_service.get_inbox(author.id, limit=1)
+    marked = inbox_service.mark_read(author.id, before_cursor=page.next_cursor)
+    db.session.commit()
+
+    assert marked == 3
+    assert db.session.get(User, author.id).unread_notification_count == 0
+    assert inbox_service.get_inbox(author.id, unread_only=True).items == []
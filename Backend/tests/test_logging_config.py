@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+import sys
+from flask import g
+from app.utils.logging_config import JsonFormatter, SamplingFilter, RequestQueueHandler, parse_sample_rates
+from app.utils.metrics import metrics
+
+
+def make_record(name='app.test', level=logging.INFO, msg='hello %s', args=('world',), exc_info=None, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extras_and_exception():
+    try:
+        raise RuntimeError('boom')
+    except RuntimeError:
+        handler = RequestQueueHandler(queue.Queue())
+        record = handler.prepare(make_record(level=logging.ERROR, exc_info=sys.exc_info(), user_id=7))
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert (entry['level'], entry['logger'], entry['message']) == ('ERROR', 'app.test', 'hello world')
+    assert entry['request_id'] is None
+    assert entry['user_id'] == 7
+    assert 'RuntimeError: boom' in entry['exception']
+    assert record.exc_info is None
+
+
+def test_sampling_uses_longest_prefix_and_keeps_warnings():
+    sampler = SamplingFilter(default_rate=1.0, rates=parse_sample_rates(' app.models=0 , app.models.user=1,'))
+
+    assert sampler.filter(make_record('app.models.tweet')) is False
+    assert sampler.filter(make_record('app.models.user.audit')) is True
+    assert sampler.filter(make_record('app.modelsx')) is True
+    assert sampler.filter(make_record('app.models.tweet', level=logging.WARNING)) is True
+
+    half = SamplingFilter(default_rate=0.5)
+    kept = [r for r in (make_record() for _ in range(200)) if half.filter(r)]
+    assert 0 < len(kept) < 200
+    assert all(r.sample_rate == 0.5 for r in kept)
+
+
+def test_full_queue_drops_and_counts(app):
+    handler = RequestQueueHandler(queue.Queue(maxsize=1))
+    before = metrics.collect()['echo_log_records_dropped_total'].get((), 0)
+
+    with app.test_request_context():
+        g.request_id = 'abc'
+        handler.handle(make_record())
+        handler.handle(make_record())
+
+    assert handler.queue.get_nowait().request_id == 'abc'
+    assert metrics.collect()['echo_log_records_dropped_total'][()] == before + 1
+
+
+def test_request_id_is_propagated_or_generated(app):
+    client = app.test_client()
+
+    assert client.get('/health/live', headers={'X-Request-ID': 'upstream-1'}).headers['X-Request-ID'] == 'upstream-1'
+    generated = client.get('/health/live').headers['X-Request-ID']
+    assert len(generated) == 32
+    assert len(client.get('/health/live', headers={'X-Request-ID': 'x' * 100}).headers['X-Request-ID']) == 64
@@ -0,0 +1,65 @@
+import json
+import pytest
+from app.utils.metrics import MetricsRegistry, metrics
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests', ('status',))
+    registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1))
+    return registry
+
+
+def test_render_prometheus_text(registry):
+    registry.inc('requests_total', status=200)
+    registry.inc('requests_total', 2, status=200)
+    registry.observe('latency_seconds', 0.05, route='a"b')
+    registry.observe('latency_seconds', 0.5, route='a"b')
+    registry.observe('latency_seconds', 5, route='a"b')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{status="200"} 3' in lines
+    assert 'latency_seconds_bucket{route="a\\"b",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="a\\"b",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="a\\"b",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="a\\"b"} 5.55' in lines
+    assert 'latency_seconds_count{route="a\\"b"} 3' in lines
+
+    with pytest.raises(ValueError):
+        registry.inc('requests_total')
+
+
+def test_collect_sums_every_worker_file(registry, tmp_path):
+    registry.inc('requests_total', status=200)
+    registry.observe('latency_seconds', 0.5, route='a')
+    registry.configure(str(tmp_path))
+    with open(tmp_path / 'worker-1.json', 'w') as f:
+        json.dump({
+            'requests_total': [[['200'], 4], [['500'], 1]],
+            'latency_seconds': [[['a'], [1, 0, 0, 0.05, 1]]],
+            'retired_metric': [[[], 7]]
+        }, f)
+    # A file mid-replace is skipped instead of failing the scrape
+    (tmp_path / 'worker-2.json').write_text('{')
+
+    collected = registry.collect()
+    assert collected['requests_total'] == {('200',): 5, ('500',): 1}
+    assert collected['latency_seconds'] == {('a',): [1, 1, 0, 0.55, 2]}
+    assert 'retired_metric' not in collected
+
+
+def test_requests_are_recorded_and_exposed(app):
+    client = app.test_client()
+    before = metrics.collect()['echo_http_requests_total'].get(('GET', 'main.liveness', '200'), 0)
+
+    client.get('/health/live')
+    client.get('/no-such-page')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert f'echo_http_requests_total{{method="GET",endpoint="main.liveness",status="200"}} {before + 1}' in body
+    assert 'endpoint="unmatched",status="404"' in body
+
+    app.config['METRICS_ENABLED'] = False
+    assert client.get('/metrics').status_code == 404
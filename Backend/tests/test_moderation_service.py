@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+import pytest
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet, Report, ReportType
+from app.services import moderation_service
+from app.utils.pagination import InvalidCursor
+
+
+def seed():
+    password_hash = generate_password_hash('password')
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash=password_hash)
+             for i in range(6)]
+    db.session.add_all(users)
+    db.session.flush()
+    tweets = [Tweet(content=f"tweet {i}", user_id=users[0].id) for i in range(4)]
+    db.session.add_all(tweets)
+    db.session.flush()
+    now = datetime.utcnow()
+
+    def report(reporter, type, hours_ago, **target):
+        db.session.add(Report(reporter_id=reporter.id, type=type, created_at=now - timedelta(hours=hours_ago), **target))
+
+    # Many severe reports, but two days old
+    for reporter in users[1:5]:
+        report(reporter, ReportType.VIOLENCE, 48, tweet_id=tweets[0].id)
+    # One fresh spam report
+    report(users[1], ReportType.SPAM, 0, tweet_id=tweets[1].id)
+    # Fresh hate speech from two accounts, one of them reporting twice
+    report(users[2], ReportType.HATE_SPEECH, 1, tweet_id=tweets[2].id)
+    report(users[2], ReportType.HATE_SPEECH, 1, tweet_id=tweets[2].id)
+    report(users[3], ReportType.HATE_SPEECH, 2, tweet_id=tweets[2].id)
+    # A reported user and an already resolved report
+    report(users[4], ReportType.SPAM, 5, reported_user_id=users[5].id)
+    db.session.add(Report(reporter_id=users[1].id, type=ReportType.VIOLENCE, status='resolved', tweet_id=tweets[3].id))
+    db.session.commit()
+    return users, tweets
+
+
+def test_queue_is_ranked_by_score(app):
+    users, tweets = seed()
+
+    page, total = moderation_service.get_queue(limit=10)
+
+    assert total == 4
+    assert [(i["target_type"], i["target_id"]) for i in page.items] == [
+        ('tweet', tweets[2].id), ('tweet', tweets[0].id), ('tweet', tweets[1].id), ('user', users[5].id)
+    ]
+    scores = [i["score"] for i in page.items]
+    assert scores == sorted(scores, reverse=True)
+    top = page.items[0]
+    assert (top["report_count"], top["reporter_count"], top["types"]) == (3, 2, {ReportType.HATE_SPEECH: 2})
+    assert top["target"]["content"] == 'tweet 2'
+
+
+def test_queue_pages_with_a_cursor(app):
+    seed()
+    everything, _ = moderation_service.get_queue(limit=10)
+
+    seen = []
+    page, total = moderation_service.get_queue(limit=3)
+    seen += page.items
+    page, total = moderation_service.get_queue(limit=3, cursor=page.next_cursor)
+    seen += page.items
+
+    assert total is None
+    assert page.next_cursor is None
+    assert [(i["target_type"], i["target_id"]) for i in seen] == \
+        [(i["target_type"], i["target_id"]) for i in everything.items]
+    with pytest.raises(InvalidCursor):
+        moderation_service.get_queue(cursor='not-a-cursor')
+
+
+def test_resolve_removes_targets_from_the_queue(app):
+    users, tweets = seed()
+
+    updated = moderation_service.resolve([('tweet', tweets[2].id), ('user', users[5].id)])
+    db.session.commit()
+
+    assert updated == 4
+    page, total = moderation_service.get_queue()
+    assert total == 2
+    assert {i["target_id"] for i in page.items} == {tweets[0].id, tweets[1].id}
+    with pytest.raises(ValueError):
+        moderation_service.resolve([('tweet', tweets[0].id)], status='deleted')
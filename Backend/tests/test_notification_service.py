@@ -0,0 +1,107 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet, Like, Comment, Notification, NotificationType
+from app.services import notification_service
+from app.services.notification_service import NotificationWriter
+
+
+@pytest.fixture
+def writer(app, monkeypatch):
+    """
+    A fresh write-behind writer without its background thread; tests flush it
+    """
+    app.config['NOTIFICATION_WRITE_BEHIND'] = True
+    writer = NotificationWriter()
+    monkeypatch.setattr(writer, '_start', lambda app: setattr(writer, '_app', app))
+    monkeypatch.setattr(notification_service, 'notification_writer', writer)
+    return writer
+
+
+def seed_users(count):
+    password_hash = generate_password_hash('password')
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash=password_hash)
+             for i in range(count)]
+    db.session.add_all(users)
+    db.session.flush()
+    return users
+
+
+def unread(user_id):
+    return db.session.scalar(db.select(User.unread_notification_count).where(User.id == user_id))
+
+
+def test_likes_are_buffered_until_flushed_and_coalesced(writer):
+    author, *likers = seed_users(4)
+    tweet = Tweet(content='hello', user_id=author.id)
+    db.session.add(tweet)
+    db.session.commit()
+
+    db.session.add_all(Like(user_id=liker.id, tweet_id=tweet.id) for liker in likers)
+    db.session.commit()
+
+    assert len(writer._pending) == 3
+    assert Notification.query.count() == 0
+
+    writer.flush()
+
+    notification = Notification.query.one()
+    assert (notification.user_id, notification.type, notification.tweet_id) == (author.id, NotificationType.LIKE, tweet.id)
+    assert notification.actor_count == 3
+    assert notification.sender_id == likers[-1].id
+    assert not notification.is_read
+    assert unread(author.id) == 1
+
+
+def test_follow_and_comment_notify_the_author(writer):
+    author, reader, other = seed_users(3)
+    tweet = Tweet(content='hello', user_id=author.id)
+    db.session.add(tweet)
+    db.session.commit()
+
+    reader.follow(author)
+    comment = Comment(content='hi', user_id=reader.id, tweet_id=tweet.id)
+    db.session.add(comment)
+    db.session.commit()
+    writer.flush()
+
+    rows = {n.type: n for n in Notification.query.filter_by(user_id=author.id)}
+    assert set(rows) == {NotificationType.FOLLOW, NotificationType.COMMENT}
+    assert rows[NotificationType.COMMENT].comment_id == comment.id
+    assert unread(author.id) == 2
+
+    # A later event folds into the unread row instead of adding one
+    db.session.add(Like(user_id=other.id, tweet_id=tweet.id))
+    db.session.add(Comment(content='me too', user_id=other.id, tweet_id=tweet.id))
+    db.session.commit()
+    writer.flush()
+
+    assert Notification.query.filter_by(type=NotificationType.COMMENT).one().actor_count == 2
+    assert unread(author.id) == 3
+
+
+def test_rolled_back_events_are_dropped(writer):
+    author, liker = seed_users(2)
+    tweet = Tweet(content='hello', user_id=author.id)
+    db.session.add(tweet)
+    db.session.commit()
+
+    db.session.add(Like(user_id=liker.id, tweet_id=tweet.id))
+    db.session.flush()
+    db.session.rollback()
+
+    assert writer._pending == []
+
+
+def test_synchronous_mode_writes_in_the_transaction(app):
+    author, liker = seed_users(2)
+    tweet = Tweet(content='hello', user_id=author.id)
+    db.session.add(tweet)
+    db.session.flush()
+
+    db.session.add(Like(user_id=liker.id, tweet_id=tweet.id))
+    db.session.add(Like(user_id=author.id, tweet_id=tweet.id))
+    db.session.commit()
+
+    assert Notification.query.one().sender_id == liker.id
+    assert unread(author.id) == 1
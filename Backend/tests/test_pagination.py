@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import User, Tweet
+from app.utils.pagination import keyset_paginate, encode_cursor, decode_cursor, InvalidCursor
+
+KEYS = (Tweet.created_at, Tweet.id)
+
+
+@pytest.fixture
+def author(app):
+    user = User(username='author', email='author@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    # Pairs of tweets share a timestamp, so the id must break ties
+    db.session.add_all(
+        Tweet(content=f"tweet {i}", user_id=user.id, created_at=start + timedelta(minutes=i // 2))
+        for i in range(7)
+    )
+    db.session.commit()
+    return user
+
+
+def contents(page):
+    return [tweet.content for tweet in page.items]
+
+
+def test_walks_forward_and_back_without_gaps(author):
+    query = author.tweets
+
+    first = keyset_paginate(query, KEYS, limit=3)
+    second = keyset_paginate(query, KEYS, limit=3, cursor=first.next_cursor)
+    third = keyset_paginate(query, KEYS, limit=3, cursor=second.next_cursor)
+
+    assert contents(first) + contents(second) + contents(third) == [f"tweet {i}" for i in range(6, -1, -1)]
+    assert first.prev_cursor is None
+    assert third.next_cursor is None
+    assert contents(keyset_paginate(query, KEYS, limit=3, cursor=second.prev_cursor)) == contents(first)
+    assert contents(keyset_paginate(query, KEYS, limit=3, cursor=third.prev_cursor)) == contents(second)
+
+
+def test_ascending_order(author):
+    page = keyset_paginate(Tweet.query, KEYS, limit=4, descending=False)
+    rest = keyset_paginate(Tweet.query, KEYS, limit=4, cursor=page.next_cursor, descending=False)
+
+    assert contents(page) + contents(rest) == [f"tweet {i}" for i in range(7)]
+
+
+def test_cursors_round_trip_and_reject_garbage():
+    values = [datetime(2024, 1, 1, 12, 30), 42]
+    assert decode_cursor(encode_cursor(values, 'prev'), 2) == ('prev', values)
+
+    for cursor in ('garbage', encode_cursor([1], 'next'), encode_cursor([1, 2], 'sideways')):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, 2)
@@ -0,0 +1,91 @@
+import json
+import pytest
+from werkzeug.security import generate_password_hash, check_password_hash
+from app import db
+from app.models import User
+from app.services.password_audit import audit_hash, run_audit
+
+METHOD = 'pbkdf2:sha256:1000'
+WEAK = ('Password123!', 'Test{id}Password!')
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def users(app):
+    app.config['PASSWORD_HASH_METHOD'] = METHOD
+    hashes = [
+        generate_password_hash('Strong-one', METHOD),
+        '',
+        'not-a-hash',
+        generate_password_hash('Password123!', METHOD),
+        generate_password_hash('Strong-two', 'pbkdf2:sha256:500'),
+    ]
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash=h) for i, h in enumerate(hashes)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def read_report(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_audit_hash_classifies_hashes():
+    assert audit_hash((1, None, METHOD, WEAK)) == (1, ['missing'])
+    assert audit_hash((1, 'plain', METHOD, WEAK)) == (1, ['malformed'])
+    assert audit_hash((1, 'md5$salt$abcdef', METHOD, WEAK)) == (1, ['unsupported'])
+    assert audit_hash((7, generate_password_hash('Test7Password!', METHOD), METHOD, WEAK)) == (7, ['weak'])
+    assert audit_hash((1, generate_password_hash('x', 'pbkdf2:sha256:500'), METHOD, WEAK)) == (1, ['outdated'])
+    assert audit_hash((1, generate_password_hash('x', METHOD), METHOD, WEAK)) == (1, [])
+
+
+def test_fix_resets_broken_accounts_with_distinct_salts(users, tmp_path):
+    counts = run_audit(str(tmp_path / 'report.jsonl'), str(tmp_path / 'checkpoint.json'),
+                       chunk_size=2, workers=1, weak_passwords=WEAK, temporary_password='Temp-pass1')
+
+    assert counts == {'scanned': 5, 'fixed': 2, 'missing': 1, 'malformed': 1, 'weak': 1, 'outdated': 1}
+    report = read_report(tmp_path / 'report.jsonl')
+    assert [(line['username'], line['issues'], line['fixed']) for line in report] == [
+        ('user1', ['missing'], True),
+        ('user2', ['malformed'], True),
+        ('user3', ['weak'], False),
+        ('user4', ['outdated'], False),
+    ]
+    db.session.expire_all()
+    reset = [db.session.get(User, users[i].id).password_hash for i in (1, 2)]
+    assert all(check_password_hash(h, 'Temp-pass1') for h in reset)
+    assert reset[0] != reset[1]
+
+
+def test_interrupted_run_resumes_without_duplicate_lines(users, tmp_path):
+    report_path, checkpoint_path = str(tmp_path / 'report.jsonl'), str(tmp_path / 'checkpoint.json')
+
+    def stop_after_first_chunk(checkpoint):
+        raise Interrupted()
+    with pytest.raises(Interrupted):
+        run_audit(report_path, checkpoint_path, chunk_size=2, workers=1, weak_passwords=WEAK,
+                  progress=stop_after_first_chunk)
+    # A line written after the last checkpoint, as if the crash came mid-chunk
+    with open(report_path, 'a') as f:
+        f.write('{"user_id": 3, "partial": true}\n')
+
+    counts = run_audit(report_path, checkpoint_path, chunk_size=2, workers=1, weak_passwords=WEAK, resume=True)
+
+    assert counts['scanned'] == 5
+    assert [line['username'] for line in read_report(report_path)] == ['user1', 'user2', 'user3', 'user4']
+    assert run_audit(report_path, checkpoint_path, resume=True) == counts
+
+
+def test_audit_command_reports_counts(app, users, tmp_path):
+    result = app.test_cli_runner().invoke(args=[
+        'audit-passwords', '--workers', '1', '--skip-weak-check',
+        '--report', str(tmp_path / 'report.jsonl'), '--checkpoint', str(tmp_path / 'checkpoint.json')
+    ])
+
+    assert result.exit_code == 0, result.output
+    counts = json.loads(result.stdout.strip().splitlines()[-1])
+    assert counts == {'scanned': 5, 'fixed': 0, 'missing': 1, 'malformed': 1, 'outdated': 1}
@@ -0,0 +1,58 @@
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User
+from app.services import password_service
+from app.services.password_service import hash_password, verify_password, needs_rehash, PasswordHashingBusy
+
+CURRENT_METHOD = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture
+def inline_app(app):
+    app.config['PASSWORD_HASH_METHOD'] = CURRENT_METHOD
+    app.config['PASSWORD_HASH_WORKERS'] = 0
+    return app
+
+
+def test_hashes_with_the_configured_method(inline_app):
+    password_hash = hash_password('Password123!')
+
+    assert password_hash.startswith(CURRENT_METHOD + '$')
+    assert verify_password(password_hash, 'Password123!')
+    assert not verify_password(password_hash, 'wrong')
+    assert not needs_rehash(password_hash)
+    assert needs_rehash(generate_password_hash('Password123!', 'pbkdf2:sha256:500'))
+
+
+def test_login_upgrades_an_outdated_hash(inline_app):
+    user = User(username='olduser', email='old@example.com',
+                password_hash=generate_password_hash('Password123!', 'pbkdf2:sha256:500'))
+    db.session.add(user)
+    db.session.commit()
+
+    response = inline_app.test_client().post('/api/auth/login', json={'username': 'olduser', 'password': 'Password123!'})
+
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith(CURRENT_METHOD + '$')
+    assert user.check_password('Password123!')
+
+
+def test_saturated_pool_answers_503(inline_app, monkeypatch):
+    inline_app.config['PASSWORD_HASH_WORKERS'] = 1
+    # Every slot taken: the request must fail fast instead of queueing
+    monkeypatch.setattr(password_service, '_pool', object())
+    monkeypatch.setattr(password_service, '_slots', threading.BoundedSemaphore(1))
+    password_service._slots.acquire()
+
+    with pytest.raises(PasswordHashingBusy):
+        hash_password('Password123!')
+
+    response = inline_app.test_client().post('/api/auth/register', json={
+        'username': 'newuser', 'email': 'new@example.com', 'password': 'Password123!'
+    })
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert User.query.count() == 0
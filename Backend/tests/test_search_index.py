@@ -0,0 +1,35 @@
+from app.services.search_index import SearchIndex, build_segments
+
+
+def open_index(directory, docs):
+    build_segments(str(directory), docs)
+    index = SearchIndex(str(directory))
+    index.load()
+    return index
+
+
+def test_idf_uses_unfiltered_document_frequency(tmp_path):
+    # "rare" is in two documents, "common" in every one. Only 1 and 2 match
+    # both, with equal lengths: 1 repeats the rare term, 2 the common one,
+    # so 1 must rank first. Taking common's frequency from the two
+    # candidates left after "rare" would weigh both terms alike and put 2
+    # first.
+    docs = [(1, {'rare': 2, 'common': 1, 'filler': 1}), (2, {'rare': 1, 'common': 3})]
+    docs += [(i, {'common': 1}) for i in range(3, 21)]
+    index = open_index(tmp_path, docs)
+
+    assert index.search([('rare', False), ('common', False)]) == [1, 2]
+    assert index.search([('common', False), ('rare', False)]) == [1, 2]
+    index.close()
+
+
+def test_live_changes_count_towards_frequency(tmp_path):
+    index = open_index(tmp_path, [(1, {'rare': 2, 'common': 1, 'filler': 1}), (2, {'rare': 1, 'common': 3})])
+    for doc_id in range(3, 21):
+        index.add(doc_id, {'common': 1})
+
+    assert index.search([('rare', False), ('common', False)]) == [1, 2]
+
+    index.remove(1)
+    assert index.search([('rare', False), ('common', False)]) == [2]
+    index.close()
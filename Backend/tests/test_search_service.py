@@ -0,0 +1,72 @@
+import logging
+from datetime import datetime
+import pytest
+from sqlalchemy import insert, update
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet
+from app.services import search_service
+from app.services.search_service import indexes, rebuild_index, search_tweets
+
+
+@pytest.fixture
+def search_app(app):
+    app.config['SEARCH_REFRESH_INTERVAL'] = 0
+    indexes.clear()
+    search_service._warned_unbuilt.clear()
+    yield app
+    indexes.clear()
+
+
+def seed_author():
+    author = User(username="author", email="author@example.com", password_hash=generate_password_hash('password'))
+    db.session.add(author)
+    db.session.commit()
+    return author.id
+
+
+def write_elsewhere(statement, parameters=None):
+    # Core statements skip the ORM hooks, like a write made by another worker
+    db.session.execute(statement, parameters)
+    db.session.commit()
+
+
+def matching_ids(query):
+    return [tweet['id'] for tweet in search_tweets(query)]
+
+
+def test_catches_up_on_edits_made_elsewhere(search_app):
+    author_id = seed_author()
+    db.session.add(Tweet(content="hello world", user_id=author_id))
+    db.session.commit()
+    rebuild_index('tweets')
+    assert matching_ids("hello") == [1]
+
+    tweet = Tweet.__table__
+    write_elsewhere(update(tweet).where(tweet.c.id == 1).values(content="goodbye world", updated_at=datetime.utcnow()))
+
+    assert matching_ids("goodbye") == [1]
+    assert matching_ids("hello") == []
+
+
+def test_catch_up_is_bounded_and_resumes(search_app):
+    search_app.config.update(SEARCH_CATCHUP_BATCH=2, SEARCH_CATCHUP_MAX_ROWS=3)
+    author_id = seed_author()
+    rebuild_index('tweets')
+
+    now = datetime.utcnow()
+    write_elsewhere(insert(Tweet.__table__), [
+        {'content': f"bounded {i}", 'user_id': author_id, 'created_at': now, 'updated_at': now} for i in range(5)
+    ])
+
+    assert sorted(matching_ids("bounded")) == [1, 2, 3]
+    assert sorted(matching_ids("bounded")) == [1, 2, 3, 4, 5]
+
+
+def test_unbuilt_index_does_not_scan_the_table(search_app, caplog):
+    author_id = seed_author()
+    write_elsewhere(insert(Tweet.__table__), [{'content': "unindexed", 'user_id': author_id}])
+
+    with caplog.at_level(logging.WARNING, logger='app.services.search_service'):
+        assert matching_ids("unindexed") == []
+    assert "flask search-index" in caplog.text
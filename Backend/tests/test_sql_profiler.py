@@ -0,0 +1,48 @@
+import logging
+import pytest
+from flask import jsonify
+from sqlalchemy import text
+from app import db
+from app.utils.sql_profiler import statement_shape
+
+
+@pytest.fixture
+def client(app):
+    def repeated_queries():
+        for i in range(3):
+            db.session.execute(text('SELECT :value'), {'value': i})
+        return jsonify({"status": "success"})
+    app.add_url_rule('/test/repeated', 'repeated_queries', repeated_queries)
+    app.config.update(SQL_PROFILER_HEADERS=True, SQL_N_PLUS_ONE_THRESHOLD=3, SLOW_QUERY_MS=10 ** 6)
+    return app.test_client()
+
+
+def test_statement_shape_collapses_whitespace_and_placeholder_lists():
+    assert statement_shape('SELECT *\n  FROM user WHERE id IN (?, ?, ?)') == 'SELECT * FROM user WHERE id IN (?)'
+    assert statement_shape('SELECT * FROM user WHERE id IN (%(id_1)s, %(id_2)s)') == 'SELECT * FROM user WHERE id IN (?)'
+    assert statement_shape('SELECT * FROM user WHERE id IN (?)') == 'SELECT * FROM user WHERE id IN (?)'
+
+
+def test_request_headers_and_n_plus_one_warning(client, caplog):
+    with caplog.at_level(logging.WARNING):
+        response = client.get('/test/repeated')
+
+    assert response.headers['X-DB-Queries'] == '3'
+    assert float(response.headers['X-DB-Time']) >= 0
+    warnings = [r.getMessage() for r in caplog.records if 'Possible N+1' in r.getMessage()]
+    assert len(warnings) == 1
+    assert '3 x SELECT ?' in warnings[0]
+
+
+def test_slow_queries_are_logged_and_disabled_profiler_is_silent(app, client, caplog):
+    app.config['SLOW_QUERY_MS'] = 0
+    with caplog.at_level(logging.WARNING, logger='echo.sql.slow'):
+        client.get('/test/repeated')
+    assert sum('Slow query' in r.getMessage() and 'repeated_queries' in r.getMessage() for r in caplog.records) == 3
+
+    caplog.clear()
+    app.config['SQL_PROFILER_ENABLED'] = False
+    with caplog.at_level(logging.WARNING):
+        response = client.get('/test/repeated')
+    assert 'X-DB-Queries' not in response.headers
+    assert caplog.records == []
@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from sqlalchemy import event, select, func
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet, TimelineEntry
+from app.services.auth_service import generate_tokens
+from app.services.timeline_service import trim_timelines
+
+
+@contextmanager
+def count_writes():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed(tweets):
+    password_hash = generate_password_hash('password')
+    author = User(username='author', email='author@example.com', password_hash=password_hash)
+    reader = User(username='reader', email='reader@example.com', password_hash=password_hash)
+    db.session.add_all([author, reader])
+    db.session.flush()
+    reader.follow(author)
+    db.session.commit()
+    db.session.add_all(Tweet(content=f"tweet {i}", user_id=author.id) for i in range(tweets))
+    db.session.commit()
+    return author, reader
+
+
+def timeline_length(user_id):
+    return db.session.scalar(select(func.count()).select_from(TimelineEntry).where(TimelineEntry.user_id == user_id))
+
+
+def test_home_timeline_read_does_not_write(app):
+    app.config['TIMELINE_MAX_LENGTH'] = 5
+    author, reader = seed(tweets=8)
+    headers = {'Authorization': f"Bearer {generate_tokens(reader.id)['access_token']}"}
+
+    with count_writes() as statements:
+        response = app.test_client().get('/api/timeline/home?limit=3', headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['tweets']) == 3
+    assert statements == []
+    assert timeline_length(reader.id) == 8
+
+
+def test_trim_timelines_bounds_fanned_out_timelines(app):
+    app.config['TIMELINE_MAX_LENGTH'] = 5
+    author, reader = seed(tweets=8)
+
+    assert trim_timelines(chunk_size=1) == 2
+    assert timeline_length(reader.id) == timeline_length(author.id) == 5
+    newest = db.session.scalars(select(Tweet.id).order_by(Tweet.id.desc()).limit(5)).all()
+    kept = db.session.scalars(select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == reader.id)).all()
+    assert sorted(kept) == sorted(newest)
+    assert trim_timelines() == 0
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime
+import pytest
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet
+from app.services.trend_service import TrendTracker
+
+
+@pytest.fixture
+def tracker(app):
+    # Only the replay runs in the background; the test polls by hand
+    app.config['TRENDS_POLL_INTERVAL'] = 3600
+    tracker = TrendTracker()
+    yield tracker
+    tracker._stop.set()
+
+
+def seed_author():
+    author = User(username="author", email="author@example.com", password_hash=generate_password_hash('password'))
+    db.session.add(author)
+    db.session.commit()
+    return author.id
+
+
+def tweet(author_id, content, tweet_id=None):
+    db.session.add(Tweet(id=tweet_id, content=content, user_id=author_id, created_at=datetime.utcnow()))
+    db.session.commit()
+
+
+def wait_until_ready(tracker, timeout=5):
+    tracker.top('1h', 'hashtags')
+    deadline = time.monotonic() + timeout
+    while not tracker.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert tracker.ready
+
+
+def hashtag_counts(tracker):
+    return dict(tracker.top('1h', 'hashtags', limit=50))
+
+
+def test_replay_runs_outside_the_request(app, tracker):
+    author_id = seed_author()
+    tweet(author_id, "#replayed")
+
+    start = time.monotonic()
+    assert tracker.top('1h', 'hashtags') in ([], [('replayed', 1)])
+    assert time.monotonic() - start < 1
+    wait_until_ready(tracker)
+    assert hashtag_counts(tracker) == {'replayed': 1}
+
+
+def test_late_commits_are_counted_once(app, tracker):
+    author_id = seed_author()
+    wait_until_ready(tracker)
+    tweet(author_id, "#early", tweet_id=1)
+    tweet(author_id, "#early", tweet_id=3)
+    tracker.poll()
+    assert hashtag_counts(tracker) == {'early': 2}
+
+    # Id 2 was allocated before 3 but its transaction committed afterwards
+    tweet(author_id, "#late", tweet_id=2)
+    tracker.poll()
+    tracker.poll()
+
+    assert hashtag_counts(tracker) == {'early': 2, 'late': 1}
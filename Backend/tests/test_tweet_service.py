@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import User, Tweet, Like
+from app.services.tweet_service import load_tweets
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed(authors=10, tweets=50):
+    # One password hash for every user, hashing is not what is under test
+    password_hash = generate_password_hash('password')
+    users = [
+        User(username=f"author{i}", email=f"author{i}@example.com", password_hash=password_hash)
+        for i in range(authors)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+    rows = [Tweet(content=f"tweet {i}", user_id=users[i % authors].id) for i in range(tweets)]
+    db.session.add_all(rows)
+    db.session.flush()
+    viewer = users[0]
+    db.session.add_all(Like(user_id=viewer.id, tweet_id=tweet.id) for tweet in rows[::3])
+    db.session.commit()
+    return viewer, [tweet.id for tweet in rows]
+
+
+def queries_for(tweet_ids, viewer_id):
+    # Start from an empty identity map so nothing is served without a query
+    db.session.expunge_all()
+    with count_queries() as statements:
+        result = load_tweets(tweet_ids, viewer_id=viewer_id)
+    return len(statements), result
+
+
+def test_query_count_is_constant_in_page_size(app):
+    viewer, tweet_ids = seed()
+
+    small_count, small = queries_for(tweet_ids[:5], viewer.id)
+    large_count, large = queries_for(tweet_ids[:50], viewer.id)
+
+    assert len(small) == 5
+    assert len(large) == 50
+    assert small_count == large_count == 3
+
+
+def test_preserves_order_and_flags_likes(app):
+    viewer, tweet_ids = seed(authors=3, tweets=9)
+    page = list(reversed(tweet_ids))
+
+    result = load_tweets(page, viewer_id=viewer.id)
+
+    assert [tweet['id'] for tweet in result] == page
+    liked = {tweet['id'] for tweet in result if tweet['liked']}
+    assert liked == set(tweet_ids[::3])
+    assert all(tweet['like_count'] == (1 if tweet['id'] in liked else 0) for tweet in result)
+    assert all(tweet['author']['username'].startswith('author') for tweet in result)
+
+
+def test_empty_page_runs_no_queries(app):
+    with count_queries() as statements:
+        assert load_tweets([]) == []
+    assert statements == []
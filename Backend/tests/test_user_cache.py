@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import User
+from app.services.auth_service import generate_tokens
+from app.services.user_cache import user_cache
+
+
+@pytest.fixture
+def users(app):
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", password_hash='x') for i in range(2)]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+@pytest.fixture
+def statements(app):
+    seen = []
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_hits_are_served_without_queries(users, statements):
+    user_id = users[0].id
+    snapshot = user_cache.get(user_id)
+
+    statements.clear()
+    assert user_cache.get(str(user_id)) is snapshot
+    assert statements == []
+    assert snapshot.username == 'user0'
+    assert user_cache.get(10 ** 6) is None
+
+
+def test_expired_entries_are_reloaded(app, users):
+    app.config['USER_CACHE_TTL'] = 0
+    snapshot = user_cache.get(users[0].id)
+
+    assert user_cache.get(users[0].id) is not snapshot
+
+
+def test_load_racing_an_invalidation_is_not_stored(users):
+    user_id = users[0].id
+    db.session.expire_all()
+
+    def invalidate_mid_load(conn, cursor, statement, *args):
+        user_cache.invalidate(user_id)
+    event.listen(db.engine, 'before_cursor_execute', invalidate_mid_load)
+    try:
+        raced = user_cache.get(user_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', invalidate_mid_load)
+
+    assert raced.id == user_id
+    snapshot = user_cache.get(user_id)
+    assert snapshot is not raced
+    assert user_cache.get(user_id) is snapshot
+
+
+def test_follow_counts_are_fresh_after_commit(users):
+    follower, followed = users
+    assert user_cache.get(followed.id).followers_count == 0
+
+    follower.follow(followed)
+    db.session.commit()
+
+    assert user_cache.get(followed.id).followers_count == 1
+    assert user_cache.get(follower.id).following_count == 1
+
+
+def test_me_reflects_profile_updates(app, users):
+    client = app.test_client()
+    headers = {'Authorization': f"Bearer {generate_tokens(users[0].id)['access_token']}"}
+    assert client.get('/api/auth/me', headers=headers).get_json()['user']['bio'] in (None, '')
+
+    response = client.put('/api/auth/update-profile', json={'bio': 'hello'}, headers=headers)
+    assert response.status_code == 200
+
+    assert client.get('/api/auth/me', headers=headers).get_json()['user']['bio'] == 'hello'
@@ -0,0 +1,51 @@
+import pytest
+from app import db
+from app.models import User
+from app.services.user_directory import user_directory, DuplicateUserError, InvalidUsernameError
+
+
+@pytest.fixture
+def directory(app):
+    user_directory.clear()
+    yield user_directory
+    user_directory.clear()
+
+
+def new_user(username, email):
+    return User(username=username, email=email, password_hash='x')
+
+
+def test_resolves_by_username_and_email(directory):
+    user = directory.register(new_user('alice', 'alice@example.com'))
+
+    assert directory.resolve('alice').id == user.id
+    assert directory.resolve('alice@example.com').id == user.id
+    assert directory.resolve('bob') is None
+
+
+def test_cached_id_is_rechecked_after_a_rename(directory):
+    user = directory.register(new_user('alice', 'alice@example.com'))
+    directory.resolve('alice')
+    user.username = 'alice2'
+    db.session.commit()
+
+    assert directory.resolve('alice') is None
+    assert directory.resolve('alice2').id == user.id
+
+
+def test_duplicates_are_rejected_by_the_constraints(directory):
+    directory.register(new_user('alice', 'alice@example.com'))
+    directory.clear()
+
+    with pytest.raises(DuplicateUserError) as e:
+        directory.register(new_user('alice', 'other@example.com'))
+    assert e.value.field == 'username'
+    with pytest.raises(DuplicateUserError) as e:
+        directory.register(new_user('bob', 'alice@example.com'))
+    assert e.value.field == 'email'
+
+
+def test_usernames_with_at_sign_are_rejected(directory):
+    with pytest.raises(InvalidUsernameError):
+        directory.register(new_user('admin@site', 'admin@example.com'))
+    assert User.query.count() == 0
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app import db
+from app.models import User
+from app.schemas import UserSchema, dump
+from app.services.auth_service import generate_tokens
+
+
+@pytest.fixture
+def user_headers(app):
+    user = User(username='alice', email='alice@example.com', password_hash='x', bio='hi')
+    db.session.add(user)
+    db.session.commit()
+    return {'Authorization': f"Bearer {generate_tokens(user.id)['access_token']}"}
+
+
+def test_me_returns_only_the_requested_fields(app, user_headers):
+    response = app.test_client().get('/api/auth/me?fields=id,nickname,avatar', headers=user_headers)
+
+    assert response.status_code == 200
+    assert set(response.get_json()['user']) == {'id', 'nickname', 'avatar'}
+    assert response.get_json()['user']['avatar'] == '/uploads/avatars/default_avatar.jpg'
+
+
+def test_update_profile_uses_the_field_selection(app, user_headers):
+    client = app.test_client()
+
+    response = client.put('/api/auth/update-profile?fields=nickname,bio', headers=user_headers,
+                          json={'nickname': 'Alice'})
+    assert response.status_code == 200
+    assert response.get_json()['user'] == {'nickname': 'Alice', 'bio': 'hi'}
+
+    response = client.put('/api/auth/update-profile?fields=nickname,secret', headers=user_headers,
+                          json={'nickname': 'Mallory'})
+    assert response.status_code == 400
+    assert db.session.scalar(db.select(User.nickname)) == 'Alice'
+
+
+def test_dump_reuses_one_schema_per_selection(app):
+    user = User(id=1, username='alice', email='alice@example.com', created_at=datetime(2024, 1, 1))
+    with app.test_request_context('/?fields=username,id'):
+        first = dump(UserSchema, user)
+    with app.test_request_context('/?fields=id,username'):
+        second = dump(UserSchema, user)
+
+    assert first == second == {'id': 1, 'username': 'alice'}
+    from app.schemas.base import _schema
+    assert _schema(UserSchema, ('id', 'username')) is _schema(UserSchema, ('id', 'username'))
+
+
+def test_orjson_provider_matches_the_stdlib(app):
+    pytest.importorskip('orjson')
+    payload = {'b': [1, 2.5, None], 'a': 'é', 'c': True, 'when': datetime(2024, 1, 2, 3, 4, 5)}
+
+    assert json.loads(app.json.dumps(payload)) == json.loads(DefaultJSONProvider(app).dumps(payload))
+    assert app.json.loads(app.json.dumps({'x': 1})) == {'x': 1}